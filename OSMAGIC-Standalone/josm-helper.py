@@ -12,14 +12,24 @@ Run this when you want to use the "Export to JOSM" feature.
 """
 
 import http.server
-import socketserver
 import os
+import sys
 import json
 from datetime import datetime
-import shutil
+import urllib.parse
+import argparse
 import ctypes
 from ctypes import wintypes
 
+# osmagic_http.py (shared with server.py) ships next to this script. The embeddable
+# Python that START-OSMAGIC.bat downloads does not put the script's folder on sys.path.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from osmagic_http import (
+    RAW_EXPORT_TYPES, BATCH_EXPORT_FORMATS, ExportTooLarge, ExportDirectory, safe_sequence_id,
+    iter_request_body, batch_export_filename, batch_documents, batch_zip_entries, iter_merged_osm,
+    KeepAliveHandlerMixin, create_server
+)
+
 # Define FLASHWINFO structure for window flashing
 class FLASHWINFO(ctypes.Structure):
     _fields_ = [
@@ -33,10 +43,13 @@ class FLASHWINFO(ctypes.Structure):
 # Configuration
 HELPER_PORT = 8001  # Different from main server
 EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports')
+SERVER_MODE = 'threaded'   # 'threaded' = bounded worker pool, 'single' = one request at a time
+MAX_WORKERS = 8            # Worker threads serving connections in threaded mode
+MAX_EXPORT_BYTES = 512 * 1024 * 1024     # Largest accepted export (override with --max-export-mb)
 
 # Create exports directory
-if not os.path.exists(EXPORT_DIR):
-    os.makedirs(EXPORT_DIR)
+export_directory = ExportDirectory(EXPORT_DIR, MAX_EXPORT_BYTES)
+
 
 def focus_josm_window():
     """Find and bring JOSM window to foreground using Windows API"""
@@ -157,47 +170,41 @@ def focus_josm_window():
         return False
 
 
-class JOSMHelperHandler(http.server.BaseHTTPRequestHandler):
+class JOSMHelperHandler(KeepAliveHandlerMixin, http.server.BaseHTTPRequestHandler):
+    export_directory = export_directory
+
     def log_message(self, format, *args):
         timestamp = datetime.now().strftime('%H:%M:%S')
         print(f"[{timestamp}] {args[0]}")
     
-    def send_cors_headers(self):
+    def end_headers(self):
         # Allow requests from any origin (GitHub Pages, localhost, etc.)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Cache-Control', self.cache_control or 'no-cache')
+        self.cache_control = None
+        super().end_headers()
     
     def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_cors_headers()
-        self.end_headers()
+        self.send_empty(200)
     
     def do_GET(self):
         if self.path == '/' or self.path == '/ping':
             # Health check endpoint (support both / and /ping)
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_cors_headers()
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            self.send_json(200, {
                 'status': 'ok',
                 'service': 'josm-helper',
                 'port': HELPER_PORT
-            }).encode())
+            })
         
         elif self.path == '/focus-josm':
             success = focus_josm_window()
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_cors_headers()
-            self.end_headers()
             result = {
                 'success': success,
                 'message': 'JOSM focused' if success else 'JOSM window not found'
             }
-            self.wfile.write(json.dumps(result).encode())
+            self.send_json(200, result)
             # Message already printed by focus_josm_window()
         
         elif self.path == '/test-focus':
@@ -212,89 +219,165 @@ class JOSMHelperHandler(http.server.BaseHTTPRequestHandler):
                     break
                 time.sleep(0.3)
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_cors_headers()
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            self.send_json(200, {
                 'success': any(results),
                 'attempts': results,
                 'message': 'JOSM focused' if any(results) else 'JOSM window not found after 3 attempts'
-            }).encode())
+            })
         
         elif self.path.startswith('/exports/'):
-            # Serve exported OSM files
-            filename = self.path[9:]
-            filepath = os.path.join(EXPORT_DIR, filename)
-            
-            if os.path.exists(filepath) and os.path.isfile(filepath):
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/xml')
-                self.send_cors_headers()
-                self.end_headers()
-                with open(filepath, 'rb') as f:
-                    shutil.copyfileobj(f, self.wfile)
-            else:
-                self.send_response(404)
-                self.send_cors_headers()
-                self.end_headers()
+            self.serve_export(urllib.parse.urlsplit(self.path).path)
         
         else:
-            self.send_response(404)
-            self.send_cors_headers()
-            self.end_headers()
+            self.send_empty(404)
+    
+    def do_HEAD(self):
+        path = urllib.parse.urlsplit(self.path).path
+        if path.startswith('/exports/'):
+            self.serve_export(path, head_only=True)
+        else:
+            self.send_empty(404)
     
     def do_POST(self):
-        if self.path == '/export':
-            try:
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                data = json.loads(post_data.decode('utf-8'))
-                
-                sequence_id = data.get('sequenceId', 'unknown')
-                osm_xml = data.get('osmXml', '')
-                
-                if not osm_xml:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json')
-                    self.send_cors_headers()
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'No OSM XML provided'}).encode())
-                    return
-                
-                filename = f'sequence_{sequence_id}.osm'
-                filepath = os.path.join(EXPORT_DIR, filename)
-                
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(osm_xml)
-                
-                file_url = f'http://localhost:{HELPER_PORT}/exports/{filename}'
-                
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_cors_headers()
-                self.end_headers()
-                self.wfile.write(json.dumps({
-                    'success': True,
-                    'url': file_url,
-                    'filename': filename
-                }).encode())
-                
-                print(f"  -> Saved: {filename}")
-                
-            except Exception as e:
-                self.send_response(500)
-                self.send_header('Content-Type', 'application/json')
-                self.send_cors_headers()
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)}).encode())
+        parsed = urllib.parse.urlsplit(self.path)
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        
+        if parsed.path == '/export/raw' or (parsed.path == '/export' and content_type in RAW_EXPORT_TYPES):
+            # Raw OSM XML body - streamed to disk without holding it in memory
+            self.handle_raw_export(urllib.parse.parse_qs(parsed.query))
+        elif parsed.path == '/export':
+            # Legacy JSON body: {"sequenceId": ..., "osmXml": ...}
+            self.handle_json_export()
+        elif parsed.path == '/export/batch':
+            self.handle_batch_export()
         else:
-            self.send_response(404)
-            self.send_cors_headers()
-            self.end_headers()
+            # Unread request body would corrupt the next keep-alive request
+            self.close_connection = True
+            self.send_empty(404)
+    
+    def handle_raw_export(self, query):
+        """Handle POST /export/raw?sequenceId=<id> with the OSM XML as the request body"""
+        sequence_id = safe_sequence_id(query.get('sequenceId', ['unknown'])[0])
+        filename = f'sequence_{sequence_id}.osm'
+        
+        try:
+            declared_length = int(self.headers.get('Content-Length') or 0)
+            if declared_length > self.export_directory.max_bytes:
+                self.close_connection = True
+                self.send_json(413, {'error': f'Export exceeds {self.export_directory.max_bytes} bytes'})
+                return
+            
+            size = self.export_directory.write(iter_request_body(self.rfile, self.headers), filename)
+            
+            self.send_json(200, {
+                'success': True,
+                'url': f'http://localhost:{HELPER_PORT}/exports/{filename}',
+                'filename': filename,
+                'bytes': size
+            })
+            print(f"  -> Saved: {filename} ({size} bytes, streamed)")
+            
+        except ExportTooLarge as e:
+            self.close_connection = True
+            self.send_json(413, {'error': str(e)})
+        except ValueError as e:
+            self.close_connection = True
+            self.send_json(400, {'error': str(e)})
+        except Exception as e:
+            self.close_connection = True
+            self.send_json(500, {'error': str(e)})
+    
+    def handle_batch_export(self):
+        """Handle POST /export/batch: several OSM documents in one .osm file or one zip.
+
+        Body is {"exports": [{"sequenceId": ..., "osmXml": ...}, ...]} plus an
+        optional "format" ("osm" or "zip").
+        """
+        try:
+            data = self.read_json_body(self.export_directory.max_bytes)
+            export_format = data.get('format', 'osm')
+            if export_format not in BATCH_EXPORT_FORMATS:
+                raise ValueError(f'format must be one of: {", ".join(BATCH_EXPORT_FORMATS)}')
+            
+            documents = batch_documents(data.get('exports'))
+            sequence_ids = [sequence_id for sequence_id, _ in documents]
+            filename = batch_export_filename(sequence_ids, export_format)
+            if export_format == 'zip':
+                size = self.export_directory.write_zip(batch_zip_entries(documents), filename)
+            else:
+                size = self.export_directory.write(iter_merged_osm(documents), filename)
+            
+            self.send_json(200, {
+                'success': True,
+                'url': f'http://localhost:{HELPER_PORT}/exports/{filename}',
+                'filename': filename,
+                'format': export_format,
+                'sequenceCount': len(sequence_ids),
+                'bytes': size
+            })
+            print(f"  -> Saved: {filename} ({len(sequence_ids)} sequences, {size} bytes)")
+            
+        except ExportTooLarge as e:
+            self.close_connection = True
+            self.send_json(413, {'error': str(e)})
+        except (ValueError, AttributeError) as e:
+            self.close_connection = True
+            self.send_json(400, {'error': str(e)})
+        except Exception as e:
+            self.close_connection = True
+            self.send_json(500, {'error': str(e)})
+    
+    def handle_json_export(self):
+        """Handle the original JSON export request"""
+        try:
+            content_length = int(self.headers['Content-Length'])
+            if content_length > self.export_directory.max_bytes:
+                self.close_connection = True
+                self.send_json(413, {'error': f'Export exceeds {self.export_directory.max_bytes} bytes'})
+                return
+            post_data = self.rfile.read(content_length)
+            data = json.loads(post_data.decode('utf-8'))
+            
+            sequence_id = safe_sequence_id(data.get('sequenceId', 'unknown'))
+            osm_xml = data.get('osmXml', '')
+            
+            if not osm_xml:
+                self.send_json(400, {'error': 'No OSM XML provided'})
+                return
+            
+            filename = f'sequence_{sequence_id}.osm'
+            self.export_directory.write([osm_xml.encode('utf-8')], filename)
+            
+            file_url = f'http://localhost:{HELPER_PORT}/exports/{filename}'
+            
+            self.send_json(200, {
+                'success': True,
+                'url': file_url,
+                'filename': filename
+            })
+            
+            print(f"  -> Saved: {filename}")
+            
+        except Exception as e:
+            # Request body may be partially read - don't reuse the connection
+            self.close_connection = True
+            self.send_json(500, {'error': str(e)})
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='JOSM Helper - OSMAGIC Integration')
+    parser.add_argument('--mode', choices=['threaded', 'single'], default=SERVER_MODE,
+                        help='threaded = bounded worker pool with keep-alive, single = one request at a time')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help='Number of worker threads in threaded mode')
+    parser.add_argument('--max-export-mb', type=int, default=MAX_EXPORT_BYTES // (1024 * 1024),
+                        help='Largest accepted export upload in megabytes')
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
+    export_directory.max_bytes = args.max_export_mb * 1024 * 1024
     httpd = None
     try:
         # Change to script directory first
@@ -309,6 +392,10 @@ def main():
         print(f"  Helper running on: http://localhost:{HELPER_PORT}")
         print(f"  Export directory:  {EXPORT_DIR}")
         print(f"  Script directory:  {script_dir}")
+        if args.mode == 'single':
+            print(f"  Serving mode:      single (one request at a time)")
+        else:
+            print(f"  Serving mode:      threaded ({args.workers} workers)")
         print()
         print("  This helper enables 'Export to JOSM' from")
         print("  GitHub Pages or any hosted version of OSMAGIC.")
@@ -327,9 +414,9 @@ def main():
         
         # Try to bind to the port with better error handling
         try:
-            # Use allow_reuse_address to handle TIME_WAIT states
-            socketserver.TCPServer.allow_reuse_address = True
-            httpd = socketserver.TCPServer(("", HELPER_PORT), JOSMHelperHandler)
+            # Both server types use allow_reuse_address to handle TIME_WAIT states
+            httpd = create_server(args.mode, HELPER_PORT, JOSMHelperHandler, max_workers=args.workers,
+                                  thread_name_prefix='josm-helper')
             print(f"  Server bound to port {HELPER_PORT} [OK]")
             print(f"  Listening for connections...")
             print(f"  Test: http://localhost:{HELPER_PORT}/ping")
@@ -355,7 +442,7 @@ def main():
                 print(f"  [!] Error: {error_msg}")
             raise
         except KeyboardInterrupt:
-            print("\n\n  JOSM Helper stopped by user.")
+            print("\n\n  JOSM Helper stopped by user (finishing active requests)...")
         except Exception as e:
             print(f"\n  [!] Server error: {e}")
             print(f"  [!] Error type: {type(e).__name__}")
@@ -0,0 +1,683 @@
+"""
+HTTP plumbing shared by server.py and josm-helper.py
+
+- PooledHTTPServer: bounded worker pool with keep-alive
+- Request bodies streamed in blocks, exports written through an atomic rename
+- Batch exports: several OSM documents merged into one file (or one zip)
+- File responses with ETag/Last-Modified revalidation, gzip and byte ranges
+"""
+
+import socketserver
+import os
+import json
+import hashlib
+import gzip
+import zlib
+import email.utils
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import timezone
+import tempfile
+import urllib.parse
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+KEEPALIVE_TIMEOUT = 15     # Seconds a request may stall mid-read before the connection is dropped
+KEEPALIVE_IDLE_TIMEOUT = 2  # Seconds an idle keep-alive connection may hold a worker between requests
+EXPORT_CHUNK_SIZE = 64 * 1024            # Block size used when streaming uploads to disk
+RAW_EXPORT_TYPES = ('application/xml', 'text/xml', 'application/osm+xml', 'application/octet-stream')
+
+
+# ---------------------------------------------------------------------------
+# Export uploads - streamed to disk with a size limit
+# ---------------------------------------------------------------------------
+
+class ExportTooLarge(Exception):
+    """Raised when an export upload exceeds the export size limit"""
+
+
+def safe_sequence_id(sequence_id):
+    """Strip characters that could escape the export directory from a sequence id"""
+    cleaned = ''.join(c for c in str(sequence_id) if c.isalnum() or c in '-_.').strip('.')
+    return cleaned or 'unknown'
+
+
+def iter_request_body(rfile, headers, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a request body in fixed-size blocks (Content-Length or chunked)"""
+    if 'chunked' in headers.get('Transfer-Encoding', '').lower():
+        while True:
+            size_line = rfile.readline(65537)
+            if not size_line:
+                raise ConnectionError('Connection closed during chunked upload')
+            size = int(size_line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                # Skip optional trailers up to the terminating blank line
+                while rfile.readline(65537) not in (b'\r\n', b'\n', b''):
+                    pass
+                return
+            remaining = size
+            while remaining > 0:
+                block = rfile.read(min(chunk_size, remaining))
+                if not block:
+                    raise ConnectionError('Connection closed during chunked upload')
+                remaining -= len(block)
+                yield block
+            rfile.readline(65537)  # CRLF after the chunk data
+    else:
+        remaining = int(headers.get('Content-Length') or 0)
+        while remaining > 0:
+            block = rfile.read(min(chunk_size, remaining))
+            if not block:
+                raise ConnectionError('Connection closed during upload')
+            remaining -= len(block)
+            yield block
+
+
+class ExportDirectory:
+    """Directory of finished exports, served under /exports/.
+
+    Files only appear in it through an atomic rename, so readers never see
+    a half-written file, and a failed or oversized export leaves the
+    previous one untouched.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, filename):
+        return os.path.join(self.root, filename)
+
+    def _write(self, filename, write_blocks):
+        fd, temp_path = tempfile.mkstemp(prefix='.upload-', suffix='.tmp', dir=self.root)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                written = write_blocks(f)
+            if written == 0:
+                raise ValueError('No OSM XML provided')
+            os.replace(temp_path, self.path(filename))
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        return written
+
+    def _check_size(self, written):
+        if written > self.max_bytes:
+            raise ExportTooLarge(f'Export exceeds {self.max_bytes} bytes')
+
+    def write(self, blocks, filename):
+        """Stream blocks to root/filename; returns the number of bytes written"""
+        def write_blocks(f):
+            written = 0
+            for block in blocks:
+                written += len(block)
+                self._check_size(written)
+                f.write(block)
+            return written
+        return self._write(filename, write_blocks)
+
+    def write_zip(self, entries, filename):
+        """Write (name, blocks) entries to root/filename as a zip; returns the zip's size"""
+        def write_entries(f):
+            written = 0
+            with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for name, blocks in entries:
+                    with archive.open(name, 'w') as entry:
+                        for block in blocks:
+                            written += len(block)
+                            self._check_size(written)
+                            entry.write(block)
+            return written
+        self._write(filename, write_entries)
+        return os.path.getsize(self.path(filename))
+
+
+# ---------------------------------------------------------------------------
+# Batch export - several sequences in one .osm file (or one zip)
+# ---------------------------------------------------------------------------
+
+BATCH_EXPORT_FORMATS = ('osm', 'zip')
+OSM_ELEMENT_TYPES = ('node', 'way', 'relation')
+
+
+def batch_export_filename(sequence_ids, export_format):
+    """Stable file name for a batch: the same ids always map to the same file"""
+    digest = hashlib.sha1('\n'.join(sequence_ids).encode('utf-8')).hexdigest()[:10]
+    return f'batch_{len(sequence_ids)}_{digest}.{export_format}'
+
+
+def export_content_type(filename):
+    return 'application/zip' if filename.endswith('.zip') else 'application/xml'
+
+
+def renumber_osm_document(osm_xml, next_ids, written_ids):
+    """Top-level elements of one .osm document, with ids made unique within a batch.
+
+    Negative (new) ids are replaced by the next free id of their type from
+    next_ids, and nd/member references follow them. Positive ids are
+    existing OSM objects: they are kept, and dropped if an earlier document
+    of the batch already wrote them.
+    """
+    try:
+        root = ET.fromstring(osm_xml)
+    except ET.ParseError as e:
+        raise ValueError(f'Invalid OSM XML: {e}')
+    if root.tag != 'osm':
+        raise ValueError('Invalid OSM XML: root element is not <osm>')
+
+    id_maps = {element_type: {} for element_type in OSM_ELEMENT_TYPES}
+    elements = []
+    for element in root:
+        element_type = element.tag
+        if element_type not in id_maps:
+            continue
+        try:
+            old_id = int(element.get('id'))
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid OSM XML: {element_type} without a numeric id')
+        if old_id < 0:
+            new_id = next_ids[element_type]
+            next_ids[element_type] -= 1
+            id_maps[element_type][old_id] = new_id
+            element.set('id', str(new_id))
+        elif (element_type, old_id) in written_ids:
+            continue
+        else:
+            written_ids.add((element_type, old_id))
+        elements.append(element)
+
+    for element in elements:
+        for child in element:
+            if child.tag == 'nd':
+                id_map = id_maps['node']
+            elif child.tag == 'member':
+                id_map = id_maps.get(child.get('type'), {})
+            else:
+                continue
+            ref = child.get('ref', '')
+            if ref.startswith('-') and int(ref) in id_map:
+                child.set('ref', str(id_map[int(ref)]))
+    return elements
+
+
+def iter_merged_osm(documents):
+    """Yield one .osm document (as bytes) merging (sequence_id, osm_xml) documents"""
+    next_ids = {element_type: -1000 for element_type in OSM_ELEMENT_TYPES}
+    written_ids = set()
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<osm version="0.6" generator="OSMAGIC Task Manager">\n').encode('utf-8')
+    for sequence_id, osm_xml in documents:
+        lines = [f'  <!-- Sequence ID: {sequence_id} -->\n']
+        for element in renumber_osm_document(osm_xml, next_ids, written_ids):
+            ET.indent(element, space='  ', level=1)
+            element.tail = '\n'
+            lines.append('  ' + ET.tostring(element, encoding='unicode'))
+        lines.append('\n')
+        yield ''.join(lines).encode('utf-8')
+    yield b'</osm>'
+
+
+def batch_documents(exports):
+    """(sequence_id, osm_xml bytes) pairs from a batch request's "exports" list"""
+    if not isinstance(exports, list) or not exports:
+        raise ValueError('exports must be a non-empty list')
+    documents = []
+    for item in exports:
+        osm_xml = item.get('osmXml') if isinstance(item, dict) else None
+        if not osm_xml or not isinstance(osm_xml, str):
+            raise ValueError('No OSM XML provided')
+        documents.append((str(item.get('sequenceId', 'unknown')), osm_xml.encode('utf-8')))
+    return documents
+
+
+def batch_zip_entries(documents):
+    """(filename, blocks) of each (sequence_id, osm_xml) document, for zipped batches"""
+    return ((f'sequence_{safe_sequence_id(sequence_id)}.osm', [osm_xml])
+            for sequence_id, osm_xml in documents)
+
+
+# ---------------------------------------------------------------------------
+# Conditional requests and gzip for served files
+# ---------------------------------------------------------------------------
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/xml',
+                      'application/geo+json', 'application/manifest+json', 'image/svg+xml')
+MIN_COMPRESS_BYTES = 1024      # Smaller bodies are not worth the gzip overhead
+GZIP_LEVEL = 6
+
+
+def is_compressible(content_type):
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip (an explicit gzip entry overrides *)"""
+    qualities = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def file_etag(st, content_encoding=None):
+    """Strong ETag of one version of a file; each content encoding gets its own tag"""
+    tag = f'{st.st_mtime_ns:x}-{st.st_size:x}'
+    return f'"{tag}-{content_encoding}"' if content_encoding else f'"{tag}"'
+
+
+def is_not_modified(headers, etag, mtime):
+    """Whether a conditional GET can be answered with 304.
+
+    If-None-Match wins over If-Modified-Since, as RFC 9110 requires.
+    """
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match is not None:
+        if if_none_match.strip() == '*':
+            return True
+        return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return int(mtime) <= since.timestamp()
+    return False
+
+
+def iter_gzip(f, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a file's contents gzip-compressed, one block at a time"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    while True:
+        block = f.read(chunk_size)
+        if not block:
+            break
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range request lies entirely outside the file"""
+
+
+def parse_byte_range(range_header, size):
+    """(start, end) of a single "bytes=" range, inclusive, or None to send the whole file.
+
+    Multiple ranges and malformed headers are ignored (a full 200 is always
+    a valid answer); a range starting past the end raises RangeNotSatisfiable.
+    """
+    unit, _, spec = (range_header or '').partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                return None
+        else:
+            suffix = int(last)
+            if suffix == 0:
+                raise RangeNotSatisfiable()
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+    if start < 0 or start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def if_range_matches(headers, etag, mtime):
+    """Whether a Range request's If-Range precondition (if any) still holds"""
+    if_range = headers.get('If-Range')
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag       # Strong comparison; weak tags never match
+    try:
+        since = email.utils.parsedate_to_datetime(if_range)
+    except (TypeError, ValueError):
+        return False
+    return int(mtime) == int(since.timestamp())
+
+
+MAX_PRECOMPRESS_BYTES = 16 * 1024 * 1024   # Larger static files are compressed while streaming
+
+
+class PrecompressedFiles:
+    """gzip copies of static files, compressed once per file version (mtime and size)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, path, st):
+        version = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry[0] == version:
+            return entry[1]
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        compressed = gzip.compress(data, GZIP_LEVEL, mtime=0)
+        # Only cache what was read from the version that was stat'ed
+        if len(data) == st.st_size:
+            with self._lock:
+                self._entries[path] = (version, compressed)
+        return compressed
+
+
+precompressed_files = PrecompressedFiles()
+
+
+# ---------------------------------------------------------------------------
+# Serving - bounded worker pool and the request handler side of keep-alive
+# ---------------------------------------------------------------------------
+
+class PooledHTTPServer(socketserver.TCPServer):
+    """TCP server that hands each connection to a bounded pool of worker threads.
+
+    A slow /export upload or a JOSM focus retry no longer blocks static files
+    and /exports/ downloads queued behind it. When every worker is busy the
+    accept loop waits for a free slot, so extra connections queue in the
+    kernel backlog instead of spawning unbounded threads. Keep-alive
+    connections that are only waiting for their next request are closed to
+    free a slot, so idle browser tabs cannot starve new clients.
+    """
+    allow_reuse_address = True
+    request_queue_size = 64
+
+    def __init__(self, server_address, handler_class, max_workers, thread_name_prefix='osmagic-worker'):
+        super().__init__(server_address, handler_class)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._idle_connections = set()
+        self._idle_lock = threading.Lock()
+
+    def set_connection_idle(self, connection, idle):
+        """Track keep-alive connections that are waiting for their next request"""
+        with self._idle_lock:
+            if idle:
+                self._idle_connections.add(connection)
+            else:
+                self._idle_connections.discard(connection)
+
+    def close_idle_connections(self):
+        """Shut down keep-alive connections waiting for a request; their workers return to the pool"""
+        with self._idle_lock:
+            for connection in self._idle_connections:
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            # Every worker is taken - reclaim the idle ones, then block until one is free (backpressure)
+            self.close_idle_connections()
+            self._slots.acquire()
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # Executor already shut down - drop the connection
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.set_connection_idle(request, False)
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        # Graceful shutdown: stop accepting, then let in-flight requests finish
+        super().server_close()
+        # Idle keep-alive connections would otherwise hold their worker until the timeout
+        self.close_idle_connections()
+        self._executor.shutdown(wait=True)
+
+
+def create_server(mode, port, handler_class, max_workers, thread_name_prefix='osmagic-worker'):
+    """Create the HTTP server for the selected serving mode"""
+    if mode == 'single':
+        # Legacy behaviour: one request at a time, no keep-alive
+        handler_class.protocol_version = 'HTTP/1.0'
+        socketserver.TCPServer.allow_reuse_address = True
+        return socketserver.TCPServer(("", port), handler_class)
+    return PooledHTTPServer(("", port), handler_class, max_workers=max_workers,
+                            thread_name_prefix=thread_name_prefix)
+
+
+class KeepAliveHandlerMixin:
+    """Response helpers for a BaseHTTPRequestHandler on a keep-alive connection.
+
+    Every response carries a Content-Length or is chunked, so the connection
+    can take the next request. Subclasses set export_directory to serve
+    /exports/ and put CORS and Cache-Control headers in end_headers
+    (cache_control holds the value send_file chose for the response).
+    """
+    # HTTP/1.1 enables keep-alive; every response must carry Content-Length
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls on reused connections
+    disable_nagle_algorithm = True
+    # Cache-Control for the response being sent; None means no-store (API responses)
+    cache_control = None
+    export_directory = None
+
+    def handle_one_request(self):
+        # Between requests a pooled connection is idle: it waits at most KEEPALIVE_IDLE_TIMEOUT
+        # and may be closed on shutdown or when another client needs the worker.
+        # 'single' mode keeps the socket timeout it always had.
+        if isinstance(self.server, PooledHTTPServer):
+            self._idle = True
+            self.connection.settimeout(min(self.timeout, KEEPALIVE_IDLE_TIMEOUT))
+            self.server.set_connection_idle(self.connection, True)
+        super().handle_one_request()
+
+    def parse_request(self):
+        # Request line received - the connection is busy until the response is sent
+        if getattr(self, '_idle', False):
+            self._idle = False
+            self.server.set_connection_idle(self.connection, False)
+            self.connection.settimeout(self.timeout)
+        return super().parse_request()
+
+    def log_error(self, format, *args):
+        # An idle keep-alive connection timing out is routine, not an error
+        if getattr(self, '_idle', False) and format.startswith('Request timed out'):
+            return
+        super().log_error(format, *args)
+
+    def send_json(self, status, payload):
+        """Send a JSON response with an explicit Content-Length"""
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_empty(self, status):
+        """Send a response without a body"""
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def send_stream(self, status, content_type, blocks, headers=None):
+        """Send a body of unknown length, chunked on HTTP/1.1 or closing the connection otherwise"""
+        chunked = self.request_version == 'HTTP/1.1' and self.protocol_version == 'HTTP/1.1'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.close_connection = True
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        for block in blocks:
+            if not block:
+                continue
+            if chunked:
+                self.wfile.write(b'%x\r\n' % len(block) + block + b'\r\n')
+            else:
+                self.wfile.write(block)
+        if chunked:
+            self.wfile.write(b'0\r\n\r\n')
+
+    def send_file(self, filepath, content_type, head_only=False, precompress=False, ranges=False, headers=None,
+                  allow_gzip=True):
+        """Serve a file with ETag/Last-Modified, 304 answers and gzip when the client accepts it.
+
+        With precompress the gzip copy is made once per file version and
+        kept in memory (static assets); otherwise it is compressed while
+        streaming. With ranges, single byte-range requests get a 206 so
+        interrupted downloads can resume. Uncompressed bodies go out with
+        socket.sendfile, which uses os.sendfile where the platform has it.
+        allow_gzip=False always sends the file as stored.
+        """
+        try:
+            f = open(filepath, 'rb')
+        except OSError:
+            self.send_empty(404)
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            compressible = allow_gzip and is_compressible(content_type)
+            byte_range = None
+            if ranges and self.headers.get('Range'):
+                identity_etag = file_etag(st)
+                try:
+                    if if_range_matches(self.headers, identity_etag, st.st_mtime):
+                        byte_range = parse_byte_range(self.headers.get('Range'), st.st_size)
+                except RangeNotSatisfiable:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{st.st_size}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+            # Ranges are served from the uncompressed file
+            compress = (compressible and byte_range is None and st.st_size >= MIN_COMPRESS_BYTES
+                        and accepts_gzip(self.headers.get('Accept-Encoding')))
+            etag = file_etag(st, 'gzip' if compress else None)
+
+            # Always revalidate: a changed file gets a new ETag straight away
+            validators = {
+                'ETag': etag,
+                'Last-Modified': email.utils.formatdate(st.st_mtime, usegmt=True)
+            }
+            if compressible:
+                validators['Vary'] = 'Accept-Encoding'
+
+            if is_not_modified(self.headers, etag, st.st_mtime):
+                self.send_response(304)
+                for name, value in validators.items():
+                    self.send_header(name, value)
+                self.cache_control = 'no-cache'
+                self.end_headers()
+                return
+
+            validators.update(headers or {})
+            if ranges and not compress:
+                validators['Accept-Ranges'] = 'bytes'
+            if compress:
+                validators['Content-Encoding'] = 'gzip'
+            body = None
+            if compress and precompress and st.st_size <= MAX_PRECOMPRESS_BYTES:
+                body = precompressed_files.get(filepath, st)
+
+            self.cache_control = 'no-cache'
+            if compress and body is None:
+                # Compressed size is not known up front
+                if head_only:
+                    self.send_response(200)
+                    self.send_header('Content-Type', content_type)
+                    for name, value in validators.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                else:
+                    self.send_stream(200, content_type, iter_gzip(f), validators)
+                return
+
+            if body is not None:
+                status, offset, length = 200, 0, len(body)
+            elif byte_range is not None:
+                status, offset, length = 206, byte_range[0], byte_range[1] - byte_range[0] + 1
+                validators['Content-Range'] = f'bytes {byte_range[0]}-{byte_range[1]}/{st.st_size}'
+            else:
+                status, offset, length = 200, 0, st.st_size
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(length))
+            for name, value in validators.items():
+                self.send_header(name, value)
+            self.end_headers()
+            if head_only:
+                return
+            if body is not None:
+                self.wfile.write(body)
+            elif length:
+                # Zero-copy from the page cache to the socket
+                self.connection.sendfile(f, offset, length)
+
+    def serve_export(self, path, head_only=False):
+        """Serve an exported OSM file (or batch zip) from the export directory.
+
+        Exports go out uncompressed even to clients that accept gzip. That way
+        every download takes the sendfile path, has one ETag per version and
+        can be resumed with Range. Recompressing a large export on each
+        download would cost more CPU than the bytes it saves on localhost.
+        """
+        filename = os.path.basename(urllib.parse.unquote(path[len('/exports/'):]))
+        filepath = self.export_directory.path(filename)
+        if not filename or not os.path.isfile(filepath):
+            self.send_empty(404)
+            return
+        self.send_file(filepath, export_content_type(filename), head_only, ranges=True,
+                       headers={'Content-Disposition': f'inline; filename="{filename}"'}, allow_gzip=False)
+
+    def read_json_body(self, max_bytes):
+        """Read and parse a JSON request body (Content-Length or chunked)"""
+        declared_length = int(self.headers.get('Content-Length') or 0)
+        if declared_length > max_bytes:
+            raise ExportTooLarge(f'Request body exceeds {max_bytes} bytes')
+        blocks = []
+        received = 0
+        for block in iter_request_body(self.rfile, self.headers):
+            received += len(block)
+            if received > max_bytes:
+                raise ExportTooLarge(f'Request body exceeds {max_bytes} bytes')
+            blocks.append(block)
+        return json.loads(b''.join(blocks).decode('utf-8'))
@@ -76,12 +76,17 @@ if %ERRORLEVEL% EQU 0 (
     )
 )
 
-:: Check if josm-helper.py exists
+:: Check if josm-helper.py and the osmagic_http.py module it imports exist
 if not exist "%SCRIPT_DIR%josm-helper.py" (
     echo        [!] josm-helper.py not found
     echo        Please ensure josm-helper.py is in the same folder
     goto open_browser
 )
+if not exist "%SCRIPT_DIR%osmagic_http.py" (
+    echo        [!] osmagic_http.py not found
+    echo        Please ensure osmagic_http.py is in the same folder as josm-helper.py
+    goto open_browser
+)
 
 :: Find Python command
 :: Check full paths FIRST (more reliable than PATH commands)
@@ -8,18 +8,27 @@ class TaskManager {
         this.currentView = 'all'; // 'all', 'active', 'done', or 'skipped'
         this.navigatingToSequenceId = null; // Track sequence we're navigating to for highlighting
         this.allTasksSearchTerm = ''; // Track search term for "All Tasks" tab
+        this.sequenceList = null; // { kind, list } - VirtualList of the All / Done / Skipped view on screen
         this.previewEditMode = false; // Track if preview is in edit mode
         this.originalPreviewFeatures = null; // Store original features for revert
         this.editableLayers = []; // Track editable layers
         this.osmDataLayer = null; // OSM data layer for preview
-        this.osmNodes = new Map(); // Store OSM nodes for snapping (key: node id, value: {lat, lon})
-        this.osmWays = []; // Store OSM ways for snapping reference
-        this.snapThreshold = 0.0001; // ~10 meters snapping threshold
+        this.ingestWorkerUrl = 'ingest-worker.js'; // File import worker, see ingestFiles()
+        this.ingestWorkerCount = Math.min(navigator.hardwareConcurrency || 2, 4); // Files parsed in parallel
         
         // Hybrid mode: local helper for JOSM integration
         this.localHelperUrl = null; // Will be set if local helper is detected
         this.localHelperPort = 8001; // Default helper port
         this.isLocalMode = window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1';
+        this.overpassProxyAvailable = null; // server.py /overpass tile cache, checked on first preview
+        
+        // OSM context (parsed Overpass data) of the current and next sequences, fetched ahead of time
+        this.osmContextCache = new Map(); // sequence id -> { bboxKey, promise }
+        this.osmContextCacheSize = 8;
+        this.prefetchCount = 3; // Active sequences in the current view to fetch ahead
+        this.prefetchConcurrency = 2;
+        this.prefetchQueue = [];
+        this.prefetchActive = 0;
         
         // Detect local helper on startup
         this.detectLocalHelper();
@@ -47,9 +56,11 @@ class TaskManager {
         this.selectedNodes = []; // Array of {layer, nodeIndex, latlng} objects for selected nodes
         
         // Undo/Redo history
-        this.editHistory = []; // Array of geometry states
+        this.editHistory = []; // Array of edit commands (changes since the previous entry)
         this.currentHistoryIndex = -1; // Current position in history (-1 means no history)
         this.maxHistorySize = 50; // Maximum number of history states to keep
+        this.historyBase = new Map(); // layer -> geometry as of the current history entry
+        this.historyLayers = []; // editableLayers as of the current history entry
         
         // Multi-select state
         this.selectedLayers = []; // Array of selected layers for multi-select
@@ -98,6 +109,11 @@ class TaskManager {
             console.error('Failed to initialize IndexedDB:', error);
         }
         
+        // Write edits still waiting for the save debounce before the page goes away
+        window.addEventListener('pagehide', () => {
+            storageManager.flush().catch(error => console.error('Error saving to storage:', error));
+        });
+        
         this.initializeEventListeners();
         this.initializeKeyboardShortcuts();
         await this.loadFromStorage();
@@ -143,107 +159,47 @@ class TaskManager {
             console.warn('fileInfo element not found');
         }
 
-        // Process all files with progress tracking
-        const promises = files.map(file => {
-            return new Promise((resolve, reject) => {
-                const reader = new FileReader();
-                reader.onload = async (e) => {
-                    try {
-                        const fileName = file.name.toLowerCase();
-                        let geojson;
-
-                        // Detect file type and parse accordingly
-                        if (fileName.endsWith('.gpx')) {
-                            geojson = this.parseGPX(e.target.result);
-                        } else if (fileName.endsWith('.csv')) {
-                            // Use async CSV parsing for large files (> 100 rows)
-                            const lineCount = (e.target.result.match(/\n/g) || []).length;
-                            if (lineCount > 100) {
-                                geojson = await this.parseCSVAsync(e.target.result, (progress) => {
-                                    if (fileInfo && files.length === 1) {
-                                        fileInfo.textContent = `Processing CSV: ${progress}%...`;
-                                    }
-                                });
-                            } else {
-                                geojson = this.parseCSV(e.target.result);
-                            }
-                        } else {
-                            // Assume GeoJSON
-                            geojson = JSON.parse(e.target.result);
-                        }
-
-                        resolve({ geojson, fileName: file.name });
-                    } catch (error) {
-                        reject({ error, fileName: file.name });
-                    }
-                };
-                reader.onerror = () => reject({ error: new Error('Failed to read file'), fileName: file.name });
-                reader.readAsText(file);
-            });
+        // Parse and group all files off the main thread, with overall progress
+        const results = await this.ingestFiles(files, (progress) => {
+            if (fileInfo) {
+                fileInfo.textContent = `Processing: ${progress}%...`;
+            }
         });
 
-        // Combine all files into one GeoJSON
-        const results = await Promise.allSettled(promises);
-        const newFeatures = [];
+        const fileSequences = [];
         const errors = [];
         let loadedCount = 0;
+        let addedCount = 0;
 
         results.forEach((result) => {
-            if (result.status === 'fulfilled') {
-                const geojson = result.value.geojson;
-                if (geojson && geojson.features && Array.isArray(geojson.features)) {
-                    newFeatures.push(...geojson.features);
-                    loadedCount++;
-                } else {
-                    console.error('Invalid GeoJSON structure in file:', result.value.fileName, geojson);
-                    errors.push(`${result.value.fileName}: Invalid GeoJSON structure - missing features array`);
-                }
+            if (result.error) {
+                console.error('File processing error:', result.fileName, result.error);
+                errors.push(`${result.fileName}: ${result.error.message}`);
             } else {
-                console.error('File processing error:', result.reason);
-                errors.push(`${result.reason.fileName}: ${result.reason.error.message}`);
+                fileSequences.push(result.sequences);
+                result.sequences.forEach(sequence => {
+                    addedCount += sequence.features.length;
+                });
+                loadedCount++;
             }
         });
 
-        if (newFeatures.length === 0) {
+        if (addedCount === 0) {
             if (fileInfo) {
                 fileInfo.textContent = `✗ Error: No valid files loaded. ${errors.join('; ')}`;
             }
             return;
         }
 
-        // Merge with existing cached data instead of replacing
-        const existingFeatures = this.geojsonData?.features || [];
-        const allFeatures = [...existingFeatures, ...newFeatures];
-
-        // Combine all features into one GeoJSON
-        const combinedGeoJSON = {
-            type: 'FeatureCollection',
-            features: allFeatures
-        };
-
-        this.geojsonData = combinedGeoJSON;
-        
-        // Process with progress indicator for large datasets
         try {
-            if (allFeatures.length > 50) {
-                if (fileInfo) {
-                    fileInfo.textContent = `Processing ${allFeatures.length} features...`;
-                }
-                await this.processGeoJSONAsync(combinedGeoJSON, (progress) => {
-                    if (fileInfo) {
-                        fileInfo.textContent = `Processing: ${progress}%...`;
-                    }
-                });
-            } else {
-                await this.processGeoJSON(combinedGeoJSON);
-            }
+            // Merge with existing cached data instead of replacing
+            const changedSequences = this.applyIngestedSequences(fileSequences);
             
             // Save to IndexedDB
-            await this.saveToStorage();
+            await this.saveToStorage(changedSequences);
             
             const errorMsg = errors.length > 0 ? ` (${errors.length} error(s))` : '';
-            const totalFeatures = allFeatures.length;
-            const addedCount = newFeatures.length;
+            const totalFeatures = this.geojsonData.features.length;
             const fileInfoText = `✓ Loaded ${loadedCount} file(s)${errorMsg}: ${addedCount} features (Total: ${totalFeatures} features)`;
             
             if (fileInfo) {
@@ -262,57 +218,133 @@ class TaskManager {
         }
     }
 
-    async processGeoJSON(geojson) {
-        if (!geojson.features || !Array.isArray(geojson.features)) {
-            throw new Error('Invalid GeoJSON: missing features array');
-        }
+    async ingestFiles(files, progressCallback) {
+        // [{ fileName, sequences } | { fileName, error }] in file order. Each file is read, parsed
+        // and grouped into sequences by a pool of ingest-worker.js workers; coordinates come back
+        // as transferred Float64Array buffers, one per sequence.
+        const results = new Array(files.length);
+        const progress = new Array(files.length).fill(0);
+        const totalSize = files.reduce((sum, file) => sum + (file.size || 1), 0);
+        let reported = -1;
+        const reportProgress = (fileIndex, fraction) => {
+            progress[fileIndex] = fraction;
+            const done = files.reduce((sum, file, i) => sum + progress[i] * (file.size || 1), 0);
+            const percent = Math.round((done / totalSize) * 100);
+            if (progressCallback && percent !== reported) {
+                reported = percent;
+                progressCallback(percent);
+            }
+        };
 
-        // Preserve existing status values
-        const existingStatusMap = new Map();
-        this.sequences.forEach(seq => {
-            if (seq.status !== undefined) {
-                existingStatusMap.set(String(seq.id), seq.status);
+        let nextFile = 0;
+        let workersAvailable = typeof Worker !== 'undefined';
+        const runWorker = async () => {
+            let worker = null;
+            try {
+                while (nextFile < files.length) {
+                    const fileIndex = nextFile++;
+                    const file = files[fileIndex];
+                    if (workersAvailable && !worker) {
+                        try {
+                            worker = new Worker(this.ingestWorkerUrl);
+                        } catch (error) {
+                            workersAvailable = false;
+                        }
+                    }
+                    try {
+                        let sequences = null;
+                        if (worker) {
+                            sequences = await this.ingestFileInWorker(worker, file, (fraction) => reportProgress(fileIndex, fraction));
+                            if (sequences === null) {
+                                // The worker script could not be loaded (e.g. file://) - stay on the main thread
+                                workersAvailable = false;
+                                worker.terminate();
+                                worker = null;
+                            }
+                        }
+                        if (sequences === null) {
+                            sequences = await Ingest.ingestFile(file, (fraction) => reportProgress(fileIndex, fraction),
+                                () => new Promise(resolve => setTimeout(resolve, 0)));
+                        }
+                        results[fileIndex] = { fileName: file.name, sequences: sequences };
+                    } catch (error) {
+                        results[fileIndex] = { fileName: file.name, error: error };
+                    }
+                    reportProgress(fileIndex, 1);
+                }
+            } finally {
+                if (worker) worker.terminate();
             }
+        };
+
+        const poolSize = Math.max(1, Math.min(files.length, this.ingestWorkerCount));
+        await Promise.all(Array.from({ length: poolSize }, runWorker));
+        return results;
+    }
+
+    ingestFileInWorker(worker, file, onProgress) {
+        // Sequences of one file, or null when the worker failed to start
+        return new Promise((resolve, reject) => {
+            let started = false;
+            worker.onmessage = (event) => {
+                started = true;
+                const message = event.data;
+                if (message.type === 'progress') {
+                    onProgress(message.progress);
+                } else if (message.type === 'done') {
+                    resolve(Ingest.unpackSequences(message.sequences));
+                } else {
+                    reject(new Error(message.message));
+                }
+            };
+            worker.onerror = (event) => {
+                event.preventDefault();
+                if (started) {
+                    reject(new Error(event.message || 'Import worker failed'));
+                } else {
+                    resolve(null);
+                }
+            };
+            worker.postMessage({ file: file });
         });
+    }
 
-        // Group features by sequence ID
+    applyIngestedSequences(fileSequences) {
+        // Add the sequences of each imported file, merging features into existing sequences by ID
+        // (statuses are kept). The files were already grouped and counted by the import workers.
+        // Returns the sequences that were added or changed.
         const sequenceMap = new Map();
-
-        geojson.features.forEach((feature) => {
-            const sequenceId = String(
-                feature.properties?.sequence_id || 
-                feature.properties?.sequenceId || 
-                feature.properties?.sequence || 
-                feature.properties?.id ||
-                feature.properties?.seq ||
-                `sequence_${feature.properties?.id || Math.random().toString(36).substr(2, 9)}`
-            );
-
-            if (!sequenceMap.has(sequenceId)) {
-                const existingStatus = existingStatusMap.get(sequenceId);
-                sequenceMap.set(sequenceId, {
-                    id: sequenceId,
-                    features: [],
-                    status: existingStatus !== undefined ? existingStatus : '', // blank = active
-                    date: new Date().toLocaleDateString()
+        const changedIds = new Set();
+        this.sequences.forEach(seq => sequenceMap.set(String(seq.id), seq));
+        const features = this.geojsonData?.features ? this.geojsonData.features.slice() : [];
+
+        fileSequences.forEach(sequences => sequences.forEach(ingested => {
+            ingested.features.forEach(feature => features.push(feature));
+            changedIds.add(ingested.id);
+            const existing = sequenceMap.get(ingested.id);
+            if (existing) {
+                sequenceMap.set(ingested.id, {
+                    ...existing,
+                    features: (existing.features || []).concat(ingested.features),
+                    featureCount: (existing.featureCount || 0) + ingested.featureCount,
+                    nodeCount: (existing.nodeCount || 0) + ingested.nodeCount,
+                    wayCount: (existing.wayCount || 0) + ingested.wayCount
+                });
+            } else {
+                sequenceMap.set(ingested.id, {
+                    id: ingested.id,
+                    features: ingested.features,
+                    status: '', // blank = active
+                    date: new Date().toLocaleDateString(),
+                    featureCount: ingested.featureCount,
+                    nodeCount: ingested.nodeCount,
+                    wayCount: ingested.wayCount
                 });
             }
-
-            sequenceMap.get(sequenceId).features.push(feature);
-        });
-
-        // Convert to array and calculate stats
-        this.sequences = Array.from(sequenceMap.values()).map(seq => {
-            const stats = this.calculateStats(seq.features);
-            return {
-                ...seq,
-                featureCount: stats.features,
-                nodeCount: stats.nodes,
-                wayCount: stats.ways
-            };
-        });
+        }));
 
         // Sort by sequence ID (numeric if possible, otherwise alphabetical)
+        this.sequences = Array.from(sequenceMap.values());
         this.sequences.sort((a, b) => {
             const aNum = parseInt(a.id);
             const bNum = parseInt(b.id);
@@ -321,6 +353,7 @@ class TaskManager {
             }
             return a.id.localeCompare(b.id);
         });
+        this.geojsonData = { type: 'FeatureCollection', features: features };
 
         // Reset to first item in current view
         const viewSequences = this.getCurrentViewSequences();
@@ -331,112 +364,71 @@ class TaskManager {
             this.currentIndex = 0;
         }
 
-        this.geojsonData = geojson;
-        await this.saveToStorage();
-        this.renderCurrentTask();
-        this.updateSummary();
+        return this.sequences.filter(seq => changedIds.has(seq.id));
     }
 
-    async processGeoJSONAsync(geojson, progressCallback) {
-        // Async version for large datasets - processes in chunks
-        if (!geojson.features || !Array.isArray(geojson.features)) {
-            console.error('Invalid GeoJSON: missing features array');
-            return;
-        }
-
-        // Preserve existing status values
-        const existingStatusMap = new Map();
-        this.sequences.forEach(seq => {
-            if (seq.status !== undefined) {
-                existingStatusMap.set(String(seq.id), seq.status);
-            }
-        });
+    calculateStats(features) {
+        return Ingest.calculateStats(features);
+    }
 
-        // Group features by sequence ID - process in chunks
-        const sequenceMap = new Map();
-        const totalFeatures = geojson.features.length;
-        const chunkSize = 100; // Process 100 features at a time
-
-        for (let start = 0; start < totalFeatures; start += chunkSize) {
-            const end = Math.min(start + chunkSize, totalFeatures);
-            
-            for (let i = start; i < end; i++) {
-                const feature = geojson.features[i];
-                const sequenceId = String(
-                    feature.properties?.sequence_id || 
-                    feature.properties?.sequenceId || 
-                    feature.properties?.sequence || 
-                    feature.properties?.id ||
-                    feature.properties?.seq ||
-                    `sequence_${feature.properties?.id || Math.random().toString(36).substr(2, 9)}`
-                );
+    getAllSequences() {
+        // Return all sequences regardless of status (master data source)
+        return this.sequences;
+    }
 
-                if (!sequenceMap.has(sequenceId)) {
-                    const existingStatus = existingStatusMap.get(sequenceId);
-                    sequenceMap.set(sequenceId, {
-                        id: sequenceId,
-                        features: [],
-                        status: existingStatus !== undefined ? existingStatus : '',
-                        date: new Date().toLocaleDateString()
-                    });
-                }
+    getActiveSequences() {
+        // Return sequences that are not skipped or done (blank status = active)
+        return this.sequences.filter(seq => !seq.status || seq.status === '');
+    }
 
-                sequenceMap.get(sequenceId).features.push(feature);
-            }
+    getDoneSequences() {
+        // Return sequences that are marked as done
+        return this.sequences.filter(seq => seq.status === 'done');
+    }
 
-            // Update progress
-            if (progressCallback) {
-                const progress = Math.round((end / totalFeatures) * 50); // First 50% for grouping
-                progressCallback(progress);
-            }
+    getSkippedSequences() {
+        // Return sequences that are marked as skipped
+        return this.sequences.filter(seq => seq.status === 'skipped');
+    }
 
-            // Yield to browser
-            await new Promise(resolve => setTimeout(resolve, 0));
+    getCurrentViewSequences() {
+        // Return sequences based on current view
+        switch(this.currentView) {
+            case 'all':
+                return this.getAllSequences();
+            case 'done':
+                return this.getDoneSequences();
+            case 'skipped':
+                return this.getSkippedSequences();
+            case 'active':
+            default:
+                return this.getActiveSequences();
         }
+    }
 
-        // Calculate stats in chunks
-        const sequences = Array.from(sequenceMap.values());
-        const processedSequences = [];
-        const statsChunkSize = 50;
-
-        for (let start = 0; start < sequences.length; start += statsChunkSize) {
-            const end = Math.min(start + statsChunkSize, sequences.length);
-            
-            for (let i = start; i < end; i++) {
-                const seq = sequences[i];
-                const stats = this.calculateStats(seq.features);
-                processedSequences.push({
-                    ...seq,
-                    featureCount: stats.features,
-                    nodeCount: stats.nodes,
-                    wayCount: stats.ways
-                });
+    switchView(view, targetSequenceId = null) {
+        this.currentView = view;
+        
+        // Update tab buttons (support both old .tab-btn and new .filter-tab classes)
+        document.querySelectorAll('.tab-btn, .filter-tab').forEach(btn => {
+            if (btn.dataset.view === view) {
+                btn.classList.add('active');
+            } else {
+                btn.classList.remove('active');
             }
-
-            // Update progress
-            if (progressCallback) {
-                const progress = 50 + Math.round((end / sequences.length) * 50); // Second 50% for stats
-                progressCallback(progress);
+        });
+        
+        // If targetSequenceId is provided, navigate to that specific sequence
+        if (targetSequenceId !== null) {
+            const targetIndex = this.sequences.findIndex(seq => seq.id === targetSequenceId);
+            if (targetIndex >= 0) {
+                this.currentIndex = targetIndex;
+                this.renderCurrentTask();
+                return;
             }
-
-            // Yield to browser
-            await new Promise(resolve => setTimeout(resolve, 0));
         }
-
-        // Sort by sequence ID
-        processedSequences.sort((a, b) => {
-            const aNum = parseInt(a.id);
-            const bNum = parseInt(b.id);
-            if (!isNaN(aNum) && !isNaN(bNum)) {
-                return aNum - bNum;
-            }
-            return a.id.localeCompare(b.id);
-        });
-
-        this.sequences = processedSequences;
-        this.geojsonData = geojson;
         
-        // Reset to first item in current view
+        // Reset to first item in the new view
         const viewSequences = this.getCurrentViewSequences();
         if (viewSequences.length > 0) {
             const firstSequence = viewSequences[0];
@@ -445,714 +437,70 @@ class TaskManager {
             this.currentIndex = 0;
         }
         
-        await this.saveToStorage();
         this.renderCurrentTask();
-        this.updateSummary();
     }
 
-    calculateStats(features) {
-        let nodes = 0;
-        let ways = 0;
-
-        features.forEach(feature => {
-            if (feature.geometry) {
-                if (feature.geometry.type === 'Point') {
-                    nodes++;
-                } else if (feature.geometry.type === 'LineString' || feature.geometry.type === 'MultiLineString') {
-                    ways++;
-                    if (feature.geometry.coordinates) {
-                        if (Array.isArray(feature.geometry.coordinates[0])) {
-                            nodes += feature.geometry.coordinates.length;
-                        } else {
-                            nodes += 1;
-                        }
-                    }
-                } else if (feature.geometry.type === 'Polygon' || feature.geometry.type === 'MultiPolygon') {
-                    ways++;
-                    if (feature.geometry.coordinates && feature.geometry.coordinates[0]) {
-                        nodes += feature.geometry.coordinates[0].length;
-                    }
-                }
-            }
-        });
+    navigateToSequence(sequenceId) {
+        // Find the sequence in our data
+        const sequence = this.sequences.find(seq => seq.id === sequenceId);
+        if (!sequence) {
+            console.error('Sequence not found:', sequenceId);
+            return;
+        }
 
-        return {
-            features: features.length,
-            nodes: nodes,
-            ways: ways
-        };
-    }
+        // Set flag to indicate we're navigating to this sequence (for highlighting)
+        this.navigatingToSequenceId = sequenceId;
 
-    parseGPX(gpxText) {
-        // Parse GPX XML to GeoJSON format
-        const parser = new DOMParser();
-        const xmlDoc = parser.parseFromString(gpxText, 'text/xml');
-        
-        const features = [];
-        
-        // Parse tracks
-        const tracks = xmlDoc.getElementsByTagName('trk');
-        for (const track of tracks) {
-            const segments = track.getElementsByTagName('trkseg');
-            for (const segment of segments) {
-                const points = segment.getElementsByTagName('trkpt');
-                const coordinates = [];
-                
-                for (const point of points) {
-                    const lat = parseFloat(point.getAttribute('lat'));
-                    const lon = parseFloat(point.getAttribute('lon'));
-                    if (!isNaN(lat) && !isNaN(lon)) {
-                        coordinates.push([lon, lat]);
-                    }
-                }
-                
-                if (coordinates.length > 0) {
-                    features.push({
-                        type: 'Feature',
-                        geometry: {
-                            type: 'LineString',
-                            coordinates: coordinates
-                        },
-                        properties: {
-                            sequence_id: this.extractSequenceIdFromGPX(track) || `gpx_track_${features.length + 1}`
-                        }
-                    });
-                }
-            }
-        }
-        
-        // Parse routes
-        const routes = xmlDoc.getElementsByTagName('rte');
-        for (const route of routes) {
-            const points = route.getElementsByTagName('rtept');
-            const coordinates = [];
-            
-            for (const point of points) {
-                const lat = parseFloat(point.getAttribute('lat'));
-                const lon = parseFloat(point.getAttribute('lon'));
-                if (!isNaN(lat) && !isNaN(lon)) {
-                    coordinates.push([lon, lat]);
-                }
-            }
-            
-            if (coordinates.length > 0) {
-                features.push({
-                    type: 'Feature',
-                    geometry: {
-                        type: 'LineString',
-                        coordinates: coordinates
-                    },
-                    properties: {
-                        sequence_id: this.extractSequenceIdFromGPX(route) || `gpx_route_${features.length + 1}`
-                    }
-                });
-            }
-        }
-        
-        // Parse waypoints as points
-        const waypoints = xmlDoc.getElementsByTagName('wpt');
-        for (const waypoint of waypoints) {
-            const lat = parseFloat(waypoint.getAttribute('lat'));
-            const lon = parseFloat(waypoint.getAttribute('lon'));
-            if (!isNaN(lat) && !isNaN(lon)) {
-                const nameEl = waypoint.getElementsByTagName('name')[0];
-                const name = nameEl ? nameEl.textContent : '';
-                
-                features.push({
-                    type: 'Feature',
-                    geometry: {
-                        type: 'Point',
-                        coordinates: [lon, lat]
-                    },
-                    properties: {
-                        name: name,
-                        sequence_id: name || `gpx_waypoint_${features.length + 1}`
-                    }
-                });
-            }
+        // Determine which tab this sequence belongs to based on status
+        let targetView = 'active'; // default to active
+        if (sequence.status === 'done') {
+            targetView = 'done';
+        } else if (sequence.status === 'skipped') {
+            targetView = 'skipped';
+        } else {
+            targetView = 'active';
         }
-        
-        return {
-            type: 'FeatureCollection',
-            features: features
-        };
-    }
 
-    extractSequenceIdFromGPX(element) {
-        // Try to find sequence ID in name, desc, or extensions
-        const nameEl = element.getElementsByTagName('name')[0];
-        if (nameEl) {
-            const name = nameEl.textContent.trim();
-            // Check if name contains a sequence ID pattern
-            const seqMatch = name.match(/(?:sequence[_\s]?id|seq[_\s]?id|id)[:\s=]+(\d+)/i);
-            if (seqMatch) {
-                return seqMatch[1];
-            }
-            // If name is just a number, use it as sequence ID
-            if (/^\d+$/.test(name)) {
-                return name;
-            }
-        }
-        return null;
+        // Switch to the appropriate tab and navigate to the sequence
+        this.switchView(targetView, sequenceId);
     }
 
-    // Geohash decoder
-    decodeGeohash(geohash) {
-        const base32 = '0123456789bcdefghjkmnpqrstuvwxyz';
-        let even = true;
-        let latMin = -90.0, latMax = 90.0;
-        let lonMin = -180.0, lonMax = 180.0;
-        
-        for (let i = 0; i < geohash.length; i++) {
-            const char = geohash[i].toLowerCase();
-            const val = base32.indexOf(char);
-            if (val === -1) return null;
-            
-            for (let j = 4; j >= 0; j--) {
-                const bitVal = (val >> j) & 1;
-                if (even) {
-                    const lonMid = (lonMin + lonMax) / 2;
-                    if (bitVal === 1) {
-                        lonMin = lonMid;
-                    } else {
-                        lonMax = lonMid;
-                    }
-                } else {
-                    const latMid = (latMin + latMax) / 2;
-                    if (bitVal === 1) {
-                        latMin = latMid;
-                    } else {
-                        latMax = latMid;
-                    }
-                }
-                even = !even;
-            }
+    renderCurrentTask() {
+        // Route to appropriate render method based on view
+        switch(this.currentView) {
+            case 'all':
+                this.renderAllTasksView();
+                break;
+            case 'skipped':
+            case 'done':
+                this.renderSimpleListView();
+                break;
+            case 'active':
+            default:
+                this.renderDetailedView();
+                break;
         }
-        
-        const lat = (latMin + latMax) / 2;
-        const lon = (lonMin + lonMax) / 2;
-        
-        return { lat, lon };
-    }
-
-    parseCSV(csvText) {
-        // Synchronous version for small files (< 100 rows)
-        return this.parseCSVSync(csvText);
     }
 
-    async parseCSVAsync(csvText, progressCallback) {
-        // Async version for large files - processes in chunks
-        const lines = csvText.split('\n').filter(line => line.trim());
-        if (lines.length < 2) {
-            throw new Error('CSV file must have at least a header row and one data row');
-        }
+    renderAllTasksView() {
+        const taskDisplay = document.getElementById('taskDisplay');
+        const prevBtn = document.getElementById('prevBtn');
+        const nextBtn = document.getElementById('nextBtn');
+        const taskCounter = document.getElementById('taskCounter');
 
-        // Parse header
-        const header = this.parseCSVLine(lines[0]);
-        
-        // Find columns (case-insensitive)
-        let latLongArrayIndex = -1;
-        let latIndex = -1;
-        let lonIndex = -1;
-        let geohashIndex = -1;
-        let sequenceIdIndex = -1;
-        
-        const latLongArrayNames = ['lat_long_array', 'latlongarray', 'coordinates', 'coords', 'points'];
-        const latNames = ['lat', 'latitude', 'y', 'ycoord'];
-        const lonNames = ['lon', 'lng', 'longitude', 'long', 'x', 'xcoord'];
-        const geohashNames = ['geohash', 'geohash_code', 'hash'];
-        const seqIdNames = ['offroad_sequence_id', 'sequence_id', 'sequenceid', 'sequence', 'seq', 'id', 'sample_bookings'];
+        const allSequences = this.getAllSequences();
         
-        header.forEach((col, index) => {
-            const colLower = col.toLowerCase().trim();
-            if (latLongArrayIndex === -1 && latLongArrayNames.some(name => colLower === name)) {
-                latLongArrayIndex = index;
-            }
-            if (latIndex === -1 && latNames.some(name => colLower.includes(name))) {
-                latIndex = index;
-            }
-            if (lonIndex === -1 && lonNames.some(name => colLower.includes(name))) {
-                lonIndex = index;
-            }
-            if (geohashIndex === -1 && geohashNames.some(name => colLower === name)) {
-                geohashIndex = index;
-            }
-            if (sequenceIdIndex === -1 && seqIdNames.some(name => colLower === name)) {
-                sequenceIdIndex = index;
-            }
-        });
-
-        // Check if we have lat_long_array format, separate lat/lon columns, or geohash
-        if (latLongArrayIndex === -1 && (latIndex === -1 || lonIndex === -1) && geohashIndex === -1) {
-            throw new Error('CSV must contain either:\n1. A lat_long_array column with coordinate arrays, OR\n2. Separate latitude and longitude columns, OR\n3. A geohash column');
-        }
-
-        // Group rows by sequence ID - process in chunks
-        const sequenceMap = new Map();
-        const totalRows = lines.length - 1;
-        const chunkSize = 50; // Process 50 rows at a time
-        
-        for (let start = 1; start < lines.length; start += chunkSize) {
-            const end = Math.min(start + chunkSize, lines.length);
-            
-            for (let i = start; i < end; i++) {
-                const row = this.parseCSVLine(lines[i]);
-                if (row.length === 0) continue;
-                
-                // Get sequence ID
-                let sequenceId;
-                if (sequenceIdIndex >= 0 && row[sequenceIdIndex] && row[sequenceIdIndex].trim()) {
-                    sequenceId = String(row[sequenceIdIndex]).trim();
-                } else {
-                    const groupIndex = header.findIndex(col => col.toLowerCase().trim() === 'group');
-                    if (groupIndex >= 0 && row[groupIndex] && row[groupIndex].trim()) {
-                        sequenceId = String(row[groupIndex]).trim();
-                    } else {
-                        sequenceId = `csv_sequence_${i}`;
-                    }
-                }
-                
-                if (!sequenceMap.has(sequenceId)) {
-                    sequenceMap.set(sequenceId, {
-                        id: sequenceId,
-                        coordinates: [],
-                        properties: {},
-                        rowCount: 0
-                    });
-                }
-                
-                const sequence = sequenceMap.get(sequenceId);
-                sequence.rowCount++;
-                
-                // Merge properties
-                if (sequence.rowCount === 1) {
-                    header.forEach((colName, idx) => {
-                        if (row[idx] && row[idx].trim()) {
-                            sequence.properties[colName.trim()] = row[idx].trim();
-                        }
-                    });
-                } else {
-                    header.forEach((colName, idx) => {
-                        const colLower = colName.toLowerCase().trim();
-                        if (row[idx] && row[idx].trim()) {
-                            if (colLower === 'bookingcodes' || colLower === 'wheels') {
-                                try {
-                                    const existing = JSON.parse(sequence.properties[colName] || '[]');
-                                    const newArray = JSON.parse(row[idx].trim());
-                                    if (Array.isArray(existing) && Array.isArray(newArray)) {
-                                        const merged = [...new Set([...existing, ...newArray])];
-                                        sequence.properties[colName] = JSON.stringify(merged);
-                                    }
-                                } catch (e) {
-                                    // Keep existing value if merge fails
-                                }
-                            }
-                        }
-                    });
-                }
-                
-                // Extract coordinates
-                let rowCoordinates = [];
-                if (latLongArrayIndex >= 0 && row[latLongArrayIndex]) {
-                    try {
-                        const arrayStr = row[latLongArrayIndex].trim();
-                        const coordArray = JSON.parse(arrayStr);
-                        if (Array.isArray(coordArray)) {
-                            rowCoordinates = coordArray.map(coord => {
-                                if (Array.isArray(coord) && coord.length >= 2) {
-                                    return [parseFloat(coord[1]), parseFloat(coord[0])];
-                                }
-                                return null;
-                            }).filter(coord => coord !== null && !isNaN(coord[0]) && !isNaN(coord[1]));
-                        }
-                    } catch (e) {
-                        // Skip invalid coordinates
-                    }
-                } else if (geohashIndex >= 0 && row[geohashIndex]) {
-                    // Decode geohash
-                    const geohash = row[geohashIndex].trim();
-                    const decoded = this.decodeGeohash(geohash);
-                    if (decoded && !isNaN(decoded.lat) && !isNaN(decoded.lon)) {
-                        rowCoordinates = [[decoded.lon, decoded.lat]];
-                    }
-                } else if (latIndex >= 0 && lonIndex >= 0) {
-                    const lat = parseFloat(row[latIndex]);
-                    const lon = parseFloat(row[lonIndex]);
-                    if (!isNaN(lat) && !isNaN(lon)) {
-                        rowCoordinates = [[lon, lat]];
-                    }
-                }
-                
-                if (rowCoordinates.length > 0) {
-                    sequence.coordinates.push(...rowCoordinates);
-                }
-            }
-            
-            // Update progress and yield to browser
-            if (progressCallback) {
-                const progress = Math.round(((end - 1) / totalRows) * 100);
-                progressCallback(progress);
-            }
-            
-            // Yield to browser to prevent blocking
-            await new Promise(resolve => setTimeout(resolve, 0));
-        }
-
-        // Convert sequences to features
-        const features = [];
-        sequenceMap.forEach((sequence) => {
-            if (sequence.coordinates.length === 0) return;
-            
-            sequence.properties.sequence_id = sequence.id;
-            
-            if (sequence.coordinates.length === 1) {
-                features.push({
-                    type: 'Feature',
-                    geometry: {
-                        type: 'Point',
-                        coordinates: sequence.coordinates[0]
-                    },
-                    properties: sequence.properties
-                });
-            } else {
-                features.push({
-                    type: 'Feature',
-                    geometry: {
-                        type: 'LineString',
-                        coordinates: sequence.coordinates
-                    },
-                    properties: sequence.properties
-                });
-            }
-        });
-
-        return {
-            type: 'FeatureCollection',
-            features: features
-        };
-    }
-
-    parseCSVSync(csvText) {
-        // Synchronous version for small files
-        const lines = csvText.split('\n').filter(line => line.trim());
-        if (lines.length < 2) {
-            throw new Error('CSV file must have at least a header row and one data row');
-        }
-
-        const header = this.parseCSVLine(lines[0]);
-        
-        let latLongArrayIndex = -1;
-        let latIndex = -1;
-        let lonIndex = -1;
-        let geohashIndex = -1;
-        let sequenceIdIndex = -1;
-        
-        const latLongArrayNames = ['lat_long_array', 'latlongarray', 'coordinates', 'coords', 'points'];
-        const latNames = ['lat', 'latitude', 'y', 'ycoord'];
-        const lonNames = ['lon', 'lng', 'longitude', 'long', 'x', 'xcoord'];
-        const geohashNames = ['geohash', 'geohash_code', 'hash'];
-        const seqIdNames = ['offroad_sequence_id', 'sequence_id', 'sequenceid', 'sequence', 'seq', 'id', 'sample_bookings'];
-        
-        header.forEach((col, index) => {
-            const colLower = col.toLowerCase().trim();
-            if (latLongArrayIndex === -1 && latLongArrayNames.some(name => colLower === name)) {
-                latLongArrayIndex = index;
-            }
-            if (latIndex === -1 && latNames.some(name => colLower.includes(name))) {
-                latIndex = index;
-            }
-            if (lonIndex === -1 && lonNames.some(name => colLower.includes(name))) {
-                lonIndex = index;
-            }
-            if (geohashIndex === -1 && geohashNames.some(name => colLower === name)) {
-                geohashIndex = index;
-            }
-            if (sequenceIdIndex === -1 && seqIdNames.some(name => colLower === name)) {
-                sequenceIdIndex = index;
-            }
-        });
-
-        if (latLongArrayIndex === -1 && (latIndex === -1 || lonIndex === -1) && geohashIndex === -1) {
-            throw new Error('CSV must contain either:\n1. A lat_long_array column with coordinate arrays, OR\n2. Separate latitude and longitude columns, OR\n3. A geohash column');
-        }
-
-        const sequenceMap = new Map();
-        
-        for (let i = 1; i < lines.length; i++) {
-            const row = this.parseCSVLine(lines[i]);
-            if (row.length === 0) continue;
-            
-            let sequenceId;
-            if (sequenceIdIndex >= 0 && row[sequenceIdIndex] && row[sequenceIdIndex].trim()) {
-                sequenceId = String(row[sequenceIdIndex]).trim();
-            } else {
-                const groupIndex = header.findIndex(col => col.toLowerCase().trim() === 'group');
-                if (groupIndex >= 0 && row[groupIndex] && row[groupIndex].trim()) {
-                    sequenceId = String(row[groupIndex]).trim();
-                } else {
-                    sequenceId = `csv_sequence_${i}`;
-                }
-            }
-            
-            if (!sequenceMap.has(sequenceId)) {
-                sequenceMap.set(sequenceId, {
-                    id: sequenceId,
-                    coordinates: [],
-                    properties: {},
-                    rowCount: 0
-                });
-            }
-            
-            const sequence = sequenceMap.get(sequenceId);
-            sequence.rowCount++;
-            
-            if (sequence.rowCount === 1) {
-                header.forEach((colName, idx) => {
-                    if (row[idx] && row[idx].trim()) {
-                        sequence.properties[colName.trim()] = row[idx].trim();
-                    }
-                });
-            } else {
-                header.forEach((colName, idx) => {
-                    const colLower = colName.toLowerCase().trim();
-                    if (row[idx] && row[idx].trim()) {
-                        if (colLower === 'bookingcodes' || colLower === 'wheels') {
-                            try {
-                                const existing = JSON.parse(sequence.properties[colName] || '[]');
-                                const newArray = JSON.parse(row[idx].trim());
-                                if (Array.isArray(existing) && Array.isArray(newArray)) {
-                                    const merged = [...new Set([...existing, ...newArray])];
-                                    sequence.properties[colName] = JSON.stringify(merged);
-                                }
-                            } catch (e) {
-                                // Keep existing value
-                            }
-                        }
-                    }
-                });
-            }
-            
-            let rowCoordinates = [];
-            if (latLongArrayIndex >= 0 && row[latLongArrayIndex]) {
-                try {
-                    const arrayStr = row[latLongArrayIndex].trim();
-                    const coordArray = JSON.parse(arrayStr);
-                    if (Array.isArray(coordArray)) {
-                        rowCoordinates = coordArray.map(coord => {
-                            if (Array.isArray(coord) && coord.length >= 2) {
-                                return [parseFloat(coord[1]), parseFloat(coord[0])];
-                            }
-                            return null;
-                        }).filter(coord => coord !== null && !isNaN(coord[0]) && !isNaN(coord[1]));
-                    }
-                } catch (e) {
-                    // Skip invalid
-                }
-            } else if (geohashIndex >= 0 && row[geohashIndex]) {
-                // Decode geohash
-                const geohash = row[geohashIndex].trim();
-                const decoded = this.decodeGeohash(geohash);
-                if (decoded && !isNaN(decoded.lat) && !isNaN(decoded.lon)) {
-                    rowCoordinates = [[decoded.lon, decoded.lat]];
-                }
-            } else if (latIndex >= 0 && lonIndex >= 0) {
-                const lat = parseFloat(row[latIndex]);
-                const lon = parseFloat(row[lonIndex]);
-                if (!isNaN(lat) && !isNaN(lon)) {
-                    rowCoordinates = [[lon, lat]];
-                }
-            }
-            
-            if (rowCoordinates.length > 0) {
-                sequence.coordinates.push(...rowCoordinates);
-            }
-        }
-
-        const features = [];
-        sequenceMap.forEach((sequence) => {
-            if (sequence.coordinates.length === 0) return;
-            
-            sequence.properties.sequence_id = sequence.id;
-            
-            if (sequence.coordinates.length === 1) {
-                features.push({
-                    type: 'Feature',
-                    geometry: {
-                        type: 'Point',
-                        coordinates: sequence.coordinates[0]
-                    },
-                    properties: sequence.properties
-                });
-            } else {
-                features.push({
-                    type: 'Feature',
-                    geometry: {
-                        type: 'LineString',
-                        coordinates: sequence.coordinates
-                    },
-                    properties: sequence.properties
-                });
-            }
-        });
-
-        return {
-            type: 'FeatureCollection',
-            features: features
-        };
-    }
-
-    parseCSVLine(line) {
-        // Simple CSV parser that handles quoted fields
-        const result = [];
-        let current = '';
-        let inQuotes = false;
-        
-        for (let i = 0; i < line.length; i++) {
-            const char = line[i];
-            
-            if (char === '"') {
-                inQuotes = !inQuotes;
-            } else if (char === ',' && !inQuotes) {
-                result.push(current.trim());
-                current = '';
-            } else {
-                current += char;
-            }
-        }
-        result.push(current.trim());
-        
-        return result;
-    }
-
-    getAllSequences() {
-        // Return all sequences regardless of status (master data source)
-        return this.sequences;
-    }
-
-    getActiveSequences() {
-        // Return sequences that are not skipped or done (blank status = active)
-        return this.sequences.filter(seq => !seq.status || seq.status === '');
-    }
-
-    getDoneSequences() {
-        // Return sequences that are marked as done
-        return this.sequences.filter(seq => seq.status === 'done');
-    }
-
-    getSkippedSequences() {
-        // Return sequences that are marked as skipped
-        return this.sequences.filter(seq => seq.status === 'skipped');
-    }
-
-    getCurrentViewSequences() {
-        // Return sequences based on current view
-        switch(this.currentView) {
-            case 'all':
-                return this.getAllSequences();
-            case 'done':
-                return this.getDoneSequences();
-            case 'skipped':
-                return this.getSkippedSequences();
-            case 'active':
-            default:
-                return this.getActiveSequences();
-        }
-    }
-
-    switchView(view, targetSequenceId = null) {
-        this.currentView = view;
-        
-        // Update tab buttons (support both old .tab-btn and new .filter-tab classes)
-        document.querySelectorAll('.tab-btn, .filter-tab').forEach(btn => {
-            if (btn.dataset.view === view) {
-                btn.classList.add('active');
-            } else {
-                btn.classList.remove('active');
-            }
-        });
-        
-        // If targetSequenceId is provided, navigate to that specific sequence
-        if (targetSequenceId !== null) {
-            const targetIndex = this.sequences.findIndex(seq => seq.id === targetSequenceId);
-            if (targetIndex >= 0) {
-                this.currentIndex = targetIndex;
-                this.renderCurrentTask();
-                return;
-            }
-        }
-        
-        // Reset to first item in the new view
-        const viewSequences = this.getCurrentViewSequences();
-        if (viewSequences.length > 0) {
-            const firstSequence = viewSequences[0];
-            this.currentIndex = this.sequences.findIndex(seq => seq.id === firstSequence.id);
-        } else {
-            this.currentIndex = 0;
-        }
-        
-        this.renderCurrentTask();
-    }
-
-    navigateToSequence(sequenceId) {
-        // Find the sequence in our data
-        const sequence = this.sequences.find(seq => seq.id === sequenceId);
-        if (!sequence) {
-            console.error('Sequence not found:', sequenceId);
-            return;
-        }
-
-        // Set flag to indicate we're navigating to this sequence (for highlighting)
-        this.navigatingToSequenceId = sequenceId;
-
-        // Determine which tab this sequence belongs to based on status
-        let targetView = 'active'; // default to active
-        if (sequence.status === 'done') {
-            targetView = 'done';
-        } else if (sequence.status === 'skipped') {
-            targetView = 'skipped';
-        } else {
-            targetView = 'active';
-        }
-
-        // Switch to the appropriate tab and navigate to the sequence
-        this.switchView(targetView, sequenceId);
-    }
-
-    renderCurrentTask() {
-        // Route to appropriate render method based on view
-        switch(this.currentView) {
-            case 'all':
-                this.renderAllTasksView();
-                break;
-            case 'skipped':
-            case 'done':
-                this.renderSimpleListView();
-                break;
-            case 'active':
-            default:
-                this.renderDetailedView();
-                break;
-        }
-    }
-
-    renderAllTasksView() {
-        const taskDisplay = document.getElementById('taskDisplay');
-        const prevBtn = document.getElementById('prevBtn');
-        const nextBtn = document.getElementById('nextBtn');
-        const taskCounter = document.getElementById('taskCounter');
-
-        const allSequences = this.getAllSequences();
-        
-        if (allSequences.length === 0) {
-            taskDisplay.innerHTML = `
-                <div class="empty-state">
-                    <p>No tasks found. Upload a file to begin.</p>
-                </div>
-            `;
-            if (prevBtn) prevBtn.style.display = 'none';
-            if (nextBtn) nextBtn.style.display = 'none';
-            if (taskCounter) taskCounter.textContent = '';
-            return;
+        if (allSequences.length === 0) {
+            this.destroySequenceList();
+            taskDisplay.innerHTML = `
+                <div class="empty-state">
+                    <p>No tasks found. Upload a file to begin.</p>
+                </div>
+            `;
+            if (prevBtn) prevBtn.style.display = 'none';
+            if (nextBtn) nextBtn.style.display = 'none';
+            if (taskCounter) taskCounter.textContent = '';
+            return;
         }
 
         // Hide navigation for "All Tasks" - show full list
@@ -1173,70 +521,94 @@ class TaskManager {
             }
         }
 
-        // Render simple list of all sequence IDs (clickable)
-        const sequenceList = filteredSequences.map(seq => {
-            const escapedId = String(seq.id).replace(/'/g, "\\'").replace(/"/g, "&quot;");
-            return `<div class="sequence-id-item clickable" data-sequence-id="${escapedId}" onclick="taskManager.navigateToSequence('${escapedId}')">${seq.id}</div>`;
-        }).join('');
-
-        taskDisplay.innerHTML = `
-            <div class="all-tasks-list">
-                <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px; flex-wrap: wrap; gap: 10px;">
-                    <h4>All Sequence IDs (${allSequences.length} total)</h4>
-                    <div style="display: flex; gap: 10px; align-items: center; flex-wrap: wrap;">
-                        <div style="position: relative; flex: 1; min-width: 200px;">
-                            <input 
-                                type="text" 
-                                id="allTasksSearchInput" 
-                                class="search-input" 
-                                placeholder="🔍 Search sequence ID..." 
-                                value="${this.allTasksSearchTerm}"
-                                oninput="taskManager.handleAllTasksSearch(this.value)"
-                            />
+        // The header and search box are built once per visit; searches only swap the list's items
+        let list = this.getSequenceList('all');
+        if (!list) {
+            taskDisplay.innerHTML = `
+                <div class="all-tasks-list">
+                    <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px; flex-wrap: wrap; gap: 10px;">
+                        <h4 id="allTasksHeading"></h4>
+                        <div style="display: flex; gap: 10px; align-items: center; flex-wrap: wrap;">
+                            <div style="position: relative; flex: 1; min-width: 200px;">
+                                <input 
+                                    type="text" 
+                                    id="allTasksSearchInput" 
+                                    class="search-input" 
+                                    placeholder="🔍 Search sequence ID..." 
+                                    oninput="taskManager.handleAllTasksSearch(this.value)"
+                                />
+                            </div>
+                            <button class="btn btn-primary" onclick="taskManager.exportAllToCSV()" style="white-space: nowrap;">
+                                📊 Export to CSV
+                            </button>
                         </div>
-                        <button class="btn btn-primary" onclick="taskManager.exportAllToCSV()" style="white-space: nowrap;">
-                            📊 Export to CSV
-                        </button>
                     </div>
-                </div>
-                ${filteredSequences.length === 0 && searchTerm ? `
-                    <div class="empty-state">
-                        <p>No sequences found matching "${this.allTasksSearchTerm}"</p>
-                    </div>
-                ` : `
-                    <div class="sequence-list">
-                        ${sequenceList}
+                    <div class="empty-state" id="allTasksNoMatch" style="display: none;">
+                        <p></p>
                     </div>
-                `}
-            </div>
-        `;
+                    <div class="sequence-list"></div>
+                </div>
+            `;
+            document.getElementById('allTasksSearchInput').value = this.allTasksSearchTerm;
+
+            // Render simple list of all sequence IDs (clickable)
+            const viewport = taskDisplay.querySelector('.sequence-list');
+            list = this.createSequenceList('all', viewport, {
+                rowHeight: 56,
+                gap: 10,
+                minColumnWidth: 180,
+                createRow: () => {
+                    const item = document.createElement('div');
+                    item.className = 'sequence-id-item clickable';
+                    return item;
+                },
+                renderRow: (item, seq) => {
+                    item.dataset.sequenceId = seq.id;
+                    item.textContent = seq.id;
+                }
+            });
+            viewport.addEventListener('click', (e) => {
+                const item = e.target.closest('.sequence-id-item');
+                if (item) this.navigateToSequence(item.dataset.sequenceId);
+            });
+        }
+
+        document.getElementById('allTasksHeading').textContent = `All Sequence IDs (${allSequences.length} total)`;
+        const noMatch = document.getElementById('allTasksNoMatch');
+        const showNoMatch = filteredSequences.length === 0 && Boolean(searchTerm);
+        noMatch.style.display = showNoMatch ? '' : 'none';
+        noMatch.querySelector('p').textContent = `No sequences found matching "${this.allTasksSearchTerm}"`;
+        list.viewport.style.display = showNoMatch ? 'none' : '';
+        list.setItems(filteredSequences);
     }
 
     handleAllTasksSearch(searchTerm) {
+        // The search input stays in place (and keeps focus) - only the list is refilled
         this.allTasksSearchTerm = searchTerm;
-        
-        // Get the search input element to preserve focus and cursor position
-        const searchInput = document.getElementById('allTasksSearchInput');
-        const wasFocused = document.activeElement === searchInput;
-        const cursorPosition = searchInput ? searchInput.selectionStart : null;
-        
-        // Re-render the view
         this.renderAllTasksView();
-        
-        // Restore focus and cursor position if it was focused
-        if (wasFocused) {
-            // Use requestAnimationFrame to ensure DOM is updated
-            requestAnimationFrame(() => {
-                const newSearchInput = document.getElementById('allTasksSearchInput');
-                if (newSearchInput) {
-                    newSearchInput.focus();
-                    // Set cursor position, accounting for the new value length
-                    const newCursorPos = cursorPosition !== null 
-                        ? Math.min(cursorPosition, newSearchInput.value.length) 
-                        : newSearchInput.value.length;
-                    newSearchInput.setSelectionRange(newCursorPos, newCursorPos);
-                }
-            });
+    }
+
+    getSequenceList(kind) {
+        // The list of this kind if it is still on screen
+        const current = this.sequenceList;
+        const taskDisplay = document.getElementById('taskDisplay');
+        if (current && current.kind === kind && taskDisplay.contains(current.list.viewport)) {
+            return current.list;
+        }
+        return null;
+    }
+
+    createSequenceList(kind, viewport, options) {
+        this.destroySequenceList();
+        const list = new VirtualList(viewport, options);
+        this.sequenceList = { kind: kind, list: list };
+        return list;
+    }
+
+    destroySequenceList() {
+        if (this.sequenceList) {
+            this.sequenceList.list.destroy();
+            this.sequenceList = null;
         }
     }
 
@@ -1249,6 +621,7 @@ class TaskManager {
         const viewSequences = this.getCurrentViewSequences();
         
         if (viewSequences.length === 0) {
+            this.destroySequenceList();
             const viewName = this.currentView === 'done' ? 'done' : 'skipped';
             taskDisplay.innerHTML = `
                 <div class="empty-state">
@@ -1266,48 +639,67 @@ class TaskManager {
         if (nextBtn) nextBtn.style.display = 'none';
         if (taskCounter) taskCounter.textContent = `${viewSequences.length} ${this.currentView} sequence(s)`;
 
-        // Render full list: Sequence ID + Status dropdown for each
+        // Full list: Sequence ID + Status dropdown for each (rows built only as they scroll into view)
         const viewName = this.currentView === 'done' ? 'Done' : 'Skipped';
-        const sequenceList = viewSequences.map(seq => {
-            const escapedId = String(seq.id).replace(/'/g, "\\'");
-            const isTarget = this.navigatingToSequenceId && String(seq.id) === String(this.navigatingToSequenceId);
-            return `
-                <div class="sequence-item-with-status" data-sequence-id="${seq.id}" ${isTarget ? 'data-highlight="true"' : ''}>
-                    <div class="sequence-id-display">${seq.id}</div>
-                    <select class="status-dropdown-inline" data-sequence-id="${seq.id}" onchange="taskManager.updateStatus('${escapedId}', this.value)">
-                        <option value="" ${!seq.status || seq.status === '' ? 'selected' : ''}>Active (Blank)</option>
-                        <option value="skipped" ${seq.status === 'skipped' ? 'selected' : ''}>Skipped</option>
-                        <option value="done" ${seq.status === 'done' ? 'selected' : ''}>Done</option>
-                    </select>
+        let list = this.getSequenceList(this.currentView);
+        if (!list) {
+            taskDisplay.innerHTML = `
+                <div class="simple-list-view">
+                    <h4 id="simpleListHeading"></h4>
+                    <div class="sequence-list-with-status"></div>
                 </div>
             `;
-        }).join('');
+            const viewport = taskDisplay.querySelector('.sequence-list-with-status');
+            list = this.createSequenceList(this.currentView, viewport, {
+                rowHeight: 64,
+                gap: 8,
+                createRow: () => {
+                    const item = document.createElement('div');
+                    item.className = 'sequence-item-with-status';
+                    item.innerHTML = `
+                        <div class="sequence-id-display"></div>
+                        <select class="status-dropdown-inline">
+                            <option value="">Active (Blank)</option>
+                            <option value="skipped">Skipped</option>
+                            <option value="done">Done</option>
+                        </select>
+                    `;
+                    return item;
+                },
+                renderRow: (item, seq) => {
+                    const isTarget = this.navigatingToSequenceId && String(seq.id) === String(this.navigatingToSequenceId);
+                    item.dataset.sequenceId = seq.id;
+                    item.classList.toggle('highlighted', Boolean(isTarget));
+                    item.firstElementChild.textContent = seq.id;
+                    const select = item.querySelector('select');
+                    select.dataset.sequenceId = seq.id;
+                    select.value = seq.status || '';
+                }
+            });
+            viewport.addEventListener('change', (e) => {
+                const item = e.target.closest('.sequence-item-with-status');
+                if (item) this.updateStatus(item.dataset.sequenceId, e.target.value);
+            });
+        }
 
-        taskDisplay.innerHTML = `
-            <div class="simple-list-view">
-                <h4>${viewName} Sequences (${viewSequences.length} total)</h4>
-                <div class="sequence-list-with-status">
-                    ${sequenceList}
-                </div>
-            </div>
-        `;
+        document.getElementById('simpleListHeading').textContent = `${viewName} Sequences (${viewSequences.length} total)`;
+        list.setItems(viewSequences);
 
         // If we navigated here via navigateToSequence, scroll to and highlight the target
         if (this.navigatingToSequenceId) {
-            const targetSequenceId = this.navigatingToSequenceId;
-            setTimeout(() => {
-                const targetElement = document.querySelector(`[data-sequence-id="${targetSequenceId}"]`);
-                if (targetElement) {
-                    targetElement.scrollIntoView({ behavior: 'smooth', block: 'center' });
-                    targetElement.classList.add('highlighted');
-                    setTimeout(() => {
-                        targetElement.classList.remove('highlighted');
+            const targetSequenceId = String(this.navigatingToSequenceId);
+            const targetIndex = viewSequences.findIndex(seq => String(seq.id) === targetSequenceId);
+            if (targetIndex >= 0) {
+                list.scrollToIndex(targetIndex);
+                setTimeout(() => {
+                    if (String(this.navigatingToSequenceId) === targetSequenceId) {
                         this.navigatingToSequenceId = null; // Clear the flag after highlighting
-                    }, 2000);
-                } else {
-                    this.navigatingToSequenceId = null; // Clear flag if element not found
-                }
-            }, 100);
+                        list.refresh();
+                    }
+                }, 2000);
+            } else {
+                this.navigatingToSequenceId = null; // Clear flag if sequence not in this view
+            }
         }
     }
 
@@ -1418,6 +810,9 @@ class TaskManager {
                 this.updateStatus(displaySequence.id, e.target.value);
             });
         }
+        
+        // Warm the OSM context of this and the next sequences while the reviewer reads
+        this.prefetchUpcomingContext();
     }
 
     findNextActiveIndex() {
@@ -1445,7 +840,7 @@ class TaskManager {
         const sequence = this.sequences.find(s => String(s.id) === String(sequenceId));
         if (sequence) {
             sequence.status = newStatus;
-            await this.saveToStorage();
+            this.saveToStorage([sequence], { features: false });
             
             // If in 'all' view, stay in 'all' view (don't auto-switch)
             if (this.currentView === 'all') {
@@ -1564,93 +959,45 @@ class TaskManager {
 
     async loadOsmDataForPreview(sequence) {
         try {
-            // Calculate bounding box
-            const bbox = this.calculateBoundingBox(sequence);
-            
             // Remove existing OSM data layer if present
             if (this.osmDataLayer) {
                 this.map.removeLayer(this.osmDataLayer);
                 this.osmDataLayer = null;
             }
             
-            // Create Overpass API query to get all ways and nodes in the bounding box
-            const overpassQuery = `
-                [out:xml][timeout:25];
-                (
-                  way["highway"](${bbox.bottom},${bbox.left},${bbox.top},${bbox.right});
-                  relation["type"="route"]["route"~"^(bus|tram|train|subway|light_rail|trolleybus|ferry|monorail|aerialway|share_taxi|funicular)$"](${bbox.bottom},${bbox.left},${bbox.top},${bbox.right});
-                );
-                (._;>;);
-                out body;
-            `;
-            
-            // Fetch OSM data from Overpass API
-            const overpassUrl = 'https://overpass-api.de/api/interpreter';
+            // Prefetched context is ready at once; otherwise it is downloaded and parsed now
             console.log('Loading OSM data for preview...');
-            
-            const response = await fetch(overpassUrl, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: `data=${encodeURIComponent(overpassQuery)}`
-            });
-            
-            if (!response.ok) {
-                throw new Error(`Overpass API error: ${response.status}`);
-            }
-            
-            const osmXml = await response.text();
-            
-            // Parse OSM XML and convert to GeoJSON
-            const osmGeoJson = this.parseOsmXmlToGeoJson(osmXml);
-            
-            if (osmGeoJson && osmGeoJson.features && osmGeoJson.features.length > 0) {
-                // Add OSM data as a layer with distinct styling (gray, thinner)
-                this.osmDataLayer = L.geoJSON(osmGeoJson, {
-                    style: (feature) => {
-                        // Style OSM data differently from GPS trace
-                        const highway = feature.properties?.highway;
-                        let color = '#888888'; // Default gray
-                        let weight = 2;
-                        
-                        // Color code by highway type
-                        if (highway === 'motorway' || highway === 'trunk') {
-                            color = '#ff6b6b';
-                            weight = 3;
-                        } else if (highway === 'primary') {
-                            color = '#ffa500';
-                            weight = 2.5;
-                        } else if (highway === 'secondary') {
-                            color = '#ffd700';
-                            weight = 2;
-                        } else if (highway === 'tertiary') {
-                            color = '#90ee90';
-                            weight = 2;
-                        } else if (highway === 'residential' || highway === 'unclassified') {
-                            color = '#c0c0c0';
-                            weight = 1.5;
-                        }
-                        
-                        return {
-                            color: color,
-                            weight: weight,
-                            opacity: 0.6,
-                            dashArray: '5, 5' // Dashed line to distinguish from GPS trace
-                        };
-                    },
-                    onEachFeature: (feature, layer) => {
-                        // Mark this layer as OSM data layer (read-only)
-                        layer._isOsmDataLayer = true;
-                        layer._isReadOnly = true; // Mark as read-only
-                        // Store original feature for reference
-                        layer.feature = feature;
-                        // OSM data is read-only - make it non-interactive
-                        layer.setStyle({ interactive: false });
+            const context = await this.getOsmContext(sequence);
+            
+            if (context.wayCount > 0) {
+                // One multi-line polyline per highway style instead of a layer per way
+                const groups = new Map();
+                for (let way = 0; way < context.wayCount; way++) {
+                    const style = this.osmHighwayStyle(context.wayHighwayValue(way));
+                    const key = `${style.color}|${style.weight}`;
+                    if (!groups.has(key)) {
+                        groups.set(key, { style: style, lines: [] });
                     }
-                }).addTo(this.map);
+                    groups.get(key).lines.push(context.wayLatLngs(way));
+                }
+                
+                this.osmDataLayer = L.layerGroup();
+                groups.forEach(({ style, lines }) => {
+                    const layer = L.polyline(lines, {
+                        color: style.color,
+                        weight: style.weight,
+                        opacity: 0.6,
+                        dashArray: '5, 5', // Dashed line to distinguish from GPS trace
+                        interactive: false // OSM data is read-only - make it non-interactive
+                    });
+                    // Mark this layer as OSM data layer (read-only)
+                    layer._isOsmDataLayer = true;
+                    layer._isReadOnly = true;
+                    this.osmDataLayer.addLayer(layer);
+                });
+                this.osmDataLayer.addTo(this.map);
                 
-                console.log(`Loaded ${osmGeoJson.features.length} OSM features for preview`);
+                console.log(`Loaded ${context.wayCount} OSM features for preview`);
             } else {
                 console.log('No OSM data found in the area');
             }
@@ -1660,149 +1007,173 @@ class TaskManager {
         }
     }
 
-    parseOsmXmlToGeoJson(osmXml) {
+    osmHighwayStyle(highway) {
+        // Style OSM data differently from GPS trace: gray by default, color coded by highway type
+        if (highway === 'motorway' || highway === 'trunk') {
+            return { color: '#ff6b6b', weight: 3 };
+        } else if (highway === 'primary') {
+            return { color: '#ffa500', weight: 2.5 };
+        } else if (highway === 'secondary') {
+            return { color: '#ffd700', weight: 2 };
+        } else if (highway === 'tertiary') {
+            return { color: '#90ee90', weight: 2 };
+        } else if (highway === 'residential' || highway === 'unclassified') {
+            return { color: '#c0c0c0', weight: 1.5 };
+        }
+        return { color: '#888888', weight: 2 };
+    }
+
+    buildOverpassQuery(bbox) {
+        // Create Overpass API query to get all ways and nodes in the bounding box
+        return `
+                [out:xml][timeout:25];
+                (
+                  way["highway"](${bbox.bottom},${bbox.left},${bbox.top},${bbox.right});
+                  relation["type"="route"]["route"~"^(bus|tram|train|subway|light_rail|trolleybus|ferry|monorail|aerialway|share_taxi|funicular)$"](${bbox.bottom},${bbox.left},${bbox.top},${bbox.right});
+                );
+                (._;>;);
+                out body;
+            `;
+    }
+
+    getOsmContext(sequence, prefetch = false) {
+        // Parsed OSM context of a sequence, shared by the preview and the prefetcher
+        const key = String(sequence.id);
+        const bbox = this.calculateBoundingBox(sequence);
+        const bboxKey = [bbox.left, bbox.bottom, bbox.right, bbox.top].join(',');
+        
+        const cached = this.osmContextCache.get(key);
+        if (cached && cached.bboxKey === bboxKey) {
+            return cached.promise;
+        }
+        
+        const promise = this.fetchOverpass(bbox, this.buildOverpassQuery(bbox), prefetch)
+            .then(response => this.readOsmContext(response));
+        // Failed downloads are not kept, so the next attempt fetches again
+        promise.catch(() => {
+            if (this.osmContextCache.get(key)?.promise === promise) this.osmContextCache.delete(key);
+        });
+        
+        this.osmContextCache.delete(key);
+        this.osmContextCache.set(key, { bboxKey, promise });
+        while (this.osmContextCache.size > this.osmContextCacheSize) {
+            this.osmContextCache.delete(this.osmContextCache.keys().next().value);
+        }
+        return promise;
+    }
+
+    prefetchUpcomingContext() {
+        // Only through the local tile cache - prefetching must not eat into the public Overpass quota
+        if (!this.isLocalMode || this.overpassProxyAvailable === false) return;
+        
+        const viewSequences = this.getCurrentViewSequences();
+        const currentSequence = this.sequences[this.currentIndex];
+        const start = Math.max(0, viewSequences.findIndex(seq => String(seq.id) === String(currentSequence?.id)));
+        
+        // The current sequence and the next active ones; sequences skipped past drop out of the queue
+        this.prefetchQueue = viewSequences.slice(start)
+            .filter(seq => (!seq.status || seq.status === '') && seq.features && seq.features.length > 0)
+            .slice(0, this.prefetchCount + 1)
+            .filter(seq => !this.osmContextCache.has(String(seq.id)));
+        
+        while (this.prefetchActive < this.prefetchConcurrency && this.prefetchActive < this.prefetchQueue.length) {
+            this.runPrefetchWorker();
+        }
+    }
+
+    async runPrefetchWorker() {
+        this.prefetchActive++;
         try {
-            const parser = new DOMParser();
-            const xmlDoc = parser.parseFromString(osmXml, 'text/xml');
-            
-            // Check for parsing errors
-            const parserError = xmlDoc.querySelector('parsererror');
-            if (parserError) {
-                throw new Error('XML parsing error');
-            }
-            
-            const nodes = new Map();
-            const ways = [];
-            
-            // Clear previous OSM data
-            this.osmNodes.clear();
-            this.osmWays = [];
-            
-            // PASS 1: Parse all nodes first (two-pass parsing for reliability)
-            xmlDoc.querySelectorAll('node').forEach(nodeEl => {
-                const id = nodeEl.getAttribute('id');
-                const lat = parseFloat(nodeEl.getAttribute('lat'));
-                const lon = parseFloat(nodeEl.getAttribute('lon'));
-                
-                // Skip invalid nodes
-                if (isNaN(lat) || isNaN(lon) || !id) {
-                    console.warn(`Skipping invalid node: ${id}`);
-                    return;
-                }
-                
-                const tags = {};
-                nodeEl.querySelectorAll('tag').forEach(tag => {
-                    const key = tag.getAttribute('k');
-                    const value = tag.getAttribute('v');
-                    if (key && value) {
-                        tags[key] = value;
-                    }
-                });
-                
-                const nodeData = { id, lat, lon, tags };
-                nodes.set(id, nodeData);
-                // Store in osmNodes for snapping (consistent format)
-                this.osmNodes.set(id, { lat, lon });
-            });
-            
-            console.log(`Pass 1: Parsed ${nodes.size} OSM nodes`);
-            
-            // PASS 2: Parse ways (now we have all nodes available)
-            xmlDoc.querySelectorAll('way').forEach(wayEl => {
-                const id = wayEl.getAttribute('id');
-                if (!id) return;
-                
-                const ndRefs = [];
-                wayEl.querySelectorAll('nd').forEach(nd => {
-                    const ref = nd.getAttribute('ref');
-                    if (ref && nodes.has(ref)) {
-                        ndRefs.push(ref);
-                    } else if (ref) {
-                        console.warn(`Way ${id} references missing node ${ref}`);
-                    }
-                });
-                
-                // Skip ways with less than 2 valid node references
-                if (ndRefs.length < 2) {
-                    console.warn(`Skipping way ${id}: insufficient nodes (${ndRefs.length})`);
-                    return;
-                }
-                
-                const tags = {};
-                wayEl.querySelectorAll('tag').forEach(tag => {
-                    const key = tag.getAttribute('k');
-                    const value = tag.getAttribute('v');
-                    if (key && value) {
-                        tags[key] = value;
-                    }
-                });
-                
-                // Only include ways with highway tag (roads)
-                if (tags.highway) {
-                    // Build coordinates array in GeoJSON format [lon, lat]
-                    const coordinates = ndRefs
-                        .map(ref => {
-                            const node = nodes.get(ref);
-                            if (node) {
-                                return [node.lon, node.lat]; // GeoJSON format: [lon, lat]
-                            }
-                            return null;
-                        })
-                        .filter(coord => coord !== null);
-                    
-                    // Store way data with consistent coordinate format
-                    if (coordinates.length >= 2) {
-                        // Store for snapping: convert to {lat, lon} objects for compatibility
-                        const wayCoordsForSnapping = coordinates.map(coord => ({
-                            lat: coord[1], // lat is second element in [lon, lat]
-                            lon: coord[0]  // lon is first element in [lon, lat]
-                        }));
-                        
-                        this.osmWays.push({
-                            id: parseInt(id),
-                            coordinates: wayCoordsForSnapping, // For snapping: {lat, lon} objects
-                            coordinatesGeoJSON: coordinates,    // For GeoJSON: [lon, lat] arrays
-                            tags
-                        });
-                        
-                        ways.push({ id, ndRefs, tags, coordinates });
-                    }
+            while (this.prefetchQueue.length > 0) {
+                const sequence = this.prefetchQueue.shift();
+                if (this.osmContextCache.has(String(sequence.id))) continue;
+                try {
+                    await this.getOsmContext(sequence, true);
+                } catch (error) {
+                    // Not critical - the preview downloads it when opened
                 }
-            });
-            
-            console.log(`Pass 2: Parsed ${ways.length} OSM ways (${this.osmWays.length} with highway tag)`);
-            
-            // Convert ways to GeoJSON LineStrings
-            const features = ways.map(way => {
-                if (way.coordinates.length < 2) {
-                    return null; // Skip invalid ways
+            }
+        } finally {
+            this.prefetchActive--;
+        }
+    }
+
+    async fetchOverpass(bbox, overpassQuery, proxyOnly = false) {
+        // Response with the OSM XML of a bbox
+        // Local server first: it caches Overpass responses per map tile, so
+        // neighbouring sequences reuse what was already downloaded
+        if (this.isLocalMode && this.overpassProxyAvailable !== false) {
+            try {
+                const bboxParam = [bbox.left, bbox.bottom, bbox.right, bbox.top].join(',');
+                const prefetchParam = proxyOnly ? '&prefetch=1' : '';
+                const response = await fetch(`http://localhost:8000/overpass?bbox=${bboxParam}&format=columnar${prefetchParam}`);
+                if (response.ok) {
+                    this.overpassProxyAvailable = true;
+                    return response;
                 }
-                
-                return {
-                    type: 'Feature',
-                    geometry: {
-                        type: 'LineString',
-                        coordinates: way.coordinates // Already in [lon, lat] format
-                    },
-                    properties: {
-                        ...way.tags,
-                        osm_id: way.id
-                    }
-                };
-            }).filter(f => f !== null);
-            
-            console.log(`Parsed ${this.osmNodes.size} OSM nodes and ${this.osmWays.length} OSM ways for snapping`);
-            
-            return {
-                type: 'FeatureCollection',
-                features: features
-            };
+                // 404: an older server.py without /overpass
+                if (response.status === 404) this.overpassProxyAvailable = false;
+                console.warn(`Overpass proxy error: ${response.status}, querying Overpass directly`);
+            } catch (error) {
+                // Server not running
+                this.overpassProxyAvailable = false;
+            }
+        }
+        if (proxyOnly) {
+            throw new Error('Overpass proxy not available');
+        }
+        
+        // Fetch OSM data from Overpass API
+        const overpassUrl = 'https://overpass-api.de/api/interpreter';
+        const response = await fetch(overpassUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+            },
+            body: `data=${encodeURIComponent(overpassQuery)}`
+        });
+        
+        if (!response.ok) {
+            throw new Error(`Overpass API error: ${response.status}`);
+        }
+        
+        return response;
+    }
+
+    parseOsmContext(osmXml) {
+        // OsmContext of an Overpass response, without touching the current preview
+        try {
+            const parser = new OsmXmlStreamParser();
+            parser.push(osmXml);
+            return parser.finish();
         } catch (error) {
             console.error('Error parsing OSM XML:', error);
-            return { type: 'FeatureCollection', features: [] };
+            return OsmContext.empty();
         }
     }
 
+    async readOsmContext(response) {
+        // The local server sends the context ready-made as typed arrays
+        if ((response.headers?.get('Content-Type') || '').startsWith(OsmContext.CONTENT_TYPE)) {
+            return OsmContext.fromBuffer(await response.arrayBuffer());
+        }
+        
+        // Overpass XML is parsed while the response downloads when the body is readable as a stream
+        if (!response.body || typeof TextDecoder === 'undefined') {
+            return this.parseOsmContext(await response.text());
+        }
+        const parser = new OsmXmlStreamParser();
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            parser.push(decoder.decode(value, { stream: true }));
+        }
+        parser.push(decoder.decode());
+        return parser.finish();
+    }
+
     async sendToJOSM(josmXml, sequenceId) {
         // Re-detect helper in case it wasn't detected on startup
         await this.detectLocalHelper();
@@ -1846,18 +1217,29 @@ class TaskManager {
         try {
             console.log('📤 Step 1: Uploading GPS trace OSM XML to helper server...');
             
-            // POST the OSM XML to our helper server
-            const response = await fetch(`${exportServerUrl}/export`, {
+            // POST the raw OSM XML to our helper server (streamed to disk, no JSON wrapping)
+            let response = await fetch(`${exportServerUrl}/export/raw?sequenceId=${encodeURIComponent(sequenceId)}`, {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json',
+                    'Content-Type': 'application/xml',
                 },
-                body: JSON.stringify({
-                    sequenceId: sequenceId,
-                    osmXml: josmXml
-                })
+                body: josmXml
             });
             
+            // Older helpers only understand the JSON export request
+            if (response.status === 404) {
+                response = await fetch(`${exportServerUrl}/export`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({
+                        sequenceId: sequenceId,
+                        osmXml: josmXml
+                    })
+                });
+            }
+            
             if (!response.ok) {
                 throw new Error(`Helper server error: ${response.status} ${response.statusText}`);
             }
@@ -2183,56 +1565,6 @@ class TaskManager {
         let wayId = -1000;
         const nodeMap = new Map();
         
-        // Build coordinate-to-marker mapping from editableLayers to access merge information
-        // Use a list of markers with coordinates for tolerance-based matching
-        const markerList = [];
-        const coordTolerance = 0.00001; // ~1 meter tolerance for coordinate matching
-        
-        if (this.editableLayers && this.editableLayers.length > 0) {
-            this.editableLayers.forEach(layer => {
-                // Only process GPS trace layers (not OSM data layers)
-                if (layer._isGpsTrace && (layer instanceof L.Polyline || layer instanceof L.Polygon)) {
-                    const latlngs = this.flattenLatLngs(layer.getLatLngs());
-                    const markers = layer._vertexMarkers || [];
-                    
-                    latlngs.forEach((latlng, index) => {
-                        if (latlng && (latlng instanceof L.LatLng || (latlng.lat !== undefined && latlng.lng !== undefined))) {
-                            const lat = latlng.lat || latlng[0];
-                            const lng = latlng.lng || latlng[1];
-                            
-                            // Get corresponding marker if available
-                            const marker = markers[index];
-                            if (marker) {
-                                markerList.push({
-                                    lat: lat,
-                                    lon: lng,
-                                    marker: marker
-                                });
-                            }
-                        }
-                    });
-                }
-            });
-        }
-        
-        // Helper function to find nearest marker for a coordinate
-        const findMarkerForCoord = (lat, lon) => {
-            let nearestMarker = null;
-            let minDistance = Infinity;
-            
-            markerList.forEach(item => {
-                const distance = Math.sqrt(
-                    Math.pow(item.lat - lat, 2) + Math.pow(item.lon - lon, 2)
-                );
-                if (distance < minDistance && distance <= coordTolerance) {
-                    minDistance = distance;
-                    nearestMarker = item.marker;
-                }
-            });
-            
-            return nearestMarker;
-        };
-
         // Process features and create nodes
         sequence.features.forEach(feature => {
             if (!feature.geometry) return;
@@ -2416,6 +1748,13 @@ class TaskManager {
                     preferCanvas: true,  // Use canvas renderer for better performance
                     renderer: L.canvas({ padding: 0.5 })  // Optimize rendering
                 }).setView([1.301965, 103.9003035], 13);
+
+                this.vertexHandles = new VertexHandleLayer(this.map, {
+                    styleOf: (layer, index, count) => this.vertexHandleStyle(layer, index, count),
+                    onClick: (layer, index) => this.handleVertexClick(layer, index),
+                    onDragStart: (layer) => this.handleVertexDragStart(layer),
+                    onDragEnd: (layer, index, latlng) => this.handleVertexDragEnd(layer, index, latlng)
+                });
                 
                 // Add OpenStreetMap tile layer with overzooming support
                 // maxNativeZoom: 19 means tiles are available up to zoom 19
@@ -2430,6 +1769,7 @@ class TaskManager {
             }
 
             // Clear existing GeoJSON layers (but keep tile layer and OSM data layer)
+            this.vertexHandles.clear();
             this.map.eachLayer((layer) => {
                 if (layer instanceof L.GeoJSON || layer instanceof L.Polyline || layer instanceof L.Polygon || layer instanceof L.Marker) {
                     if (!(layer instanceof L.TileLayer) && !layer._isOsmDataLayer) {
@@ -2481,7 +1821,7 @@ class TaskManager {
                         layer.on('click', (e) => {
                             // Allow way selection in tag step, or if not in preview step and not in edit mode
                             if ((this.workflowStep === 'tag') || (this.workflowStep !== 'preview' && !this.previewEditMode)) {
-                                if (!e.originalEvent.target.closest('.vertex-marker')) {
+                                if (!this.vertexHandles.hitTest(e.containerPoint)) {
                                     const addToSelection = this.multiSelectMode && (e.originalEvent.ctrlKey || e.originalEvent.metaKey);
                                     this.selectWay(layer, addToSelection);
                                     e.originalEvent.stopPropagation();
@@ -2651,7 +1991,7 @@ class TaskManager {
                     layer.on('mousedown', (e) => {
                         // Check if clicking directly on the path element (not on markers)
                         const target = e.originalEvent.target;
-                        const isOnMarker = target.closest('.vertex-marker') || target.closest('.delete-node-btn') || target.closest('.leaflet-marker-icon');
+                        const isOnMarker = target.closest('.delete-node-btn') || target.closest('.leaflet-marker-icon') || this.vertexHandles.hitTest(e.containerPoint);
                         
                         if (!isOnMarker) {
                             // Store mouse down position for click detection
@@ -2700,34 +2040,8 @@ class TaskManager {
                                 // Update layer without triggering events that might cause feedback
                                 layer.setLatLngs(layer instanceof L.Polygon ? [newLatLngs] : newLatLngs);
                                 
-                                // Update vertex markers in real-time during drag for visual feedback
-                                // Update marker positions directly (synchronously) so they move with the way
-                                if (layer._vertexMarkers && layer._vertexMarkers.length === newLatLngs.length) {
-                                    // Update existing markers directly for immediate visual feedback
-                                    newLatLngs.forEach((latlng, index) => {
-                                        if (layer._vertexMarkers[index]) {
-                                            let lat, lng;
-                                            if (latlng instanceof L.LatLng) {
-                                                lat = latlng.lat;
-                                                lng = latlng.lng;
-                                            } else if (Array.isArray(latlng)) {
-                                                lat = latlng[0];
-                                                lng = latlng[1];
-                                            } else {
-                                                lat = latlng.lat || latlng[0];
-                                                lng = latlng.lng || latlng[1];
-                                            }
-                                            layer._vertexMarkers[index].setLatLng([lat, lng]);
-                                        }
-                                    });
-                                } else {
-                                    // If marker count doesn't match, recreate markers (shouldn't happen during drag)
-                                    if (!layer._updatingMarkers) {
-                                        layer._updatingMarkers = true;
-                                        this.updateVertexMarkers(layer, newLatLngs);
-                                        layer._updatingMarkers = false;
-                                    }
-                                }
+                                // Move the handles with the way
+                                this.updateVertexMarkers(layer, newLatLngs);
                                 
                                 wayDragRafId = null;
                             });
@@ -2779,7 +2093,7 @@ class TaskManager {
                         
                         // Check if hovering over the line (not markers)
                         const target = e.originalEvent.target;
-                        const isOnMarker = target.closest('.vertex-marker') || target.closest('.delete-node-btn') || target.closest('.leaflet-marker-icon');
+                        const isOnMarker = target.closest('.delete-node-btn') || target.closest('.leaflet-marker-icon') || this.vertexHandles.hitTest(e.containerPoint);
                         if (isOnMarker) {
                             if (previewMarker) {
                                 this.map.removeLayer(previewMarker);
@@ -2822,9 +2136,9 @@ class TaskManager {
                         
                         // Don't add node if currently dragging the way or clicked on marker
                         if (layer._isDragging || 
-                            e.originalEvent.target.closest('.vertex-marker') || 
                             e.originalEvent.target.closest('.delete-node-btn') ||
-                            e.originalEvent.target.closest('.leaflet-marker-icon')) {
+                            e.originalEvent.target.closest('.leaflet-marker-icon') ||
+                            this.vertexHandles.hitTest(e.containerPoint)) {
                             return;
                         }
                         
@@ -2874,21 +2188,8 @@ class TaskManager {
                             // Brief visual feedback: highlight the new node
                             this.updateVertexMarkers(layer, latlngs);
                             
-                            // Flash the new marker briefly
-                            setTimeout(() => {
-                                const newMarker = layer._vertexMarkers[insertIndex];
-                                if (newMarker && newMarker._icon) {
-                                    const handle = newMarker._icon.querySelector('.vertex-handle');
-                                    if (handle) {
-                                        handle.style.background = '#ffaa00';
-                                        handle.style.transform = 'scale(1.5)';
-                                        setTimeout(() => {
-                                            handle.style.background = '';
-                                            handle.style.transform = '';
-                                        }, 300);
-                                    }
-                                }
-                            }, 50);
+                            // Flash the new handle briefly
+                            this.vertexHandles.flash(layer, insertIndex, '#ffaa00', 300);
                         }
                     });
                     
@@ -2987,13 +2288,8 @@ class TaskManager {
                         this.map.off('mouseleave', layer._dragEndHandler);
                     }
                     
-                    // Remove vertex markers
-                    if (layer._vertexMarkers) {
-                        layer._vertexMarkers.forEach(marker => {
-                            this.map.removeLayer(marker);
-                        });
-                        layer._vertexMarkers = [];
-                    }
+                    // Remove vertex handles
+                    this.vertexHandles.remove(layer);
                     // Restore original style (only for GPS trace layers)
                     layer.setStyle({ weight: 4, opacity: 0.8, cursor: '' });
                 } else if (layer instanceof L.Marker) {
@@ -3074,36 +2370,74 @@ class TaskManager {
     }
     
     // Internal method to actually save state
+    // Records only what changed since the last entry: the replaced vertex range of each edited
+    // layer (moves, inserts, deletes and merges all reduce to one), added or removed layers,
+    // and moved markers. Every layer is compared, not just the ones passed to setLatLngs:
+    // connected ways share LatLng objects, so dragging one node can move several layers.
     _doSaveStateToHistory() {
         if (!this.editableLayers || this.editableLayers.length === 0) {
             return;
         }
         
-        // Capture current state of all editable layers
-        const state = this.editableLayers.map(layer => {
+        // The first entry is the starting point: it is never undone, so it only fills historyBase
+        const initial = this.editHistory.length === 0;
+        const changes = [];
+        
+        const layersChanged = this.editableLayers.length !== this.historyLayers.length ||
+            this.editableLayers.some((layer, index) => layer !== this.historyLayers[index]);
+        if (layersChanged) {
+            changes.push({ type: 'layers', before: this.historyLayers, after: this.editableLayers.slice() });
+            this.historyLayers = this.editableLayers.slice();
+        }
+        
+        this.editableLayers.forEach(layer => {
+            const base = this.historyBase.get(layer);
             if (layer instanceof L.Polyline || layer instanceof L.Polygon) {
                 const latlngs = this.flattenLatLngs(layer.getLatLngs());
-                // Convert to serializable format [lat, lng]
-                return {
-                    type: layer instanceof L.Polygon ? 'Polygon' : 'Polyline',
-                    latlngs: latlngs.map(ll => {
-                        if (ll instanceof L.LatLng) {
-                            return [ll.lat, ll.lng];
-                        } else if (Array.isArray(ll)) {
-                            return [ll[0] || ll.lat, ll[1] || ll.lng];
-                        }
-                        return [ll.lat || ll[0], ll.lng || ll[1]];
-                    })
-                };
+                if (!base) {
+                    // Convert to serializable format [lat, lng]
+                    const coords = latlngs.map(ll => [ll.lat, ll.lng]);
+                    this.historyBase.set(layer, { coords: coords });
+                    if (!initial) {
+                        changes.push({ type: 'vertices', layer: layer, start: 0, removed: [], inserted: coords.slice() });
+                    }
+                    return;
+                }
+                
+                // Replaced range: everything between the unchanged head and the unchanged tail
+                const previous = base.coords;
+                const samePoint = (pair, ll) => pair[0] === ll.lat && pair[1] === ll.lng;
+                let start = 0;
+                while (start < previous.length && start < latlngs.length && samePoint(previous[start], latlngs[start])) {
+                    start++;
+                }
+                if (start === previous.length && start === latlngs.length) return;
+                let end = 0;
+                while (end < previous.length - start && end < latlngs.length - start &&
+                       samePoint(previous[previous.length - 1 - end], latlngs[latlngs.length - 1 - end])) {
+                    end++;
+                }
+                
+                // Unchanged points stay shared between historyBase and the history entries
+                const removed = previous.slice(start, previous.length - end);
+                const inserted = latlngs.slice(start, latlngs.length - end).map(ll => [ll.lat, ll.lng]);
+                previous.splice(start, removed.length, ...inserted);
+                changes.push({ type: 'vertices', layer: layer, start: start, removed: removed, inserted: inserted });
             } else if (layer instanceof L.Marker) {
                 const latlng = layer.getLatLng();
-                return {
-                    type: 'Marker',
-                    latlng: [latlng.lat, latlng.lng]
-                };
+                const coords = [latlng.lat, latlng.lng];
+                if (!base) {
+                    this.historyBase.set(layer, { coords: coords });
+                } else if (base.coords[0] !== coords[0] || base.coords[1] !== coords[1]) {
+                    changes.push({ type: 'marker', layer: layer, from: base.coords, to: coords });
+                    base.coords = coords;
+                }
             }
-            return null;
-        }).filter(s => s !== null);
+        });
+        
+        if (!initial && changes.length === 0) {
+            return; // Nothing was edited
+        }
         
         // Remove any states after current index (when user did undo, then made new edit)
         if (this.currentHistoryIndex < this.editHistory.length - 1) {
@@ -3111,10 +2445,10 @@ class TaskManager {
         }
         
         // Add new state
-        this.editHistory.push(state);
+        this.editHistory.push({ changes: changes });
         this.currentHistoryIndex = this.editHistory.length - 1;
         
-        // Limit history size
+        // Limit history size (the oldest remaining entry becomes the starting point)
         if (this.editHistory.length > this.maxHistorySize) {
             this.editHistory.shift();
             this.currentHistoryIndex--;
@@ -3125,50 +2459,73 @@ class TaskManager {
         
         console.log('State saved to history. Index:', this.currentHistoryIndex, 'Total states:', this.editHistory.length);
     }
-
-    // Restore geometry state from history
-    restoreStateFromHistory(state) {
-        if (!state || !this.editableLayers) return;
-        
-        state.forEach((layerState, idx) => {
-            if (idx >= this.editableLayers.length) return;
-            
-            const layer = this.editableLayers[idx];
-            
-            if (layerState.type === 'Polyline' || layerState.type === 'Polygon') {
+
+    // Apply one history entry forward (redo) or backward (undo), touching only the layers it changed
+    applyHistoryEntry(entry, forward) {
+        const changes = forward ? entry.changes : entry.changes.slice().reverse();
+        changes.forEach(change => {
+            if (change.type === 'layers') {
+                const layers = forward ? change.after : change.before;
+                const kept = new Set(layers);
+                this.editableLayers.forEach(layer => {
+                    if (kept.has(layer)) return;
+                    this.vertexHandles.remove(layer);
+                    this.map.removeLayer(layer);
+                });
+                layers.forEach(layer => {
+                    if (this.map.hasLayer(layer)) return;
+                    // Back with its geometry as recorded (shared LatLngs may have moved since)
+                    const base = this.historyBase.get(layer);
+                    if (base && (layer instanceof L.Polyline || layer instanceof L.Polygon)) {
+                        const latlngs = base.coords.map(ll => L.latLng(ll[0], ll[1]));
+                        layer.setLatLngs(layer instanceof L.Polygon ? [latlngs] : latlngs);
+                    }
+                    layer.addTo(this.map);
+                });
+                this.editableLayers.splice(0, this.editableLayers.length, ...layers);
+                this.historyLayers = layers.slice();
+            } else if (change.type === 'vertices') {
+                const base = this.historyBase.get(change.layer);
+                const from = forward ? change.removed : change.inserted;
+                const to = forward ? change.inserted : change.removed;
+                base.coords.splice(change.start, from.length, ...to);
+                
                 // Convert back to LatLng objects
-                const latlngs = layerState.latlngs.map(ll => L.latLng(ll[0], ll[1]));
+                const latlngs = base.coords.map(ll => L.latLng(ll[0], ll[1]));
+                change.layer.setLatLngs(change.layer instanceof L.Polygon ? [latlngs] : latlngs);
                 
-                if (layer instanceof L.Polygon) {
-                    layer.setLatLngs([latlngs]);
-                } else {
-                    layer.setLatLngs(latlngs);
+                // Update vertex markers of this layer only
+                if (this.editableLayers.includes(change.layer)) {
+                    this.updateVertexMarkers(change.layer, latlngs);
                 }
-                
-                // Update vertex markers
-                this.updateVertexMarkers(layer, latlngs);
-                
-                // Markers created - no merge restoration needed
-            } else if (layerState.type === 'Marker' && layer instanceof L.Marker) {
-                const latlng = L.latLng(layerState.latlng[0], layerState.latlng[1]);
-                layer.setLatLng(latlng);
+            } else if (change.type === 'marker') {
+                const coords = forward ? change.to : change.from;
+                change.layer.setLatLng(L.latLng(coords[0], coords[1]));
+                this.historyBase.get(change.layer).coords = coords;
             }
         });
     }
 
+    // Record an edit that is still waiting for the save debounce, so undo/redo start from it
+    flushPendingHistorySave() {
+        if (this._historySaveTimeout) {
+            clearTimeout(this._historySaveTimeout);
+            this._historySaveTimeout = null;
+            this._doSaveStateToHistory();
+        }
+    }
+
     // Undo last edit
     undo() {
+        this.flushPendingHistorySave();
         if (this.currentHistoryIndex <= 0) {
             console.log('Nothing to undo');
             return;
         }
         
-        // Move back in history
+        // Revert the current entry and move back in history
+        this.applyHistoryEntry(this.editHistory[this.currentHistoryIndex], false);
         this.currentHistoryIndex--;
-        const previousState = this.editHistory[this.currentHistoryIndex];
-        
-        // Restore previous state
-        this.restoreStateFromHistory(previousState);
         
         // Update button states
         this.updateUndoRedoButtons();
@@ -3178,17 +2535,15 @@ class TaskManager {
 
     // Redo last undone edit
     redo() {
+        this.flushPendingHistorySave();
         if (this.currentHistoryIndex >= this.editHistory.length - 1) {
             console.log('Nothing to redo');
             return;
         }
         
-        // Move forward in history
+        // Move forward in history and re-apply that entry
         this.currentHistoryIndex++;
-        const nextState = this.editHistory[this.currentHistoryIndex];
-        
-        // Restore next state
-        this.restoreStateFromHistory(nextState);
+        this.applyHistoryEntry(this.editHistory[this.currentHistoryIndex], true);
         
         // Update button states
         this.updateUndoRedoButtons();
@@ -3219,6 +2574,8 @@ class TaskManager {
         // Clear history and save initial state
         this.editHistory = [];
         this.currentHistoryIndex = -1;
+        this.historyBase = new Map();
+        this.historyLayers = [];
         this.saveStateToHistory(); // Save initial state
     }
 
@@ -3247,745 +2604,116 @@ class TaskManager {
         return result;
     }
 
-    // Helper: Check if a position matches an OSM node or way and restore merge info
-    checkAndRestoreOsmMerge(marker, latlng) {
-        const lat = latlng instanceof L.LatLng ? latlng.lat : latlng[0] || latlng.lat;
-        const lon = latlng instanceof L.LatLng ? latlng.lng : latlng[1] || latlng.lng;
-        const mergeThreshold = 0.000005; // Very strict threshold for exact match (~0.5 meter) - only restore if actually merged
-        
-        // FIRST: Check if this position matches a way (prioritize ways)
-        if (this.osmWays && this.osmWays.length > 0) {
-            this.osmWays.forEach((way) => {
-                if (way.coordinates && way.coordinates.length >= 2) {
-                    const wayPoint = this.findNearestPointOnWay(latlng, way.coordinates, mergeThreshold);
-                    if (wayPoint) {
-                        // This node is on an OSM way - restore merge info
-                        marker._mergedToWay = {
-                            isOsmWay: true,
-                            lat: wayPoint.lat,
-                            lon: wayPoint.lon,
-                            segmentIndex: wayPoint.segmentIndex,
-                            param: wayPoint.param
-                        };
-                        marker._mergedOsmWayId = way.id;
-                        marker._mergedOsmWayTags = way.tags;
-                        marker._isMerged = true;
-                        marker._isMergedToWay = true;
-                        
-                        // Update visual feedback (forest green for way)
-                        const icon = marker.getIcon();
-                        if (icon && icon.options) {
-                            icon.options.html = '<div class="vertex-handle" style="background: #228B22; border-color: #ffffff;"></div>';
-                            marker.setIcon(icon);
-                        }
-                        return; // Found way, don't check nodes
-                    }
-                }
-            });
-        }
-        
-        // SECOND: Check if this position matches an OSM node (only if no way found)
-        if (!marker._isMerged && this.osmNodes && this.osmNodes.size > 0) {
-            this.osmNodes.forEach((node, nodeId) => {
-                const dx = node.lon - lon;
-                const dy = node.lat - lat;
-                const distance = Math.sqrt(dx * dx + dy * dy);
-                
-                if (distance <= mergeThreshold) {
-                    // This node is at an OSM node position - restore merge info
-                    marker._mergedOsmNodeId = nodeId;
-                    marker._mergedOsmNodeData = {
-                        id: nodeId,
-                        lat: node.lat,
-                        lon: node.lon
-                    };
-                    marker._isMerged = true;
-                    marker._isMergedToWay = false;
-                    
-                    // Update visual feedback (dark green for node)
-                    const icon = marker.getIcon();
-                    if (icon && icon.options) {
-                        icon.options.html = '<div class="vertex-handle" style="background: #006400; border-color: #ffffff;"></div>';
-                        marker.setIcon(icon);
-                    }
-                }
-            });
-        }
-        
-        // Also check GPS trace ways (editable layers)
-        if (!marker._isMerged && this.editableLayers && this.editableLayers.length > 0) {
-            this.editableLayers.forEach((gpsLayer) => {
-                if (gpsLayer instanceof L.Polyline || gpsLayer instanceof L.Polygon) {
-                    const layerLatlngs = this.flattenLatLngs(gpsLayer.getLatLngs());
-                    
-                    if (layerLatlngs.length >= 2) {
-                        const wayCoords = layerLatlngs.map(ll => {
-                            if (ll instanceof L.LatLng) {
-                                return { lat: ll.lat, lon: ll.lng };
-                            } else if (Array.isArray(ll)) {
-                                return { lat: ll[0] || ll.lat, lon: ll[1] || ll.lng };
-                            }
-                            return { lat: ll.lat || ll[0], lon: ll.lng || ll[1] };
-                        });
-                        
-                        const wayPoint = this.findNearestPointOnWay(latlng, wayCoords, mergeThreshold);
-                        if (wayPoint) {
-                            // This node is on a GPS trace way - restore merge info
-                            marker._mergedToWay = {
-                                isOsmWay: false,
-                                lat: wayPoint.lat,
-                                lon: wayPoint.lon,
-                                segmentIndex: wayPoint.segmentIndex,
-                                param: wayPoint.param
-                            };
-                            marker._mergedGpsWayLayer = gpsLayer;
-                            marker._isMerged = true;
-                            marker._isMergedToWay = true;
-                            
-                            // Update visual feedback (forest green for way)
-                            const icon = marker.getIcon();
-                            if (icon && icon.options) {
-                                icon.options.html = '<div class="vertex-handle" style="background: #228B22; border-color: #ffffff;"></div>';
-                                marker.setIcon(icon);
-                            }
-                        }
-                    }
-                }
-            });
-        }
-    }
-
-    // Helper: Update vertex markers for a layer
+    // Helper: Update vertex handles for a layer
+    // All handles share one canvas (see VertexHandleLayer), so this only re-projects the layer's vertices
     updateVertexMarkers(layer, latlngs) {
-        // Performance optimization: Use requestAnimationFrame for smooth updates
-        if (layer._updatingMarkers) {
-            return; // Already updating, skip to prevent duplicate updates
-        }
-        
-        layer._updatingMarkers = true;
-        
-        // Use requestAnimationFrame for smooth rendering
-        requestAnimationFrame(() => {
-            // Clear existing markers efficiently
-            if (layer._vertexMarkers) {
-                layer._vertexMarkers.forEach(marker => {
-                    // Remove all event listeners before removing from map
-                    marker.off();
-                    this.map.removeLayer(marker);
-                });
-            }
-            layer._vertexMarkers = [];
-            
-            // Add markers for each vertex
-            latlngs.forEach((latlng, index) => {
-            let lat, lng;
-            if (latlng instanceof L.LatLng) {
-                lat = latlng.lat;
-                lng = latlng.lng;
-            } else if (Array.isArray(latlng)) {
-                lat = latlng[0];
-                lng = latlng[1];
-            } else {
-                lat = latlng.lat || latlng[0];
-                lng = latlng.lng || latlng[1];
-            }
-            
-            // Determine marker state and styling
-            let markerClass = 'vertex-handle';
-            let markerColor = '#ff0000'; // Default red
-            let isNodeSelected = false;
-            let isSplittableNode = false;
-            
-            // Check if in split mode - show all nodes, highlight splittable ones
-            if (this.splitMode && layer._isGpsTrace) {
-                // Can split at middle nodes (not first or last)
-                if (index > 0 && index < latlngs.length - 1) {
-                    markerClass = 'vertex-handle split-candidate';
-                    markerColor = '#28a745'; // Green for splittable nodes
-                    isSplittableNode = true;
-                } else {
-                    markerClass = 'vertex-handle split-invalid';
-                    markerColor = '#999999'; // Gray for non-splittable nodes
-                }
-            }
-            
-            // Check if node is selected
-            if (this.nodeSelectionMode && !isSplittableNode) {
-                const isSelected = this.selectedNodes.some(n => 
-                    n.layer === layer && n.nodeIndex === index
-                );
-                if (isSelected) {
-                    markerClass = 'vertex-handle node-selected';
-                    markerColor = '#ff8800';
-                    isNodeSelected = true;
-                }
-            }
-            
-            // Check if marker is merged (for restoring state)
-            const existingMarker = layer._vertexMarkers && layer._vertexMarkers[index];
-            if (!isNodeSelected && existingMarker && existingMarker._isMerged) {
-                if (existingMarker._isMergedToWay) {
-                    markerClass = 'vertex-handle merged-way';
-                    markerColor = '#228B22'; // Forest green for way merge
-                } else {
-                    markerClass = 'vertex-handle merged';
-                    markerColor = '#00ff00'; // Green for node merge
-                }
-            }
-            
-            // Vertex marker with enhanced visuals - larger in split mode
-            const markerSize = this.splitMode && isSplittableNode ? 18 : 14;
-            const marker = L.marker([lat, lng], {
-                draggable: !this.splitMode, // Disable dragging in split mode
-                icon: L.divIcon({
-                    className: 'vertex-marker',
-                    html: `<div class="${markerClass}">${isSplittableNode ? '✂️' : ''}</div>`,
-                    iconSize: [markerSize, markerSize],
-                    iconAnchor: [markerSize / 2, markerSize / 2]
-                }),
-                zIndexOffset: 1100, // Higher than delete button (1000) to ensure marker is on top
-                interactive: true
-            }).addTo(this.map);
-            
-            // Add hover effect for split mode
-            if (this.splitMode && isSplittableNode) {
-                marker.on('mouseover', function() {
-                    if (this._icon) {
-                        const handle = this._icon.querySelector('.vertex-handle');
-                        if (handle) {
-                            handle.style.transform = 'scale(1.5)';
-                            handle.style.boxShadow = '0 4px 12px rgba(40, 167, 69, 0.8), 0 0 0 4px rgba(40, 167, 69, 0.4)';
-                        }
-                    }
-                });
-                
-                marker.on('mouseout', function() {
-                    if (this._icon) {
-                        const handle = this._icon.querySelector('.vertex-handle');
-                        if (handle) {
-                            handle.style.transform = '';
-                            handle.style.boxShadow = '';
-                        }
-                    }
-                });
-            }
-            
-            // Store reference to layer
-            marker._parentLayer = layer;
-            
-            // Don't check for merge on initial creation - only check when explicitly needed (undo/redo)
-            // Markers start as red (not merged) by default
-            
-            // No delete button needed - clicking the node itself will delete it
-            // Ensure marker dragging is enabled
-            marker.dragging.enable();
-            marker.setZIndexOffset(1100);
-            
-            // Track mouse state to distinguish between click (delete) and drag (move)
-            marker._mouseDownPos = null;
-            marker._hasMoved = false;
-            marker._clickTimeout = null;
-            marker._isDragging = false;
-            
-            // Handle mousedown - track initial position
-            marker.on('mousedown', (e) => {
-                // Disable map dragging when clicking on marker
-                this.map.dragging.disable();
-                // Store initial mouse position
-                marker._mouseDownPos = {
-                    x: e.originalEvent.clientX,
-                    y: e.originalEvent.clientY,
-                    latlng: e.latlng
-                };
-                marker._hasMoved = false;
-                marker._isDragging = false;
-                
-                // Set a timeout to detect click (if no drag happens)
-                marker._clickTimeout = setTimeout(() => {
-                    // If mouse hasn't moved significantly and drag hasn't started, treat as click
-                    if (!marker._hasMoved && !marker._isDragging) {
-                        // This will be handled by mouseup if it's still a click
-                    }
-                }, 50);
-            });
-            
-            // Handle mousemove on marker to detect if it's a drag
-            marker.on('mousemove', (e) => {
-                if (marker._mouseDownPos) {
-                    const dx = Math.abs(e.originalEvent.clientX - marker._mouseDownPos.x);
-                    const dy = Math.abs(e.originalEvent.clientY - marker._mouseDownPos.y);
-                    // If mouse moved more than 5 pixels, it's a drag
-                    if (dx > 5 || dy > 5) {
-                        marker._hasMoved = true;
-                        // Clear click timeout since this is a drag
-                        if (marker._clickTimeout) {
-                            clearTimeout(marker._clickTimeout);
-                            marker._clickTimeout = null;
-                        }
-                    }
-                }
-            });
-            
-            // Handle click (mouseup without significant movement) = DELETE or SPLIT or MERGE SELECTION
-            marker.on('click', (e) => {
-                // Only process if it wasn't a drag
-                if (!marker._hasMoved && !marker._isDragging) {
-                    e.originalEvent.stopPropagation();
-                    e.originalEvent.preventDefault();
-                    
-                    // Check if split mode is enabled
-                    if (this.splitMode && layer instanceof L.Polyline && layer._isGpsTrace) {
-                        // Check if this is a valid split point (not first or last node)
-                        if (index > 0 && index < latlngs.length - 1) {
-                            // Split way at this node
-                            this.splitWayAtNode(layer, index);
-                        } else {
-                            alert('Cannot split at the first or last node. Please select a middle node.');
-                        }
-                        return;
-                    }
-                    
-                    // Edit mode: delete node with visual feedback
-                    if (latlngs.length > 2) { // Keep at least 2 points
-                        // Visual feedback: flash red before deletion
-                        if (marker._icon) {
-                            const handle = marker._icon.querySelector('.vertex-handle');
-                            if (handle) {
-                                const originalBg = handle.style.background || '';
-                                handle.style.background = '#ff0000';
-                                handle.style.transform = 'scale(1.5)';
-                                
-                                setTimeout(() => {
-                        // Save state before deleting node
-                        this.saveStateToHistory();
-                        
-                                    // Smooth deletion: use requestAnimationFrame for seamless update
-                                    requestAnimationFrame(() => {
-                        latlngs.splice(index, 1);
-                        layer.setLatLngs(layer instanceof L.Polygon ? [latlngs] : latlngs);
-                        this.updateVertexMarkers(layer, latlngs);
-                                    });
-                                }, 150);
-                    } else {
-                                // Fallback if handle not found
-                                this.saveStateToHistory();
-                                latlngs.splice(index, 1);
-                                layer.setLatLngs(layer instanceof L.Polygon ? [latlngs] : latlngs);
-                                this.updateVertexMarkers(layer, latlngs);
-                            }
-                        } else {
-                            // Fallback if icon not found
-                            this.saveStateToHistory();
-                            latlngs.splice(index, 1);
-                            layer.setLatLngs(layer instanceof L.Polygon ? [latlngs] : latlngs);
-                            this.updateVertexMarkers(layer, latlngs);
-                        }
-                    } else {
-                        // Visual feedback: shake animation for invalid deletion
-                        if (marker._icon) {
-                            const handle = marker._icon.querySelector('.vertex-handle');
-                            if (handle) {
-                                handle.style.animation = 'shake 0.5s';
-                                setTimeout(() => {
-                                    handle.style.animation = '';
-                                }, 500);
-                            }
-                        }
-                        alert('Cannot delete node. A line must have at least 2 points.');
-                    }
-                }
-                
-                // Reset state
-                marker._mouseDownPos = null;
-                marker._hasMoved = false;
-                if (marker._clickTimeout) {
-                    clearTimeout(marker._clickTimeout);
-                    marker._clickTimeout = null;
-                }
-            });
-            
-            // Handle dragstart - this is a DRAG, not a click
-            marker.on('dragstart', (e) => {
-                // Mark as dragging
-                marker._isDragging = true;
-                marker._hasMoved = true;
-                
-                // Visual feedback: change marker appearance during drag
-                if (marker._icon) {
-                    const handle = marker._icon.querySelector('.vertex-handle');
-                    if (handle) {
-                        handle.classList.add('dragging');
-                    }
-                }
-                
-                // Visual feedback: highlight the way being edited
-                if (layer && layer.setStyle) {
-                    layer.setStyle({ 
-                        weight: 8, 
-                        opacity: 1.0,
-                        color: '#0052cc'
-                    });
-                }
-                
-                // Clear click timeout since this is a drag
-                if (marker._clickTimeout) {
-                    clearTimeout(marker._clickTimeout);
-                    marker._clickTimeout = null;
-                }
-                
-                // Ensure map dragging is disabled
-                this.map.dragging.disable();
-                // Stop propagation to prevent map events
-                L.DomEvent.stopPropagation(e);
-            });
-            
-            // Optimize drag handler with requestAnimationFrame for smooth performance
-            let dragRafId = null;
-            marker.on('drag', (e) => {
-                // Keep map dragging disabled during drag
-                this.map.dragging.disable();
-                // Stop propagation to prevent map from moving
-                L.DomEvent.stopPropagation(e);
-                
-                // Use requestAnimationFrame to batch updates for smooth performance
-                if (dragRafId) {
-                    cancelAnimationFrame(dragRafId);
-                }
-                
-                dragRafId = requestAnimationFrame(() => {
-                    // Simple, smooth node dragging - no merging logic
-                    let newLatlng = e.target.getLatLng();
-                    
-                    // Update node position smoothly
-                    if (latlngs[index] instanceof L.LatLng) {
-                        latlngs[index].lat = newLatlng.lat;
-                        latlngs[index].lng = newLatlng.lng;
-                    } else {
-                        latlngs[index] = newLatlng;
-                    }
-                    layer.setLatLngs(layer instanceof L.Polygon ? [latlngs] : latlngs);
-                    dragRafId = null;
-                });
-            });
-            
-            marker.on('dragend', (e) => {
-                // Smooth transition: use requestAnimationFrame for seamless state restoration
-                requestAnimationFrame(() => {
-                    // Smoothly remove dragging visual state
-                    if (marker._icon) {
-                        const handle = marker._icon.querySelector('.vertex-handle');
-                        if (handle) {
-                            handle.classList.remove('dragging');
-                            // Smooth transition back to normal size
-                            handle.style.transition = 'transform 0.15s ease-out, box-shadow 0.15s ease-out';
-                            setTimeout(() => {
-                                handle.style.transition = '';
-                            }, 150);
-                        }
-                    }
-                    
-                    // Smoothly restore way styling after drag
-                    if (layer && layer.setStyle) {
-                        if (this.selectedWayLayer === layer) {
-                            layer.setStyle({ 
-                                weight: 6, 
-                                opacity: 0.9,
-                                color: '#0066ff',
-                                dashArray: '5, 5'
-                            });
-                        } else {
-                            layer.setStyle({ 
-                                weight: 4, 
-                                opacity: 0.8,
-                                color: '#0066ff'
-                            });
-                        }
-                    }
-                    
-                // Mark that dragging has ended
-                marker._isDragging = false;
-                marker._mouseDownPos = null;
-                marker._hasMoved = false;
-                
-                    // Update geometry smoothly
-                    const latlngs = this.flattenLatLngs(layer.getLatLngs());
-                    latlngs[index] = e.target.getLatLng();
-                    layer.setLatLngs(layer instanceof L.Polygon ? [latlngs] : latlngs);
-                    
-                    // Update vertex markers smoothly (only if in edit mode)
-                    if (this.previewEditMode) {
-                        this.updateVertexMarkers(layer, latlngs);
-                    }
-                    
-                    // Save state after node drag completes (debounced for smooth performance)
-                this.saveStateToHistory();
-                });
-                
-                // Stop propagation
-                L.DomEvent.stopPropagation(e);
-                // Map dragging stays disabled in edit mode (we'll re-enable when exiting edit mode)
-            });
-            
-            // Handle mouseup to clean up state
-            marker.on('mouseup', (e) => {
-                // Reset state
-                if (marker._clickTimeout) {
-                    clearTimeout(marker._clickTimeout);
-                    marker._clickTimeout = null;
-                }
-                marker._mouseDownPos = null;
-            });
-            
-            layer._vertexMarkers.push(marker);
-            });
-            
-            // Mark update as complete
-            layer._updatingMarkers = false;
-        });
+        if (!this.vertexHandles) return;
+        this.vertexHandles.update(layer, latlngs);
     }
 
-    // Helper: Find nearest point on a way segment (for way merging)
-    findNearestPointOnWay(latlng, wayCoordinates, threshold = 0.00002) {
-        if (!wayCoordinates || wayCoordinates.length < 2) {
-            return null;
-        }
+    // Look of one vertex handle: { color, radius, glyph, draggable }
+    vertexHandleStyle(layer, index, count) {
+        const style = { color: '#ff0000', radius: VertexHandleLayer.RADIUS, glyph: null, draggable: !this.splitMode };
         
-        const lat = latlng instanceof L.LatLng ? latlng.lat : latlng[0] || latlng.lat;
-        const lon = latlng instanceof L.LatLng ? latlng.lng : latlng[1] || latlng.lng;
-        
-        let nearestPoint = null;
-        let minDistance = Infinity;
-        
-        // Check each segment of the way
-        for (let i = 0; i < wayCoordinates.length - 1; i++) {
-            const segStart = wayCoordinates[i];
-            const segEnd = wayCoordinates[i + 1];
-            
-            const segStartLat = segStart.lat || segStart[0];
-            const segStartLon = segStart.lon || segStart[1];
-            const segEndLat = segEnd.lat || segEnd[0];
-            const segEndLon = segEnd.lon || segEnd[1];
-            
-            // Calculate closest point on line segment
-            const A = lat - segStartLat;
-            const B = lon - segStartLon;
-            const C = segEndLat - segStartLat;
-            const D = segEndLon - segStartLon;
-            
-            const dot = A * C + B * D;
-            const lenSq = C * C + D * D;
-            let param = 0;
-            
-            if (lenSq !== 0) {
-                param = Math.max(0, Math.min(1, dot / lenSq));
-            }
-            
-            // Closest point on the segment
-            const closestLat = segStartLat + param * C;
-            const closestLon = segStartLon + param * D;
-            
-            // Calculate distance
-            const dx = closestLon - lon;
-            const dy = closestLat - lat;
-            const distance = Math.sqrt(dx * dx + dy * dy);
-            
-            if (distance < minDistance && distance <= threshold) {
-                minDistance = distance;
-                nearestPoint = {
-                    lat: closestLat,
-                    lon: closestLon,
-                    distance: distance,
-                    segmentIndex: i,
-                    param: param // Position along segment (0 = start, 1 = end)
-                };
+        // Split mode - show all nodes, highlight splittable ones (larger, with scissors)
+        if (this.splitMode && layer._isGpsTrace) {
+            if (index > 0 && index < count - 1) {
+                return { ...style, color: '#28a745', radius: 9, glyph: '✂️' };
             }
+            return { ...style, color: '#999999' };
         }
         
-        return nearestPoint;
+        if (this.nodeSelectionMode && this.selectedNodes.some(n => n.layer === layer && n.nodeIndex === index)) {
+            return { ...style, color: '#ff8800' };
+        }
+        return style;
     }
 
-    // Helper: Find nearest node or way point (for merging)
-    // Prioritizes ways over nodes (user preference)
-    findNearestNodeFromAllLayers(latlng, currentLayer, currentIndex, threshold = 0.00002) {
-        let nearestTarget = null;
-        let minDistance = Infinity;
-        
-        const lat = latlng instanceof L.LatLng ? latlng.lat : latlng[0] || latlng.lat;
-        const lon = latlng instanceof L.LatLng ? latlng.lng : latlng[1] || latlng.lng;
+    // Click on a vertex handle = SPLIT, NODE SELECTION or DELETE
+    handleVertexClick(layer, index) {
+        const latlngs = this.flattenLatLngs(layer.getLatLngs());
         
-        // FIRST: Check ways (prioritize ways over nodes)
-        // Check GPS trace ways (editable layers)
-        if (this.editableLayers && this.editableLayers.length > 0) {
-            this.editableLayers.forEach((layer) => {
-                if ((layer instanceof L.Polyline || layer instanceof L.Polygon) && 
-                    layer !== currentLayer) { // Don't check the layer being edited
-                    const layerLatlngs = this.flattenLatLngs(layer.getLatLngs());
-                    
-                    if (layerLatlngs.length >= 2) {
-                        // Convert to way coordinates format
-                        const wayCoords = layerLatlngs.map(ll => {
-                            if (ll instanceof L.LatLng) {
-                                return { lat: ll.lat, lon: ll.lng };
-                            } else if (Array.isArray(ll)) {
-                                return { lat: ll[0] || ll.lat, lon: ll[1] || ll.lng };
-                            }
-                            return { lat: ll.lat || ll[0], lon: ll.lng || ll[1] };
-                        });
-                        
-                        const wayPoint = this.findNearestPointOnWay(latlng, wayCoords, threshold);
-                        if (wayPoint && wayPoint.distance < minDistance) {
-                            minDistance = wayPoint.distance;
-                            nearestTarget = {
-                                lat: wayPoint.lat,
-                                lon: wayPoint.lon,
-                                distance: wayPoint.distance,
-                                isWay: true,
-                                isOsmWay: false, // GPS trace way
-                                layer: layer,
-                                segmentIndex: wayPoint.segmentIndex,
-                                param: wayPoint.param
-                            };
-                        }
-                    }
-                }
-            });
+        // Check if split mode is enabled
+        if (this.splitMode && layer instanceof L.Polyline && layer._isGpsTrace) {
+            // Check if this is a valid split point (not first or last node)
+            if (index > 0 && index < latlngs.length - 1) {
+                this.splitWayAtNode(layer, index);
+            } else {
+                alert('Cannot split at the first or last node. Please select a middle node.');
+            }
+            return;
         }
         
-        // Check OSM ways (read-only background data)
-        if (this.osmWays && this.osmWays.length > 0) {
-            this.osmWays.forEach((way) => {
-                if (way.coordinates && way.coordinates.length >= 2) {
-                    const wayPoint = this.findNearestPointOnWay(latlng, way.coordinates, threshold);
-                    if (wayPoint && wayPoint.distance < minDistance) {
-                        minDistance = wayPoint.distance;
-                        nearestTarget = {
-                            lat: wayPoint.lat,
-                            lon: wayPoint.lon,
-                            distance: wayPoint.distance,
-                            isWay: true,
-                            isOsmWay: true, // OSM way
-                            osmWayId: way.id,
-                            osmWayTags: way.tags,
-                            segmentIndex: wayPoint.segmentIndex,
-                            param: wayPoint.param
-                        };
-                    }
-                }
-            });
+        if (this.nodeSelectionMode) {
+            this.toggleNodeSelection(layer, index);
+            return;
         }
         
-        // SECOND: Check nodes (only if no way was found, or if node is closer)
-        let nearestNode = null;
-        let minNodeDistance = Infinity;
-        
-        // Check all editable layers (GPS trace nodes)
-        if (this.editableLayers && this.editableLayers.length > 0) {
-            this.editableLayers.forEach((layer) => {
-                if (layer instanceof L.Polyline || layer instanceof L.Polygon) {
-                    const layerLatlngs = this.flattenLatLngs(layer.getLatLngs());
-                    
-                    layerLatlngs.forEach((nodeLatlng, nodeIndex) => {
-                        // Skip the current node being dragged
-                        if (layer === currentLayer && nodeIndex === currentIndex) {
-                            return;
-                        }
-                        
-                        let nodeLat, nodeLon;
-                        if (nodeLatlng instanceof L.LatLng) {
-                            nodeLat = nodeLatlng.lat;
-                            nodeLon = nodeLatlng.lng;
-                        } else if (Array.isArray(nodeLatlng)) {
-                            nodeLat = nodeLatlng[0] || nodeLatlng.lat;
-                            nodeLon = nodeLatlng[1] || nodeLatlng.lng;
-                        } else {
-                            nodeLat = nodeLatlng.lat || nodeLatlng[0];
-                            nodeLon = nodeLatlng.lng || nodeLatlng[1];
-                        }
-                        
-                        const dx = nodeLon - lon;
-                        const dy = nodeLat - lat;
-                        const distance = Math.sqrt(dx * dx + dy * dy);
-                        
-                        if (distance < minNodeDistance && distance <= threshold) {
-                            minNodeDistance = distance;
-                            nearestNode = { 
-                                lat: nodeLat, 
-                                lon: nodeLon, 
-                                layer: layer,
-                                index: nodeIndex,
-                                distance: distance,
-                                isOsmNode: false // GPS trace node
-                            };
-                        }
-                    });
-                }
+        // Edit mode: delete node with visual feedback
+        if (latlngs.length > 2) { // Keep at least 2 points
+            // Visual feedback: flash red before deletion
+            this.vertexHandles.flash(layer, index, '#ff0000', 150, () => {
+                // Save state before deleting node
+                this.saveStateToHistory();
+                
+                const current = this.flattenLatLngs(layer.getLatLngs());
+                if (index >= current.length || current.length <= 2) return;
+                current.splice(index, 1);
+                layer.setLatLngs(layer instanceof L.Polygon ? [current] : current);
+                this.updateVertexMarkers(layer, current);
             });
+        } else {
+            this.vertexHandles.flash(layer, index, '#999999', 500);
+            alert('Cannot delete node. A line must have at least 2 points.');
         }
-        
-        // Also check OSM nodes (read-only background data)
-        if (this.osmNodes && this.osmNodes.size > 0) {
-            this.osmNodes.forEach((node, nodeId) => {
-                const dx = node.lon - lon;
-                const dy = node.lat - lat;
-                const distance = Math.sqrt(dx * dx + dy * dy);
-                
-                if (distance < minNodeDistance && distance <= threshold) {
-                    minNodeDistance = distance;
-                    nearestNode = { 
-                        lat: node.lat, 
-                        lon: node.lon, 
-                        osmNodeId: nodeId, // Store OSM node ID
-                        distance: distance,
-                        isOsmNode: true // OSM node
-                    };
-                }
+    }
+
+    handleVertexDragStart(layer) {
+        // Visual feedback: highlight the way being edited
+        if (layer && layer.setStyle) {
+            layer.setStyle({ 
+                weight: 8, 
+                opacity: 1.0,
+                color: '#0052cc'
             });
         }
-        
-        // Prefer way over node (user preference: prefer to merge to way)
-        // But if node is significantly closer, use node instead
-        if (nearestTarget && nearestNode) {
-            // If way is found and node is not much closer (within 20% of way distance), prefer way
-            if (nearestNode.distance < nearestTarget.distance * 0.8) {
-                // Node is significantly closer, use node
-                return nearestNode;
+    }
+
+    handleVertexDragEnd(layer, index, latlng) {
+        // Restore way styling after drag
+        if (layer && layer.setStyle) {
+            if (this.selectedWayLayer === layer) {
+                layer.setStyle({ 
+                    weight: 6, 
+                    opacity: 0.9,
+                    color: '#0066ff',
+                    dashArray: '5, 5'
+                });
             } else {
-                // Prefer way (as requested)
-                return nearestTarget;
+                layer.setStyle({ 
+                    weight: 4, 
+                    opacity: 0.8,
+                    color: '#0066ff'
+                });
             }
         }
         
-        // Return whichever was found
-        return nearestTarget || nearestNode;
-    }
-    
-    // Helper: Find nearest OSM node for snapping (kept for potential future use)
-    findNearestOsmNode(latlng, threshold = null) {
-        if (!this.osmNodes || this.osmNodes.size === 0) {
-            return null;
+        // Update geometry - in place, so ways sharing this LatLng move with it
+        const latlngs = this.flattenLatLngs(layer.getLatLngs());
+        if (index >= latlngs.length) return;
+        if (latlngs[index] instanceof L.LatLng) {
+            latlngs[index].lat = latlng.lat;
+            latlngs[index].lng = latlng.lng;
+        } else {
+            latlngs[index] = latlng;
         }
+        layer.setLatLngs(layer instanceof L.Polygon ? [latlngs] : latlngs);
+        this.updateVertexMarkers(layer, latlngs);
         
-        const thresholdDist = threshold || this.snapThreshold;
-        let nearestNode = null;
-        let minDistance = Infinity;
-        
-        const lat = latlng instanceof L.LatLng ? latlng.lat : latlng[0] || latlng.lat;
-        const lon = latlng instanceof L.LatLng ? latlng.lng : latlng[1] || latlng.lng;
-        
-        this.osmNodes.forEach((node, nodeId) => {
-            const dx = node.lon - lon;
-            const dy = node.lat - lat;
-            const distance = Math.sqrt(dx * dx + dy * dy);
-            
-            if (distance < minDistance && distance <= thresholdDist) {
-                minDistance = distance;
-                nearestNode = { lat: node.lat, lon: node.lon, id: nodeId, distance: distance };
-            }
-        });
-        
-        return nearestNode;
+        // Save state after node drag completes (debounced)
+        this.saveStateToHistory();
     }
-    
+
     // Helper: Calculate distance between two lat/lng points
     // Supports both formats: calculateDistance(lat1, lon1, lat2, lon2) or calculateDistance(latlng1, latlng2)
     calculateDistance(lat1OrLatlng1, lon1OrLatlng2, lat2, lon2) {
@@ -4379,7 +3107,7 @@ class TaskManager {
         }
         
         // Save to storage
-        this.saveToStorage();
+        this.saveToStorage([this.currentPreviewSequence]);
         
         // Update original for revert
         this.originalPreviewFeatures = JSON.parse(JSON.stringify(editedFeatures));
@@ -4419,6 +3147,9 @@ class TaskManager {
             this.toggleNodeSelectionMode();
         }
         this.clearNodeSelection();
+        if (this.vertexHandles) {
+            this.vertexHandles.clear();
+        }
         
         // Autosave edits when closing preview
         if (this.editableLayers && this.editableLayers.length > 0) {
@@ -4428,6 +3159,8 @@ class TaskManager {
         // Clear undo/redo history when closing preview
         this.editHistory = [];
         this.currentHistoryIndex = -1;
+        this.historyBase = new Map();
+        this.historyLayers = [];
         
         const modal = document.getElementById('previewModal');
         modal.style.display = 'none';
@@ -4600,7 +3333,7 @@ class TaskManager {
         this.syncEditsToSequence();
         
         // Save to storage
-        this.saveToStorage();
+        this.saveToStorage([this.currentPreviewSequence]);
         
         // If in tag workflow step, check if all ways are tagged
         if (this.workflowStep === 'tag') {
@@ -4707,17 +3440,7 @@ class TaskManager {
             
             // Hide vertex markers if not in edit mode
             if (!this.previewEditMode) {
-                this.editableLayers.forEach(layer => {
-                    if (layer._vertexMarkers) {
-                        layer._vertexMarkers.forEach(marker => {
-                            if (this.map && marker) {
-                                marker.off();
-                                this.map.removeLayer(marker);
-                            }
-                        });
-                        layer._vertexMarkers = [];
-                    }
-                });
+                this.editableLayers.forEach(layer => this.vertexHandles.remove(layer));
             }
             
             // Remove workflow complete button if exists
@@ -4728,30 +3451,14 @@ class TaskManager {
     updateVertexMarkersForSelectedWay() {
         if (!this.selectedWayLayer || !(this.selectedWayLayer instanceof L.Polyline)) return;
         
-        // Clear existing markers first
-        if (this.selectedWayLayer._vertexMarkers) {
-            this.selectedWayLayer._vertexMarkers.forEach(marker => {
-                if (this.map && marker) {
-                    marker.off(); // Remove event listeners
-                    this.map.removeLayer(marker);
-                }
-            });
-            this.selectedWayLayer._vertexMarkers = [];
-        }
-        
         const latlngs = this.flattenLatLngs(this.selectedWayLayer.getLatLngs());
         this.updateVertexMarkers(this.selectedWayLayer, latlngs);
     }
     
     hideVertexMarkersForSelectedWay() {
-        if (!this.selectedWayLayer || !this.selectedWayLayer._vertexMarkers) return;
+        if (!this.selectedWayLayer || !this.vertexHandles) return;
         
-        this.selectedWayLayer._vertexMarkers.forEach(marker => {
-            if (this.map && marker) {
-                this.map.removeLayer(marker);
-            }
-        });
-        this.selectedWayLayer._vertexMarkers = [];
+        this.vertexHandles.remove(this.selectedWayLayer);
     }
     
     splitWayAtNode(layer, nodeIndex) {
@@ -4822,7 +3529,7 @@ class TaskManager {
         segment2Layer.on('click', (e) => {
             // Allow way selection in tag step, or if not in preview step and not in edit mode
             if ((this.workflowStep === 'tag') || (this.workflowStep !== 'preview' && !this.previewEditMode)) {
-                if (!e.originalEvent.target.closest('.vertex-marker')) {
+                if (!this.vertexHandles.hitTest(e.containerPoint)) {
                     this.selectWay(segment2Layer);
                     e.originalEvent.stopPropagation();
                 }
@@ -4937,7 +3644,7 @@ class TaskManager {
         this.updateNodeSelectionUI();
     }
 
-    toggleNodeSelection(layer, nodeIndex, marker) {
+    toggleNodeSelection(layer, nodeIndex) {
         const latlngs = this.flattenLatLngs(layer.getLatLngs());
         const latlng = latlngs[nodeIndex];
         
@@ -4949,7 +3656,6 @@ class TaskManager {
         if (existingIndex >= 0) {
             // Deselect node
             this.selectedNodes.splice(existingIndex, 1);
-            this.updateNodeMarkerStyle(marker, false);
         } else {
             // Select node
             this.selectedNodes.push({
@@ -4957,44 +3663,15 @@ class TaskManager {
                 nodeIndex: nodeIndex,
                 latlng: latlng instanceof L.LatLng ? latlng : L.latLng(latlng.lat || latlng[0], latlng.lng || latlng[1])
             });
-            this.updateNodeMarkerStyle(marker, true);
         }
         
+        this.vertexHandles.redraw();
         this.updateNodeSelectionUI();
     }
 
-    updateNodeMarkerStyle(marker, isSelected) {
-        if (!marker || !marker._icon) return;
-        
-        const handle = marker._icon.querySelector('.vertex-handle');
-        if (handle) {
-            if (isSelected) {
-                handle.classList.add('node-selected');
-                handle.style.background = '#ff8800';
-                handle.style.borderColor = '#ffffff';
-                handle.style.boxShadow = '0 2px 8px rgba(255, 136, 0, 0.6), 0 0 0 3px rgba(255, 136, 0, 0.3)';
-                handle.style.transform = 'scale(1.4)';
-            } else {
-                handle.classList.remove('node-selected');
-                handle.style.background = '';
-                handle.style.borderColor = '';
-                handle.style.boxShadow = '';
-                handle.style.transform = '';
-            }
-        }
-    }
-
     clearNodeSelection() {
-        // Update all markers to remove selection styling
-        this.selectedNodes.forEach(node => {
-            const layer = node.layer;
-            if (layer && layer._vertexMarkers && layer._vertexMarkers[node.nodeIndex]) {
-                const marker = layer._vertexMarkers[node.nodeIndex];
-                this.updateNodeMarkerStyle(marker, false);
-            }
-        });
-        
         this.selectedNodes = [];
+        if (this.vertexHandles) this.vertexHandles.redraw();
         this.updateNodeSelectionUI();
     }
 
@@ -5071,7 +3748,7 @@ class TaskManager {
         
         // Add click and hover handlers (disabled in preview step)
         newLayer.on('click', (e) => {
-            if (this.workflowStep !== 'preview' && !this.previewEditMode && !e.originalEvent.target.closest('.vertex-marker')) {
+            if (this.workflowStep !== 'preview' && !this.previewEditMode && !this.vertexHandles.hitTest(e.containerPoint)) {
                 this.selectWay(newLayer);
                 e.originalEvent.stopPropagation();
             }
@@ -5110,7 +3787,7 @@ class TaskManager {
         // Save state
         this.saveStateToHistory();
         this.syncEditsToSequence();
-        this.saveToStorage();
+        this.saveToStorage([this.currentPreviewSequence]);
         
         // Clear selection
         this.clearNodeSelection();
@@ -5475,7 +4152,7 @@ class TaskManager {
             }
             
             // Save to storage
-            this.saveToStorage();
+            this.saveToStorage([this.currentPreviewSequence]);
         }
     }
 
@@ -5508,27 +4185,17 @@ class TaskManager {
         }
     }
 
-    async saveToStorage() {
-        try {
-            // Save id and status to IndexedDB
-            const taskData = {
-                sequences: this.sequences.map(seq => ({
-                    id: seq.id,
-                    status: seq.status
-                })),
-                currentIndex: this.currentIndex,
-                currentView: this.currentView
-            };
-            
-            await storageManager.saveTaskData(taskData);
-            
-            // Also save geojsonData to IndexedDB for full functionality
-            if (this.geojsonData) {
-                await storageManager.saveGeoJSONData(this.geojsonData);
-            }
-        } catch (error) {
+    saveToStorage(sequences = this.sequences, { features = true } = {}) {
+        // Queue the changed sequences (all by default) plus the current position; StorageManager
+        // writes them in one batch after a short debounce. features: false for status-only changes.
+        storageManager.queueSequences(sequences, { features: features });
+        storageManager.queueTaskData({
+            currentIndex: this.currentIndex,
+            currentView: this.currentView
+        });
+        return storageManager.scheduleFlush().catch(error => {
             console.error('Error saving to storage:', error);
-        }
+        });
     }
 
     exportAllToCSV() {
@@ -5636,96 +4303,42 @@ class TaskManager {
 
     async loadFromStorage() {
         try {
-            // Load task data from IndexedDB
+            // Load task data and the per-sequence records from IndexedDB
             const taskData = await storageManager.loadTaskData();
-            if (!taskData) return;
-
-            // Load geojsonData from IndexedDB
-            this.geojsonData = await storageManager.loadGeoJSONData();
+            const storedSequences = await storageManager.loadSequences();
+            if (!taskData && storedSequences.length === 0) return;
 
-            if (taskData.sequences && Array.isArray(taskData.sequences)) {
-                // Restore only id and status from storage
-                // If geojsonData exists, recalculate stats from features
-                if (this.geojsonData && this.geojsonData.features) {
-                    // Recalculate stats from geojsonData
-                    const sequenceMap = new Map();
-                    
-                    this.geojsonData.features.forEach((feature) => {
-                        const sequenceId = String(
-                            feature.properties?.sequence_id || 
-                            feature.properties?.sequenceId || 
-                            feature.properties?.sequence || 
-                            feature.properties?.id ||
-                            feature.properties?.seq ||
-                            `sequence_${feature.properties?.id || Math.random().toString(36).substr(2, 9)}`
-                        );
-
-                        if (!sequenceMap.has(sequenceId)) {
-                            sequenceMap.set(sequenceId, {
-                                id: sequenceId,
-                                features: []
-                            });
-                        }
-
-                        sequenceMap.get(sequenceId).features.push(feature);
-                    });
-
-                    // Restore status from saved data and calculate stats
-                    const savedStatusMap = new Map();
-                    taskData.sequences.forEach(seq => {
-                        savedStatusMap.set(String(seq.id), seq.status);
-                    });
+            this.sequences = storedSequences;
 
-                    this.sequences = Array.from(sequenceMap.values()).map(seq => {
-                        const stats = this.calculateStats(seq.features);
-                        return {
-                            ...seq,
-                            status: savedStatusMap.get(String(seq.id)) || '',
-                            featureCount: stats.features,
-                            nodeCount: stats.nodes,
-                            wayCount: stats.ways,
-                            date: new Date().toLocaleDateString()
-                        };
-                    });
+            // Sort by sequence ID
+            this.sequences.sort((a, b) => {
+                const aNum = parseInt(a.id);
+                const bNum = parseInt(b.id);
+                if (!isNaN(aNum) && !isNaN(bNum)) {
+                    return aNum - bNum;
+                }
+                return a.id.localeCompare(b.id);
+            });
+            this.geojsonData = {
+                type: 'FeatureCollection',
+                features: this.sequences.flatMap(seq => seq.features)
+            };
 
-                    // Sort by sequence ID
-                    this.sequences.sort((a, b) => {
-                        const aNum = parseInt(a.id);
-                        const bNum = parseInt(b.id);
-                        if (!isNaN(aNum) && !isNaN(bNum)) {
-                            return aNum - bNum;
-                        }
-                        return a.id.localeCompare(b.id);
-                    });
+            this.currentIndex = taskData?.currentIndex || 0;
+            this.currentView = taskData?.currentView || 'all';
+            
+            // Update tab buttons to reflect current view
+            document.querySelectorAll('.tab-btn').forEach(btn => {
+                if (btn.dataset.view === this.currentView) {
+                    btn.classList.add('active');
                 } else {
-                    // No geojsonData available, just restore basic structure
-                    this.sequences = taskData.sequences.map(seq => ({
-                        id: seq.id,
-                        status: seq.status || '',
-                        features: [],
-                        featureCount: 0,
-                        nodeCount: 0,
-                        wayCount: 0,
-                        date: new Date().toLocaleDateString()
-                    }));
-                }
-                
-                this.currentIndex = taskData.currentIndex || 0;
-                this.currentView = taskData.currentView || 'all';
-                
-                // Update tab buttons to reflect current view
-                document.querySelectorAll('.tab-btn').forEach(btn => {
-                    if (btn.dataset.view === this.currentView) {
-                        btn.classList.add('active');
-                    } else {
-                        btn.classList.remove('active');
-                    }
-                });
-                
-                if (this.sequences.length > 0) {
-                    this.renderCurrentTask();
-                    this.updateSummary();
+                    btn.classList.remove('active');
                 }
+            });
+            
+            if (this.sequences.length > 0) {
+                this.renderCurrentTask();
+                this.updateSummary();
             }
         } catch (error) {
             console.error('Error loading from storage:', error);
@@ -6211,7 +4824,7 @@ class TaskManager {
             }
         });
         
-        this.saveToStorage();
+        this.saveToStorage([this.currentPreviewSequence]);
     }
     
     rotateFeatures(layers, centerLatLng, angleDegrees) {
@@ -6348,7 +4961,7 @@ class TaskManager {
         }
         
         this.updateOnewayArrows();
-        this.saveToStorage();
+        this.saveToStorage([this.currentPreviewSequence]);
     }
     
     createCustomTagPreset(name, tags) {
@@ -6403,7 +5016,7 @@ class TaskManager {
         });
         
         this.updateOnewayArrows();
-        this.saveToStorage();
+        this.saveToStorage([this.currentPreviewSequence]);
     }
     
     // ============================================
@@ -6611,7 +5224,7 @@ class TaskManager {
         });
         
         this.clearSelection();
-        this.saveToStorage();
+        this.saveToStorage([this.currentPreviewSequence]);
     }
     
     showContextMenu(e, layer) {
@@ -7051,7 +5664,7 @@ class TaskManager {
             this.updateVertexMarkers(newLayer, offsetLatlngs);
         }
         
-        this.saveToStorage();
+        this.saveToStorage([this.currentPreviewSequence]);
         return newLayer;
     }
 
@@ -7264,7 +5877,7 @@ class TaskManager {
                     layer.off('click');
                     // Add click handler that works in tag step
                     layer.on('click', (e) => {
-                        if (this.workflowStep === 'tag' && !e.originalEvent.target.closest('.vertex-marker')) {
+                        if (this.workflowStep === 'tag' && !this.vertexHandles.hitTest(e.containerPoint)) {
                             const addToSelection = this.multiSelectMode && (e.originalEvent.ctrlKey || e.originalEvent.metaKey);
                             this.selectWay(layer, addToSelection);
                             e.originalEvent.stopPropagation();
@@ -7343,6 +5956,890 @@ class TaskManager {
 
 }
 
+// One-pass parser for Overpass XML. Tags are tokenized straight from the text (no DOM),
+// chunk by chunk as the response downloads. Node coordinates go into typed arrays and
+// ways keep their node refs until the document is complete.
+class OsmXmlStreamParser {
+    constructor() {
+        this.buffer = '';
+        this.nodeIndex = new Map(); // node id -> slot in lats/lons
+        this.lats = new Float64Array(4096);
+        this.lons = new Float64Array(4096);
+        this.nodeCount = 0;
+        this.ways = []; // { id, refs, tags } in document order
+        this.currentWay = null;
+    }
+
+    push(chunk) {
+        // Everything before the last '<' is complete tags; the rest waits for the next chunk
+        const text = this.buffer + chunk;
+        const cut = text.lastIndexOf('<');
+        if (cut < 0) {
+            this.buffer = '';
+            return;
+        }
+        this.scan(text.slice(0, cut));
+        this.buffer = text.slice(cut);
+    }
+
+    scan(text) {
+        const tagPattern = /<!--[\s\S]*?-->|<(\/?)([A-Za-z_][\w:.-]*)([^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*)>/g;
+        let match;
+        while ((match = tagPattern.exec(text)) !== null) {
+            const name = match[2];
+            if (!name) continue; // Comment
+            if (match[1]) {
+                if (name === 'way') this.currentWay = null;
+                continue;
+            }
+            
+            const rest = match[3];
+            switch (name) {
+                case 'node': {
+                    // Overpass writes id, lat, lon first; anything else takes the general path
+                    const fast = OsmXmlStreamParser.NODE_ATTRIBUTES.exec(rest);
+                    const attrs = fast ? { id: fast[1], lat: fast[2], lon: fast[3] } : OsmXmlStreamParser.attributes(rest);
+                    this.currentWay = null;
+                    this.addNode(attrs.id, parseFloat(attrs.lat), parseFloat(attrs.lon));
+                    break;
+                }
+                case 'way': {
+                    const attrs = OsmXmlStreamParser.attributes(rest);
+                    const way = attrs.id ? { id: attrs.id, refs: [], tags: {} } : null;
+                    if (way) this.ways.push(way);
+                    this.currentWay = rest.endsWith('/') ? null : way;
+                    break;
+                }
+                case 'nd':
+                    if (this.currentWay) {
+                        const fast = OsmXmlStreamParser.ND_ATTRIBUTES.exec(rest);
+                        const ref = fast ? fast[1] : OsmXmlStreamParser.attributes(rest).ref;
+                        if (ref) this.currentWay.refs.push(ref);
+                    }
+                    break;
+                case 'tag':
+                    // Node and relation tags are not needed for the preview
+                    if (this.currentWay) {
+                        const fast = OsmXmlStreamParser.TAG_ATTRIBUTES.exec(rest);
+                        const attrs = fast
+                            ? { k: OsmXmlStreamParser.decodeAttribute(fast[1]), v: OsmXmlStreamParser.decodeAttribute(fast[2]) }
+                            : OsmXmlStreamParser.attributes(rest);
+                        if (attrs.k && attrs.v) this.currentWay.tags[attrs.k] = attrs.v;
+                    }
+                    break;
+                case 'relation':
+                    this.currentWay = null;
+                    break;
+            }
+        }
+    }
+
+    addNode(id, lat, lon) {
+        // Skip invalid nodes
+        if (isNaN(lat) || isNaN(lon) || !id) {
+            console.warn(`Skipping invalid node: ${id}`);
+            return;
+        }
+        let slot = this.nodeIndex.get(id);
+        if (slot === undefined) {
+            slot = this.nodeCount++;
+            if (slot === this.lats.length) {
+                const lats = new Float64Array(slot * 2);
+                const lons = new Float64Array(slot * 2);
+                lats.set(this.lats);
+                lons.set(this.lons);
+                this.lats = lats;
+                this.lons = lons;
+            }
+            this.nodeIndex.set(id, slot);
+        }
+        this.lats[slot] = lat;
+        this.lons[slot] = lon;
+    }
+
+    finish() {
+        // OsmContext of the document: every valid node, and highway ways with at least two known nodes
+        this.scan(this.buffer);
+        this.buffer = '';
+        
+        const nodeCount = this.nodeCount;
+        const nodeIds = new Float64Array(nodeCount);
+        this.nodeIndex.forEach((slot, id) => {
+            nodeIds[slot] = Number(id);
+        });
+        
+        const strings = [];
+        const stringIds = new Map();
+        const intern = (text) => {
+            let index = stringIds.get(text);
+            if (index === undefined) {
+                index = strings.length;
+                strings.push(text);
+                stringIds.set(text, index);
+            }
+            return index;
+        };
+        
+        const wayIds = [];
+        const wayNodeOffsets = [0];
+        const wayNodes = [];
+        const wayTagOffsets = [0];
+        const tagKeys = [];
+        const tagValues = [];
+        const wayHighway = [];
+        let missingRefs = 0;
+        this.ways.forEach(way => {
+            const start = wayNodes.length;
+            way.refs.forEach(ref => {
+                const slot = this.nodeIndex.get(ref);
+                if (slot === undefined) {
+                    missingRefs++;
+                } else {
+                    wayNodes.push(slot);
+                }
+            });
+            
+            // Skip ways with less than 2 valid node references
+            const count = wayNodes.length - start;
+            if (count < 2) {
+                console.warn(`Skipping way ${way.id}: insufficient nodes (${count})`);
+            }
+            // Only include ways with highway tag (roads)
+            if (count < 2 || !way.tags.highway) {
+                wayNodes.length = start;
+                return;
+            }
+            
+            wayIds.push(Number(way.id));
+            wayNodeOffsets.push(wayNodes.length);
+            Object.entries(way.tags).forEach(([key, value]) => {
+                tagKeys.push(intern(key));
+                tagValues.push(intern(value));
+            });
+            wayTagOffsets.push(tagKeys.length);
+            wayHighway.push(intern(way.tags.highway));
+        });
+        
+        if (missingRefs > 0) {
+            console.warn(`${missingRefs} way node references point to nodes missing from the response`);
+        }
+        const context = new OsmContext({
+            nodeIds: nodeIds,
+            lats: this.lats.slice(0, nodeCount),
+            lons: this.lons.slice(0, nodeCount),
+            wayIds: Float64Array.from(wayIds),
+            wayNodeOffsets: Int32Array.from(wayNodeOffsets),
+            wayNodes: Int32Array.from(wayNodes),
+            wayTagOffsets: Int32Array.from(wayTagOffsets),
+            tagKeys: Int32Array.from(tagKeys),
+            tagValues: Int32Array.from(tagValues),
+            wayHighway: Int32Array.from(wayHighway),
+            strings: strings
+        });
+        console.log(`Parsed ${context.nodeCount} OSM nodes and ${context.wayCount} OSM ways`);
+        return context;
+    }
+
+    static NODE_ATTRIBUTES = /^\s+id="([0-9-]+)"\s+lat="([^"&]*)"\s+lon="([^"&]*)"/;
+    static ND_ATTRIBUTES = /^\s+ref="([0-9-]+)"\s*\/?$/;
+    static TAG_ATTRIBUTES = /^\s+k="([^"]*)"\s+v="([^"]*)"\s*\/?$/;
+
+    static attributes(text) {
+        const attrs = {};
+        const attrPattern = /([\w:.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')/g;
+        let match;
+        while ((match = attrPattern.exec(text)) !== null) {
+            const value = match[2] !== undefined ? match[2] : match[3];
+            attrs[match[1]] = OsmXmlStreamParser.decodeAttribute(value);
+        }
+        return attrs;
+    }
+
+    static decodeAttribute(value) {
+        // Attribute value normalization and entity references, as a DOM parser applies them
+        if (/[\t\n\r]/.test(value)) value = value.replace(/\r\n|[\t\n\r]/g, ' ');
+        if (value.indexOf('&') < 0) return value;
+        return value.replace(/&(#x[0-9a-fA-F]+|#[0-9]+|amp|lt|gt|quot|apos);/g, (entity, code) => {
+            if (code[0] === '#') {
+                return String.fromCodePoint(code[1] === 'x' ? parseInt(code.slice(2), 16) : parseInt(code.slice(1), 10));
+            }
+            return { amp: '&', lt: '<', gt: '>', quot: '"', apos: "'" }[code];
+        });
+    }
+}
+
+// OSM context of a preview in columnar form: node coordinates and way geometry live in typed
+// arrays (no object per node). Built by OsmXmlStreamParser or read from server.py's
+// /overpass?format=columnar response, whose layout is described in columnar_osm_context().
+class OsmContext {
+    static MAGIC = 'OSMC';
+    static VERSION = 1;
+    static CONTENT_TYPE = 'application/vnd.osmagic.osm-context';
+
+    constructor(columns) {
+        Object.assign(this, columns);
+        this.nodeCount = this.nodeIds.length;
+        this.wayCount = this.wayIds.length;
+    }
+
+    static fromBuffer(buffer) {
+        const header = new DataView(buffer, 0, 32);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== OsmContext.MAGIC || header.getUint32(4, true) !== OsmContext.VERSION) {
+            throw new Error('Unsupported OSM context format');
+        }
+        const nodeCount = header.getUint32(8, true);
+        const wayCount = header.getUint32(12, true);
+        const wayNodeCount = header.getUint32(16, true);
+        const tagCount = header.getUint32(20, true);
+        const stringBytes = header.getUint32(24, true);
+        
+        // Views onto the response buffer - nothing is copied
+        let offset = 32;
+        const take = (ArrayType, length) => {
+            const view = new ArrayType(buffer, offset, length);
+            offset += length * ArrayType.BYTES_PER_ELEMENT;
+            return view;
+        };
+        const columns = {
+            nodeIds: take(Float64Array, nodeCount),
+            lats: take(Float64Array, nodeCount),
+            lons: take(Float64Array, nodeCount),
+            wayIds: take(Float64Array, wayCount),
+            wayNodeOffsets: take(Int32Array, wayCount + 1),
+            wayNodes: take(Int32Array, wayNodeCount),
+            wayTagOffsets: take(Int32Array, wayCount + 1),
+            tagKeys: take(Int32Array, tagCount),
+            tagValues: take(Int32Array, tagCount),
+            wayHighway: take(Int32Array, wayCount)
+        };
+        columns.strings = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, offset, stringBytes)));
+        return new OsmContext(columns);
+    }
+
+    static empty() {
+        return new OsmContext({
+            nodeIds: new Float64Array(0), lats: new Float64Array(0), lons: new Float64Array(0),
+            wayIds: new Float64Array(0), wayNodeOffsets: new Int32Array(1), wayNodes: new Int32Array(0),
+            wayTagOffsets: new Int32Array(1), tagKeys: new Int32Array(0), tagValues: new Int32Array(0),
+            wayHighway: new Int32Array(0), strings: []
+        });
+    }
+
+    wayHighwayValue(way) {
+        return this.strings[this.wayHighway[way]];
+    }
+
+    wayLatLngs(way) {
+        const latlngs = [];
+        for (let i = this.wayNodeOffsets[way]; i < this.wayNodeOffsets[way + 1]; i++) {
+            const node = this.wayNodes[i];
+            latlngs.push([this.lats[node], this.lons[node]]);
+        }
+        return latlngs;
+    }
+}
+
+// Vertex handles of the layers being edited, drawn on one canvas instead of an L.Marker per vertex.
+// Handles are projected once per zoom into a pixel grid that serves both hit-testing and partial
+// redraws. A press is claimed (in the capture phase) only when it lands on a handle, so the line and
+// the map underneath keep their own mouse handling. While a vertex is dragged only the rectangle
+// around it is redrawn, with a rubber band to its neighbours; the layer gets the new geometry on drop.
+class VertexHandleLayer {
+    static RADIUS = 7; // px - the 14px handle
+    static MAX_SCALE = 1.5; // largest hover / drag / flash enlargement
+    static CELL_SIZE = 32; // px per grid cell
+    static HIT_SLOP = 3; // px around a handle that still count as a hit
+    static DRAG_THRESHOLD = 5; // px of movement before a press becomes a drag
+    static PADDING = 0.25; // canvas margin around the view (in view sizes), shown while panning
+
+    constructor(map, { styleOf, onClick, onDragStart, onDragEnd }) {
+        this.map = map;
+        this.styleOf = styleOf; // (layer, index, count) => { color, radius, glyph, draggable }
+        this.onClick = onClick; // (layer, index)
+        this.onDragStart = onDragStart; // (layer, index)
+        this.onDragEnd = onDragEnd; // (layer, index, latlng)
+        this.entries = new Map(); // layer -> { layer, latlngs, xs, ys (layer px), keys, flash, closed }
+        this.cells = new Map(); // grid cell -> [{ entry, index }]
+        this.origin = L.point(0, 0); // layer point of the canvas' top left corner
+        this.size = L.point(0, 0);
+        this.projection = null; // zoom and pixel origin the handles were projected with
+        this.hover = null; // { entry, index }
+        this.press = null; // { entry, index, x, y, draggable, dragging, point, latlng }
+        this.suppressClick = false;
+        this.frame = null;
+        this.dragFrame = null;
+
+        const pane = map.getPane('vertexHandles') || map.createPane('vertexHandles');
+        pane.style.zIndex = 640; // above markers (600), below tooltips and popups
+        pane.style.pointerEvents = 'none';
+        this.canvas = L.DomUtil.create('canvas', 'vertex-handle-canvas', pane);
+        this.context = this.canvas.getContext('2d');
+
+        map.on('moveend zoomend viewreset resize', this.reset, this);
+        map.on('zoomstart', () => {
+            this.canvas.style.visibility = 'hidden';
+        });
+
+        // Leaflet starts map drags on pointerdown where pointer events exist, so claim presses there
+        this.events = window.PointerEvent
+            ? { press: ['pointerdown'], move: ['pointermove'], release: ['pointerup', 'pointercancel'] }
+            : { press: ['mousedown', 'touchstart'], move: ['mousemove', 'touchmove'], release: ['mouseup', 'touchend'] };
+        const container = map.getContainer();
+        this.onPress = (e) => this.handlePress(e);
+        this.onMove = (e) => this.handleMove(e);
+        this.onRelease = (e) => this.handleRelease(e);
+        this.onHover = (e) => this.handleHover(e);
+        this.events.press.forEach(type => container.addEventListener(type, this.onPress, { capture: true, passive: false }));
+        container.addEventListener('mousemove', this.onHover);
+        // The click that ends a press on a handle is not a click on the line or the map
+        container.addEventListener('click', (e) => {
+            if (this.suppressClick) {
+                e.stopPropagation();
+                this.suppressClick = false;
+            }
+        }, true);
+
+        this.reset();
+    }
+
+    // ---- data ----
+
+    static cellKey(cx, cy) {
+        // Small-integer key; cells 0x8000 apart share a key, which the bounds checks make harmless
+        return (cx & 0x7fff) * 0x8000 + (cy & 0x7fff);
+    }
+
+    static addToCell(cells, key, item) {
+        const items = cells.get(key);
+        if (items) {
+            items.push(item);
+        } else {
+            cells.set(key, [item]);
+        }
+    }
+
+    update(layer, latlngs) {
+        // Show (or refresh) the handles of a layer
+        let entry = this.entries.get(layer);
+        if (entry) {
+            this.unindex(entry);
+        } else {
+            entry = { layer: layer, latlngs: null, xs: null, ys: null, keys: new Set(), flash: null, closed: layer instanceof L.Polygon };
+            this.entries.set(layer, entry);
+        }
+        entry.latlngs = latlngs;
+        this.project(entry);
+        this.index(entry);
+        if (this.press && this.press.entry === entry && this.press.index >= latlngs.length) this.cancelPress();
+        if (this.hover && this.hover.entry === entry && this.hover.index >= latlngs.length) this.hover = null;
+        this.scheduleDraw();
+    }
+
+    remove(layer) {
+        const entry = this.entries.get(layer);
+        if (!entry) return;
+        this.unindex(entry);
+        this.entries.delete(layer);
+        if (this.press && this.press.entry === entry) this.cancelPress();
+        if (this.hover && this.hover.entry === entry) this.setHover(null);
+        this.scheduleDraw();
+    }
+
+    clear() {
+        this.cancelPress();
+        this.setHover(null);
+        this.entries.clear();
+        this.cells.clear();
+        this.scheduleDraw();
+    }
+
+    redraw() {
+        // Handle styles changed (selection, split mode)
+        this.scheduleDraw();
+    }
+
+    has(layer) {
+        return this.entries.has(layer);
+    }
+
+    flash(layer, index, color, duration, done = null) {
+        // Enlarge one handle in a highlight colour for a moment
+        const entry = this.entries.get(layer);
+        if (!entry) {
+            if (done) done();
+            return;
+        }
+        entry.flash = { index: index, color: color };
+        this.redrawAround(entry, index);
+        setTimeout(() => {
+            if (entry.flash && entry.flash.index === index) {
+                entry.flash = null;
+                this.redrawAround(entry, index);
+            }
+            if (done) done();
+        }, duration);
+    }
+
+    project(entry) {
+        const count = entry.latlngs.length;
+        entry.xs = new Float64Array(count);
+        entry.ys = new Float64Array(count);
+        for (let i = 0; i < count; i++) {
+            const point = this.map.latLngToLayerPoint(entry.latlngs[i]);
+            entry.xs[i] = point.x;
+            entry.ys[i] = point.y;
+        }
+    }
+
+    index(entry) {
+        const size = VertexHandleLayer.CELL_SIZE;
+        for (let i = 0; i < entry.xs.length; i++) {
+            const key = VertexHandleLayer.cellKey(Math.floor(entry.xs[i] / size), Math.floor(entry.ys[i] / size));
+            VertexHandleLayer.addToCell(this.cells, key, { entry: entry, index: i });
+            entry.keys.add(key);
+        }
+    }
+
+    unindex(entry) {
+        entry.keys.forEach(key => {
+            const items = this.cells.get(key).filter(item => item.entry !== entry);
+            if (items.length > 0) {
+                this.cells.set(key, items);
+            } else {
+                this.cells.delete(key);
+            }
+        });
+        entry.keys.clear();
+    }
+
+    forEachHandleIn(minX, minY, maxX, maxY, callback) {
+        // Handles whose centre lies in the layer-pixel rectangle
+        const size = VertexHandleLayer.CELL_SIZE;
+        const x0 = Math.floor(minX / size), x1 = Math.floor(maxX / size);
+        const y0 = Math.floor(minY / size), y1 = Math.floor(maxY / size);
+        for (let cx = x0; cx <= x1; cx++) {
+            for (let cy = y0; cy <= y1; cy++) {
+                const items = this.cells.get(VertexHandleLayer.cellKey(cx, cy));
+                if (!items) continue;
+                items.forEach(item => {
+                    const x = item.entry.xs[item.index], y = item.entry.ys[item.index];
+                    if (x >= minX && x <= maxX && y >= minY && y <= maxY) callback(item.entry, item.index, x, y);
+                });
+            }
+        }
+    }
+
+    hitTest(containerPoint) {
+        // { layer, index } of the handle under a container point, or null
+        const hit = this.handleAt(containerPoint);
+        return hit ? { layer: hit.entry.layer, index: hit.index } : null;
+    }
+
+    handleAt(containerPoint) {
+        const point = this.map.containerPointToLayerPoint(containerPoint);
+        const reach = VertexHandleLayer.RADIUS * VertexHandleLayer.MAX_SCALE + VertexHandleLayer.HIT_SLOP;
+        let nearest = null;
+        let minDistance = Infinity;
+        this.forEachHandleIn(point.x - reach, point.y - reach, point.x + reach, point.y + reach, (entry, index, x, y) => {
+            const distance = Math.hypot(x - point.x, y - point.y);
+            const radius = this.styleFor(entry, index).radius + VertexHandleLayer.HIT_SLOP;
+            if (distance <= radius && distance < minDistance) {
+                minDistance = distance;
+                nearest = { entry: entry, index: index };
+            }
+        });
+        return nearest;
+    }
+
+    // ---- drawing ----
+
+    styleFor(entry, index) {
+        const style = this.styleOf(entry.layer, index, entry.latlngs.length);
+        const press = this.press;
+        if (press && press.dragging && press.entry === entry && press.index === index) {
+            return { ...style, color: '#06b6d4', radius: style.radius * VertexHandleLayer.MAX_SCALE };
+        }
+        if (entry.flash && entry.flash.index === index) {
+            return { ...style, color: entry.flash.color, radius: style.radius * VertexHandleLayer.MAX_SCALE };
+        }
+        if (this.hover && this.hover.entry === entry && this.hover.index === index) {
+            return { ...style, radius: style.radius * (style.glyph ? 1.5 : 1.3) };
+        }
+        return style;
+    }
+
+    reset() {
+        // Fit the canvas to the view (plus padding) and redraw; handles are re-projected after a zoom
+        const size = this.map.getSize();
+        const padding = size.multiplyBy(VertexHandleLayer.PADDING).round();
+        this.origin = this.map.containerPointToLayerPoint([0, 0]).subtract(padding);
+        this.size = size.add(padding.multiplyBy(2));
+
+        const ratio = window.devicePixelRatio || 1;
+        L.DomUtil.setPosition(this.canvas, this.origin);
+        this.canvas.width = this.size.x * ratio;
+        this.canvas.height = this.size.y * ratio;
+        this.canvas.style.width = `${this.size.x}px`;
+        this.canvas.style.height = `${this.size.y}px`;
+        this.context.setTransform(ratio, 0, 0, ratio, 0, 0);
+        this.canvas.style.visibility = '';
+
+        const pixelOrigin = this.map.getPixelOrigin();
+        const projection = `${this.map.getZoom()}:${pixelOrigin.x}:${pixelOrigin.y}`;
+        if (projection !== this.projection) {
+            this.projection = projection;
+            this.cells.clear();
+            this.entries.forEach(entry => {
+                entry.keys.clear();
+                this.project(entry);
+                this.index(entry);
+            });
+        }
+        this.draw();
+    }
+
+    scheduleDraw() {
+        if (this.frame) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.draw();
+        });
+    }
+
+    draw() {
+        if (this.frame) {
+            cancelAnimationFrame(this.frame);
+            this.frame = null;
+        }
+        this.redrawRect(this.origin.x, this.origin.y, this.origin.x + this.size.x, this.origin.y + this.size.y);
+    }
+
+    redrawAround(entry, index) {
+        const reach = VertexHandleLayer.RADIUS * VertexHandleLayer.MAX_SCALE + 2;
+        const x = entry.xs[index], y = entry.ys[index];
+        this.redrawRect(x - reach, y - reach, x + reach, y + reach);
+    }
+
+    redrawRect(minX, minY, maxX, maxY) {
+        // Repaint one rectangle (layer px): rubber band of a drag, then the handles inside it
+        const ctx = this.context;
+        const ox = this.origin.x, oy = this.origin.y;
+        const press = this.press && this.press.dragging ? this.press : null;
+        ctx.save();
+        ctx.beginPath();
+        ctx.rect(minX - ox, minY - oy, maxX - minX, maxY - minY);
+        ctx.clip();
+        ctx.clearRect(minX - ox, minY - oy, maxX - minX, maxY - minY);
+
+        if (press) {
+            ctx.beginPath();
+            this.neighbours(press.entry, press.index).forEach(neighbour => {
+                ctx.moveTo(press.entry.xs[neighbour] - ox, press.entry.ys[neighbour] - oy);
+                ctx.lineTo(press.point.x - ox, press.point.y - oy);
+            });
+            ctx.strokeStyle = '#0052cc';
+            ctx.lineWidth = 3;
+            ctx.setLineDash([6, 4]);
+            ctx.stroke();
+            ctx.setLineDash([]);
+        }
+
+        const handles = [];
+        const reach = VertexHandleLayer.RADIUS * VertexHandleLayer.MAX_SCALE;
+        this.forEachHandleIn(minX - reach, minY - reach, maxX + reach, maxY + reach, (entry, index, x, y) => {
+            if (press && press.entry === entry && press.index === index) return;
+            handles.push({ x: x - ox, y: y - oy, style: this.styleFor(entry, index) });
+        });
+        if (press) {
+            handles.push({ x: press.point.x - ox, y: press.point.y - oy, style: this.styleFor(press.entry, press.index) });
+        }
+        this.paintHandles(handles);
+        ctx.restore();
+    }
+
+    paintHandles(handles) {
+        // Batched by layer of the handle: shadow rings, white borders, then fills grouped by colour
+        const ctx = this.context;
+        const disc = (path, handle, radius) => {
+            path.moveTo(handle.x + radius, handle.y);
+            path.arc(handle.x, handle.y, radius, 0, Math.PI * 2);
+        };
+        const shadows = new Path2D();
+        const borders = new Path2D();
+        const fills = new Map();
+        handles.forEach(handle => {
+            const radius = handle.style.radius;
+            disc(shadows, handle, radius + 1.5);
+            disc(borders, handle, radius);
+            if (!fills.has(handle.style.color)) fills.set(handle.style.color, new Path2D());
+            disc(fills.get(handle.style.color), handle, radius - 3);
+        });
+        ctx.fillStyle = 'rgba(0, 0, 0, 0.35)';
+        ctx.fill(shadows);
+        ctx.fillStyle = '#ffffff';
+        ctx.fill(borders);
+        fills.forEach((path, color) => {
+            ctx.fillStyle = color;
+            ctx.fill(path);
+        });
+
+        const glyphs = handles.filter(handle => handle.style.glyph);
+        if (glyphs.length > 0) {
+            ctx.textAlign = 'center';
+            ctx.textBaseline = 'middle';
+            glyphs.forEach(handle => {
+                ctx.font = `${Math.round(handle.style.radius)}px sans-serif`;
+                ctx.fillText(handle.style.glyph, handle.x, handle.y);
+            });
+        }
+    }
+
+    neighbours(entry, index) {
+        const count = entry.latlngs.length;
+        const result = [];
+        if (index > 0) result.push(index - 1);
+        else if (entry.closed && count > 2) result.push(count - 1);
+        if (index < count - 1) result.push(index + 1);
+        else if (entry.closed && count > 2) result.push(0);
+        return result;
+    }
+
+    // ---- pointer handling ----
+
+    eventPoint(e) {
+        return this.map.mouseEventToContainerPoint(e.touches ? e.touches[0] : (e.changedTouches ? e.changedTouches[0] : e));
+    }
+
+    handlePress(e) {
+        if (e.button > 0 || (e.touches && e.touches.length > 1) || e.isPrimary === false) return;
+        const hit = this.handleAt(this.eventPoint(e));
+        if (!hit) return;
+        // Ours - keep it from the line (way drag, add node) and from map panning; preventing the
+        // default also drops the compatibility mouse events that would follow a pointerdown
+        e.stopPropagation();
+        e.preventDefault();
+        const point = this.eventPoint(e);
+        this.press = {
+            entry: hit.entry,
+            index: hit.index,
+            x: point.x,
+            y: point.y,
+            draggable: this.styleFor(hit.entry, hit.index).draggable !== false,
+            dragging: false,
+            point: null,
+            latlng: null
+        };
+        this.events.move.forEach(type => document.addEventListener(type, this.onMove, { passive: false }));
+        this.events.release.forEach(type => document.addEventListener(type, this.onRelease));
+    }
+
+    handleMove(e) {
+        const press = this.press;
+        if (!press) return;
+        const point = this.eventPoint(e);
+        if (!press.dragging) {
+            const moved = Math.abs(point.x - press.x) > VertexHandleLayer.DRAG_THRESHOLD ||
+                Math.abs(point.y - press.y) > VertexHandleLayer.DRAG_THRESHOLD;
+            if (!moved || !press.draggable) return;
+            press.dragging = true;
+            press.point = L.point(press.entry.xs[press.index], press.entry.ys[press.index]);
+            this.onDragStart(press.entry.layer, press.index);
+        }
+        e.preventDefault();
+        press.latlng = this.map.containerPointToLatLng(point);
+        press.target = this.map.containerPointToLayerPoint(point);
+        if (!this.dragFrame) {
+            this.dragFrame = requestAnimationFrame(() => {
+                this.dragFrame = null;
+                if (this.press === press && press.target) this.moveDragged(press);
+            });
+        }
+    }
+
+    moveDragged(press) {
+        // Repaint only the box spanning the neighbours and the old and new positions
+        const entry = press.entry;
+        const xs = [press.point.x, press.target.x];
+        const ys = [press.point.y, press.target.y];
+        this.neighbours(entry, press.index).forEach(neighbour => {
+            xs.push(entry.xs[neighbour]);
+            ys.push(entry.ys[neighbour]);
+        });
+        press.point = press.target;
+        const reach = VertexHandleLayer.RADIUS * VertexHandleLayer.MAX_SCALE + 3;
+        this.redrawRect(Math.min(...xs) - reach, Math.min(...ys) - reach, Math.max(...xs) + reach, Math.max(...ys) + reach);
+    }
+
+    handleRelease(e) {
+        const press = this.press;
+        this.stopTracking();
+        if (!press) return;
+        this.press = null;
+        this.suppressClick = true;
+        setTimeout(() => {
+            this.suppressClick = false;
+        }, 0);
+
+        if (press.dragging) {
+            this.redrawAround(press.entry, press.index);
+            if (press.latlng) {
+                this.onDragEnd(press.entry.layer, press.index, press.latlng);
+            }
+            this.scheduleDraw();
+        } else {
+            this.onClick(press.entry.layer, press.index);
+        }
+    }
+
+    cancelPress() {
+        this.stopTracking();
+        if (this.press) {
+            this.press = null;
+            this.scheduleDraw();
+        }
+    }
+
+    stopTracking() {
+        if (this.dragFrame) {
+            cancelAnimationFrame(this.dragFrame);
+            this.dragFrame = null;
+        }
+        this.events.move.forEach(type => document.removeEventListener(type, this.onMove));
+        this.events.release.forEach(type => document.removeEventListener(type, this.onRelease));
+    }
+
+    handleHover(e) {
+        if (this.press) return;
+        this.setHover(this.handleAt(this.eventPoint(e)));
+    }
+
+    setHover(hit) {
+        const previous = this.hover;
+        if (previous === hit || (previous && hit && previous.entry === hit.entry && previous.index === hit.index)) return;
+        this.hover = hit;
+        this.map.getContainer().classList.toggle('vertex-handle-hover', Boolean(hit));
+        if (previous && this.entries.has(previous.entry.layer)) this.redrawAround(previous.entry, previous.index);
+        if (hit) this.redrawAround(hit.entry, hit.index);
+    }
+}
+
+// Scrolling list that keeps only the rows in view (plus a few above and below) in the DOM.
+// Rows have a fixed height and are absolutely positioned inside a spacer as tall as the whole list;
+// row elements are recycled from a pool as they scroll out, and renderRow refills one in place.
+// With minColumnWidth set, items flow into as many equal columns as fit (a grid of fixed rows).
+class VirtualList {
+    constructor(viewport, { rowHeight, gap = 0, minColumnWidth = 0, overscan = 4, createRow, renderRow }) {
+        this.viewport = viewport;
+        this.rowHeight = rowHeight; // px, including the gap below the row
+        this.gap = gap;
+        this.minColumnWidth = minColumnWidth;
+        this.overscan = overscan; // extra rows rendered above and below the visible ones
+        this.createRow = createRow; // () => element
+        this.renderRow = renderRow; // (element, item, index) => void
+        this.items = [];
+        this.columns = 1;
+        this.visible = new Map(); // item index -> row element
+        this.pool = []; // hidden row elements ready for reuse
+
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'virtual-list-spacer';
+        this.viewport.appendChild(this.spacer);
+
+        this.onScroll = () => this.render();
+        this.viewport.addEventListener('scroll', this.onScroll, { passive: true });
+        this.resizeObserver = typeof ResizeObserver !== 'undefined' ? new ResizeObserver(() => this.render()) : null;
+        if (this.resizeObserver) this.resizeObserver.observe(this.viewport);
+    }
+
+    setItems(items) {
+        // Rows already on screen are refilled with the new items; nothing is rebuilt
+        this.items = items;
+        this.releaseAll();
+        this.render();
+    }
+
+    refresh() {
+        // Redraw the visible rows in place (e.g. after a status change)
+        this.visible.forEach((element, index) => this.renderRow(element, this.items[index], index));
+    }
+
+    render() {
+        const width = this.viewport.clientWidth;
+        const columns = this.minColumnWidth
+            ? Math.max(1, Math.floor((width + this.gap) / (this.minColumnWidth + this.gap)))
+            : 1;
+        if (columns !== this.columns) {
+            this.columns = columns;
+            this.releaseAll();
+        }
+
+        const rowCount = Math.ceil(this.items.length / columns);
+        this.spacer.style.height = `${rowCount * this.rowHeight}px`;
+
+        // Window of rows to materialize (before the first layout clientHeight is 0 - assume a screenful)
+        const scrollTop = this.viewport.scrollTop;
+        const viewHeight = this.viewport.clientHeight || window.innerHeight;
+        const firstRow = Math.max(0, Math.floor(scrollTop / this.rowHeight) - this.overscan);
+        const lastRow = Math.min(rowCount, Math.ceil((scrollTop + viewHeight) / this.rowHeight) + this.overscan);
+        const start = firstRow * columns;
+        const end = Math.min(this.items.length, lastRow * columns);
+
+        this.visible.forEach((element, index) => {
+            if (index < start || index >= end) this.release(index, element);
+        });
+
+        const columnWidth = columns > 1 ? (width - this.gap * (columns - 1)) / columns : 0;
+        for (let index = start; index < end; index++) {
+            if (this.visible.has(index)) continue;
+            let element = this.pool.pop();
+            if (element) {
+                element.hidden = false;
+            } else {
+                element = this.createRow();
+                element.classList.add('virtual-list-row');
+                element.style.height = `${this.rowHeight - this.gap}px`;
+                this.spacer.appendChild(element);
+            }
+            const column = index % columns;
+            element.style.top = `${Math.floor(index / columns) * this.rowHeight}px`;
+            if (columns > 1) {
+                element.style.left = `${column * (columnWidth + this.gap)}px`;
+                element.style.width = `${columnWidth}px`;
+            } else {
+                element.style.left = '0';
+                element.style.width = '';
+            }
+            this.renderRow(element, this.items[index], index);
+            this.visible.set(index, element);
+        }
+    }
+
+    release(index, element) {
+        element.hidden = true;
+        this.visible.delete(index);
+        this.pool.push(element);
+    }
+
+    releaseAll() {
+        this.visible.forEach((element, index) => this.release(index, element));
+    }
+
+    scrollToIndex(index) {
+        // Center the item's row in the viewport and return its element
+        const row = Math.floor(index / this.columns);
+        const viewHeight = this.viewport.clientHeight || window.innerHeight;
+        this.viewport.scrollTop = Math.max(0, row * this.rowHeight - (viewHeight - this.rowHeight) / 2);
+        this.render();
+        return this.visible.get(index) || null;
+    }
+
+    destroy() {
+        this.viewport.removeEventListener('scroll', this.onScroll);
+        if (this.resizeObserver) this.resizeObserver.disconnect();
+    }
+}
+
 // Initialize task manager when page loads
 let taskManager;
 document.addEventListener('DOMContentLoaded', () => {
@@ -0,0 +1,128 @@
+"""
+Download throughput benchmark for /exports/ on server.py
+
+Writes 1 MB, 50 MB and 500 MB .osm files into the export directory, starts
+server.py and downloads each one several times with the Accept-Encoding a
+browser sends (JOSM sends gzip too). Reports throughput, the Content-Encoding
+and Accept-Ranges of the responses, whether a resumed download (Range on the
+second half) gets a 206, and, on Linux, server CPU time per download.
+
+To compare with another version, point --root at a checkout of it
+(e.g. one made with `git worktree add`).
+
+Usage: python benchmarks/bench_exports.py [--root DIR] [--sizes 1,50,500] [--accept-encoding VALUE]
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8000
+NODE_LINE = b'  <node id="-1" lat="1.0000000" lon="2.0000000" version="1" />\n'
+
+
+def server_cpu_seconds(pid):
+    """User + system CPU time of a process, or None where /proc is not available"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def write_export(path, size):
+    block = NODE_LINE * 16384
+    with open(path, 'wb') as f:
+        written = 0
+        while written < size:
+            chunk = block[:size - written]
+            f.write(chunk)
+            written += len(chunk)
+
+
+def download(path, accept_encoding, extra_headers=''):
+    """GET path with a raw socket and discard the body; returns (status line, headers, bytes received)"""
+    with socket.create_connection(('localhost', PORT)) as s:
+        request = f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+        if accept_encoding:
+            request += f'Accept-Encoding: {accept_encoding}\r\n'
+        s.sendall((request + extra_headers + '\r\n').encode())
+        buf = bytearray(1 << 20)
+        head = b''
+        received = 0
+        while True:
+            n = s.recv_into(buf)
+            if not n:
+                break
+            if len(head) < 16384 and b'\r\n\r\n' not in head:
+                head += bytes(buf[:n])
+            received += n
+    lines = head.split(b'\r\n\r\n', 1)[0].decode('latin-1').split('\r\n')
+    headers = {name.strip().lower(): value.strip()
+               for name, _, value in (line.partition(':') for line in lines[1:])}
+    return lines[0], headers, received
+
+
+def wait_for_server():
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('localhost', PORT), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server.py did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--root', default=ROOT, help='Checkout whose server.py is benchmarked')
+    parser.add_argument('--sizes', default='1,50,500', help='Export sizes in MB')
+    parser.add_argument('--accept-encoding', default='gzip, deflate, br, zstd',
+                        help="Accept-Encoding sent with each download ('' for none)")
+    args = parser.parse_args()
+
+    export_dir = os.path.join(args.root, 'exports')
+    os.makedirs(export_dir, exist_ok=True)
+    files = []
+    for megabytes in (int(value) for value in args.sizes.split(',')):
+        filename = f'bench_{megabytes}mb.osm'
+        write_export(os.path.join(export_dir, filename), megabytes * 1024 * 1024)
+        files.append((filename, megabytes * 1024 * 1024))
+
+    server = subprocess.Popen([sys.executable, 'server.py', '--no-browser'], cwd=args.root,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server()
+        for filename, size in files:
+            # Enough downloads for about 2 GB per size, at least 3
+            runs = max(3, min(200, (2 << 30) // size))
+            url = f'/exports/{filename}'
+            _, headers, _ = download(url, args.accept_encoding)  # warm the page cache
+            cpu_before = server_cpu_seconds(server.pid)
+            started = time.perf_counter()
+            for _ in range(runs):
+                download(url, args.accept_encoding)
+            elapsed = time.perf_counter() - started
+            cpu_after = server_cpu_seconds(server.pid)
+            cpu = (f'{(cpu_after - cpu_before) / runs * 1000:7.1f} ms/download'
+                   if cpu_before is not None else 'n/a')
+            resume_status, _, _ = download(url, args.accept_encoding, f'Range: bytes={size // 2}-\r\n')
+            print(f'{size // (1024 * 1024):4d} MB  x{runs:<4d} {size * runs / elapsed / 1e6:8.0f} MB/s  '
+                  f'server CPU {cpu}  encoding {headers.get("content-encoding", "identity")}, '
+                  f'Accept-Ranges {headers.get("accept-ranges", "-")}, resume {resume_status.split(" ", 2)[1]}')
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait()
+        for filename, _ in files:
+            os.unlink(os.path.join(export_dir, filename))
+
+
+if __name__ == '__main__':
+    main()
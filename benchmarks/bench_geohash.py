@@ -0,0 +1,151 @@
+"""
+Geohash column decoding benchmark for server.py
+
+Writes a CSV of GPS points (sequence_id, geohash, timestamp) to a scratch
+directory: sequences of 200 points each, random walks encoded as geohashes
+of 7-9 characters. --distinct N instead draws every row from N geohashes,
+as in files that revisit the same cells. The geohash column is read back
+and decoded batch by batch (CSV_INGEST_BATCH_ROWS rows, as in
+group_csv_batch) with the per-row decode_geohash and with the bulk
+decode_geohashes; both must give identical results. Then the whole file
+goes through ingest_csv in-process (one worker) with each decoder.
+
+Usage: python benchmarks/bench_geohash.py [--rows 1000000] [--distinct 0] [--no-ingest]
+"""
+
+import argparse
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import server  # noqa: E402
+
+POINTS_PER_SEQUENCE = 200
+
+
+def encode_geohash(lat, lon, length):
+    """Geohash of a point, the inverse of decode_geohash"""
+    lat_min, lat_max = -90.0, 90.0
+    lon_min, lon_max = -180.0, 180.0
+    chars = []
+    value = bits = 0
+    even = True
+    while len(chars) < length:
+        if even:
+            mid = (lon_min + lon_max) / 2
+            bit = lon >= mid
+            lon_min, lon_max = (mid, lon_max) if bit else (lon_min, mid)
+        else:
+            mid = (lat_min + lat_max) / 2
+            bit = lat >= mid
+            lat_min, lat_max = (mid, lat_max) if bit else (lat_min, mid)
+        value = (value << 1) | bit
+        bits += 1
+        even = not even
+        if bits == 5:
+            chars.append(server.GEOHASH_BASE32[value])
+            value = bits = 0
+    return ''.join(chars)
+
+
+def write_csv(path, rows, distinct, rng):
+    pool = None
+    if distinct:
+        pool = [encode_geohash(rng.uniform(1.2, 1.5), rng.uniform(103.6, 104.0), rng.randint(7, 9))
+                for _ in range(distinct)]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['sequence_id', 'geohash', 'timestamp'])
+        for row in range(rows):
+            if row % POINTS_PER_SEQUENCE == 0:
+                lat, lon = rng.uniform(1.2, 1.5), rng.uniform(103.6, 104.0)
+                length = rng.randint(7, 9)
+            if pool:
+                geohash = rng.choice(pool)
+            else:
+                lat += rng.uniform(-0.0002, 0.0002)
+                lon += rng.uniform(-0.0002, 0.0002)
+                geohash = encode_geohash(lat, lon, length)
+            writer.writerow([f'seq_{row // POINTS_PER_SEQUENCE}', geohash, 1700000000 + row])
+
+
+def read_geohash_batches(path, batch_rows):
+    batches = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        column = next(reader).index('geohash')
+        batch = []
+        for row in reader:
+            batch.append(row[column])
+            if len(batch) >= batch_rows:
+                batches.append(batch)
+                batch = []
+        if batch:
+            batches.append(batch)
+    return batches
+
+
+def decode_per_row(geohashes):
+    return [server.decode_geohash(geohash) for geohash in geohashes]
+
+
+def time_decoder(decoder, batches):
+    started = time.perf_counter()
+    results = [decoder(batch) for batch in batches]
+    return time.perf_counter() - started, results
+
+
+def time_ingest(path, scratch, decoder):
+    bulk_decoder = server.decode_geohashes
+    server.decode_geohashes = decoder
+    try:
+        started = time.perf_counter()
+        features = sum(1 for _ in server.ingest_csv(path, scratch_dir=scratch))
+        return time.perf_counter() - started, features
+    finally:
+        server.decode_geohashes = bulk_decoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--distinct', type=int, default=0,
+                        help='Draw rows from this many geohashes (0 = random walks)')
+    parser.add_argument('--no-ingest', action='store_true', help='Only time the decoders')
+    args = parser.parse_args()
+    rng = random.Random(6)
+
+    scratch = tempfile.mkdtemp(prefix='geohash-bench-')
+    try:
+        path = os.path.join(scratch, 'points.csv')
+        write_csv(path, args.rows, args.distinct, rng)
+        batches = read_geohash_batches(path, server.CSV_INGEST_BATCH_ROWS)
+        unique = len({geohash for batch in batches for geohash in batch})
+
+        per_row_time, per_row = time_decoder(decode_per_row, batches)
+        bulk_time, bulk = time_decoder(server.decode_geohashes, batches)
+
+        print(f'{args.rows} rows, {unique} distinct geohashes, {os.path.getsize(path) / 1e6:.1f} MB '
+              f'({server.CSV_INGEST_BATCH_ROWS} rows per batch)')
+        print(f'  decode per-row    {per_row_time:7.2f} s')
+        print(f'  decode bulk       {bulk_time:7.2f} s  ({per_row_time / bulk_time:.1f}x)')
+        print(f'  bulk == per-row   {bulk == per_row}')
+        if not args.no_ingest:
+            server.csv_ingest_pool.workers = 1
+            per_row_ingest, features = time_ingest(path, scratch, decode_per_row)
+            bulk_ingest, _ = time_ingest(path, scratch, server.decode_geohashes)
+            print(f'  ingest per-row    {per_row_ingest:7.2f} s  ({features} sequences, one worker)')
+            print(f'  ingest bulk       {bulk_ingest:7.2f} s')
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+// Parse-time benchmark for OsmXmlStreamParser (app.js) on an Overpass payload
+//
+// Without an argument a synthetic ~20 MB `out body` response is generated (220k nodes, ~8% tagged
+// crossings, then highway ways of 2-40 nodes with escaped names, then bus route relations).
+// The payload is parsed in one push and in 64 KB chunks, as readOsmContext does while the response
+// downloads; both must give the same OsmContext.
+//
+// Usage: node --expose-gc benchmarks/bench_osm_parser.js [overpass.osm]
+
+const fs = require('fs');
+const path = require('path');
+
+const source = fs.readFileSync(path.join(__dirname, '..', 'app.js'), 'utf8');
+const start = source.indexOf('class OsmXmlStreamParser');
+const end = source.indexOf('// Vertex handles of the layers being edited');
+if (start < 0 || end < 0) throw new Error('OsmXmlStreamParser not found in app.js');
+
+let warnings = 0;
+const quietConsole = { log() {}, warn() { warnings++; }, error: console.error };
+const OsmXmlStreamParser = new Function('console', 'L',
+    source.slice(start, end) + '; return OsmXmlStreamParser;')(quietConsole, {});
+
+// ---- payload ----
+
+function syntheticPayload(targetBytes) {
+    let seed = 7;
+    const random = () => (seed = (seed * 1103515245 + 12345) % 2147483648) / 2147483648;
+    const randint = (a, b) => a + Math.floor(random() * (b - a + 1));
+    const highways = ['residential', 'service', 'primary', 'secondary', 'tertiary', 'footway', 'unclassified', 'trunk'];
+    const parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6" generator="Overpass API 0.7.62.1">\n' +
+        '<note>The data included in this document is from www.openstreetmap.org.</note>\n' +
+        '<meta osm_base="2026-10-01T00:00:00Z"/>\n\n'];
+    let size = parts[0].length;
+    const ids = [];
+    let nodeId = 100000000;
+    for (let i = 0; i < 220000; i++) {
+        nodeId += randint(1, 50);
+        const lat = (1.28 + random() * 0.06).toFixed(7);
+        const lon = (103.82 + random() * 0.08).toFixed(7);
+        const node = random() < 0.08
+            ? `  <node id="${nodeId}" lat="${lat}" lon="${lon}">\n    <tag k="highway" v="crossing"/>\n` +
+              `    <tag k="crossing" v="traffic_signals"/>\n  </node>\n`
+            : `  <node id="${nodeId}" lat="${lat}" lon="${lon}"/>\n`;
+        parts.push(node);
+        size += node.length;
+        ids.push(nodeId);
+    }
+    let wayId = 5000000;
+    while (size < targetBytes - 600000) {
+        wayId += randint(1, 100);
+        const count = randint(2, 40);
+        const first = Math.floor(random() * (ids.length - count));
+        let way = `  <way id="${wayId}">\n`;
+        for (let i = first; i < first + count; i++) way += `    <nd ref="${ids[i]}"/>\n`;
+        if (random() < 0.01) way += '    <nd ref="1"/>\n'; // missing node
+        way += random() < 0.9
+            ? `    <tag k="highway" v="${highways[Math.floor(random() * highways.length)]}"/>\n`
+            : '    <tag k="building" v="yes"/>\n';
+        if (random() < 0.3) way += `    <tag k="name" v="Jalan &amp; &quot;Besar&quot; ${wayId}&#10;x"/>\n`;
+        if (random() < 0.2) way += '    <tag k="oneway" v="yes"/>\n';
+        way += '  </way>\n';
+        parts.push(way);
+        size += way.length;
+    }
+    for (let r = 0; r < 300; r++) {
+        let relation = `  <relation id="${9000 + r}">\n`;
+        for (let i = 0; i < 30; i++) relation += `    <member type="way" ref="${5000000 + randint(0, 1000000)}" role=""/>\n`;
+        parts.push(relation + '    <tag k="route" v="bus"/>\n    <tag k="type" v="route"/>\n  </relation>\n');
+    }
+    parts.push('\n</osm>\n');
+    return parts.join('');
+}
+
+const xml = process.argv[2] ? fs.readFileSync(process.argv[2], 'utf8') : syntheticPayload(20 * 1024 * 1024);
+
+// ---- runs ----
+
+function sameContext(a, b) {
+    const columns = ['nodeIds', 'lats', 'lons', 'wayIds', 'wayNodeOffsets', 'wayNodes', 'wayTagOffsets', 'tagKeys', 'tagValues', 'wayHighway'];
+    return columns.every(column => a[column].length === b[column].length && a[column].every((value, i) => value === b[column][i])) &&
+        a.strings.join('\u0000') === b.strings.join('\u0000');
+}
+
+function parse(chunkSize) {
+    if (global.gc) global.gc();
+    const heapBefore = process.memoryUsage().heapUsed;
+    const started = process.hrtime.bigint();
+    const parser = new OsmXmlStreamParser();
+    if (chunkSize) {
+        for (let i = 0; i < xml.length; i += chunkSize) parser.push(xml.slice(i, i + chunkSize));
+    } else {
+        parser.push(xml);
+    }
+    const context = parser.finish();
+    const ms = Number(process.hrtime.bigint() - started) / 1e6;
+    return { context, ms, heapMb: (process.memoryUsage().heapUsed - heapBefore) / 1e6 };
+}
+
+const runs = 3;
+const results = { whole: [], chunked: [] };
+let whole = null;
+let parity = true;
+for (let run = 0; run < runs; run++) {
+    const w = parse(0);
+    const c = parse(64 * 1024);
+    whole = w.context;
+    parity = parity && sameContext(w.context, c.context);
+    results.whole.push(w);
+    results.chunked.push(c);
+}
+
+const best = (list) => list.reduce((a, b) => (b.ms < a.ms ? b : a));
+console.log(`OsmXmlStreamParser, ${(xml.length / 1e6).toFixed(1)} MB: ${whole.nodeCount} nodes, ${whole.wayCount} highway ways`);
+for (const [label, list] of [['one push', results.whole], ['64 KB chunks', results.chunked]]) {
+    const b = best(list);
+    console.log(`  ${label.padEnd(14)} ${b.ms.toFixed(0).padStart(6)} ms (best of ${runs})` +
+        (global.gc ? `  heap after finish +${b.heapMb.toFixed(0)} MB` : ''));
+}
+console.log(`  chunked == one push: ${parity}, ${warnings / (runs * 2)} warnings per parse`);
@@ -0,0 +1,123 @@
+"""
+History size and revert latency benchmark for prompt_tracker.py
+
+Copies the tracked files into a scratch directory and simulates prompts:
+each one takes the "before" snapshot, makes random line edits to app.js
+(every prompt), task-manager.js (30%) and styles.css (10%), then takes the
+"after" snapshot. Reports blob store size, time per prompt, the time to
+rebuild every file of a snapshot from the blobs, and end-to-end
+revert_to_before_prompt latency.
+
+--max-chain 0 stores every version as a full keyframe, for comparison.
+
+Usage: python benchmarks/bench_prompt_history.py [--prompts 500] [--max-chain 16]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import prompt_tracker  # noqa: E402
+
+EDITED_FILES = (('app.js', 1.0), ('task-manager.js', 0.3), ('styles.css', 0.1))
+
+
+def edit_file(filename, rng):
+    """Replace, insert or delete a few lines at random places"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+    for _ in range(rng.randint(1, 5)):
+        position = rng.randrange(len(lines))
+        action = rng.random()
+        if action < 0.5:
+            lines[position] = lines[position] + f' // edit {rng.random():.6f}'
+        elif action < 0.8:
+            lines[position:position] = [f'    const value{rng.randrange(10 ** 6)} = {rng.random():.6f};'
+                                        for _ in range(rng.randint(1, 8))]
+        elif len(lines) > 10:
+            del lines[position:position + rng.randint(1, 4)]
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(folder, name))
+               for folder, _, names in os.walk(path) for name in names)
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return (f'p50 {statistics.median(ordered) * 1000:6.1f} ms  '
+            f'p95 {ordered[int(len(ordered) * 0.95)] * 1000:6.1f} ms  max {ordered[-1] * 1000:6.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--prompts', type=int, default=500)
+    parser.add_argument('--max-chain', type=int, default=prompt_tracker.MAX_DELTA_CHAIN,
+                        help='Longest delta chain (0 = keyframes only)')
+    parser.add_argument('--reverts', type=int, default=50, help='Prompts sampled for the revert timings')
+    args = parser.parse_args()
+    prompt_tracker.MAX_DELTA_CHAIN = args.max_chain
+    rng = random.Random(12)
+
+    scratch = tempfile.mkdtemp(prefix='prompt-history-bench-')
+    cwd = os.getcwd()
+    try:
+        for pattern in prompt_tracker.TRACKED_FILES:
+            if os.path.isfile(os.path.join(ROOT, pattern)):
+                shutil.copy(os.path.join(ROOT, pattern), os.path.join(scratch, pattern))
+        os.chdir(scratch)
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for prompt in range(args.prompts):
+                number = prompt_tracker.save_snapshot_before_prompt(f'prompt {prompt}')
+                for filename, probability in EDITED_FILES:
+                    if os.path.exists(filename) and rng.random() < probability:
+                        edit_file(filename, rng)
+                prompt_tracker.save_snapshot_after_prompt(number)
+        per_prompt = (time.perf_counter() - started) / args.prompts
+        blob_bytes = directory_size(prompt_tracker.BLOB_DIR)
+
+        history = [entry['number'] for entry in prompt_tracker.get_history_list()]
+        sample = rng.sample(history, min(args.reverts, len(history)))
+        rebuild_times = []
+        revert_times = []
+        for number in sample:
+            manifest = prompt_tracker.find_entry(number)['filesBefore']
+            prompt_tracker.read_blob.cache_clear()
+            t = time.perf_counter()
+            for digest in manifest.values():
+                prompt_tracker.read_blob(digest)
+            rebuild_times.append(time.perf_counter() - t)
+
+            prompt_tracker.read_blob.cache_clear()
+            t = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                if not prompt_tracker.revert_to_before_prompt(number):
+                    raise RuntimeError(f'revert to before prompt #{number} failed')
+            revert_times.append(time.perf_counter() - t)
+
+        print(f'{args.prompts} prompts, max delta chain {args.max_chain}')
+        print(f'  blob store        {blob_bytes / 1e6:8.2f} MB')
+        print(f'  per prompt        {per_prompt * 1000:8.1f} ms (before + after snapshot)')
+        print(f'  rebuild snapshot  {percentiles(rebuild_times)}  ({len(manifest)} files, cold cache)')
+        print(f'  revert            {percentiles(revert_times)}')
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Load benchmark for the josm-helper serving modes
+
+Starts josm-helper.py (port 8001) in each serving mode and measures:
+- mixed: one slow 20 MB /export/raw upload while ping and /exports/ download
+  clients run 100 keep-alive requests each (p50/p99 latency per client type)
+- idle:  3x the worker count of keep-alive connections left open after one
+  request each, then fresh clients ping (p50/p99 latency)
+
+Usage: python benchmarks/bench_serving.py [--workers 8] [--requests 100]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HELPER = os.path.join(ROOT, 'josm-helper.py')
+PORT = 8001
+UPLOAD_BYTES = 20 * 1024 * 1024
+UPLOAD_CHUNK = 256 * 1024
+DOWNLOAD_BYTES = 200 * 1024
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summary(samples):
+    return f"p50 {percentile(samples, 50) * 1000:7.1f} ms  p99 {percentile(samples, 99) * 1000:7.1f} ms"
+
+
+def start_helper(mode, workers):
+    proc = subprocess.Popen([sys.executable, HELPER, '--mode', mode, '--workers', str(workers)],
+                            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('localhost', PORT, timeout=1)
+            conn.request('GET', '/ping')
+            conn.getresponse().read()
+            conn.close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError('josm-helper did not start')
+
+
+def request(conn, method, path, body=None, headers=None):
+    """One request on a keep-alive connection; reconnects if the server closed it"""
+    for attempt in range(2):
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            data = response.read()
+            if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                conn.close()
+            return data
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if attempt:
+                raise
+
+
+def prepare_download():
+    """Upload the file the download clients fetch"""
+    body = b'<?xml version="1.0"?><osm version="0.6">' + b' ' * DOWNLOAD_BYTES + b'</osm>'
+    conn = http.client.HTTPConnection('localhost', PORT, timeout=30)
+    data = request(conn, 'POST', '/export/raw?sequenceId=bench', body, {'Content-Type': 'application/xml'})
+    conn.close()
+    return '/exports/' + json.loads(data)['filename']
+
+
+def slow_upload():
+    """Stream a large export in paced chunks, like a big upload over a slow link"""
+    conn = http.client.HTTPConnection('localhost', PORT, timeout=60)
+    conn.putrequest('POST', '/export/raw?sequenceId=bench_upload')
+    conn.putheader('Content-Type', 'application/xml')
+    conn.putheader('Content-Length', str(UPLOAD_BYTES))
+    conn.endheaders()
+    sent = 0
+    while sent < UPLOAD_BYTES:
+        chunk = min(UPLOAD_CHUNK, UPLOAD_BYTES - sent)
+        conn.send(b' ' * chunk)
+        sent += chunk
+        time.sleep(0.01)
+    conn.getresponse().read()
+    conn.close()
+
+
+def client(path, count, samples):
+    conn = http.client.HTTPConnection('localhost', PORT, timeout=60)
+    for _ in range(count):
+        start = time.perf_counter()
+        request(conn, 'GET', path)
+        samples.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run_mixed(requests):
+    download_path = prepare_download()
+    uploader = threading.Thread(target=slow_upload)
+    uploader.start()
+    time.sleep(0.2)  # let the upload take its worker first
+    results = {'ping': [], 'download': []}
+    threads = [threading.Thread(target=client, args=('/ping', requests, results['ping'])) for _ in range(2)]
+    threads += [threading.Thread(target=client, args=(download_path, requests, results['download']))
+                for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    uploader.join()
+    return results
+
+
+def park(conn):
+    """One request, then leave the keep-alive connection open"""
+    try:
+        request(conn, 'GET', '/ping')
+    except (OSError, http.client.HTTPException):
+        pass  # the server may close idle connections to free workers
+
+
+def run_idle(workers, requests):
+    idle = []
+    for _ in range(workers * 3):
+        conn = http.client.HTTPConnection('localhost', PORT, timeout=60)
+        # Connections park without waiting on each other; in single mode they close after one response
+        threading.Thread(target=park, args=(conn,), daemon=True).start()
+        idle.append(conn)
+    time.sleep(0.2)
+    samples = []
+    for _ in range(requests):
+        conn = http.client.HTTPConnection('localhost', PORT, timeout=60)
+        start = time.perf_counter()
+        request(conn, 'GET', '/ping')
+        samples.append(time.perf_counter() - start)
+        conn.close()
+    for conn in idle:
+        conn.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100)
+    args = parser.parse_args()
+
+    for mode in ('single', 'threaded'):
+        proc = start_helper(mode, args.workers)
+        try:
+            mixed = run_mixed(args.requests)
+            idle = run_idle(args.workers, args.requests)
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{mode}:")
+        print(f"  mixed ping      {summary(mixed['ping'])}")
+        print(f"  mixed download  {summary(mixed['download'])}")
+        print(f"  idle ping       {summary(idle)}  ({args.workers * 3} idle keep-alive connections)")
+    print(f"Files written to {os.path.join(ROOT, 'exports')} (sequence_bench*.osm) can be deleted.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+// Memory and undo-time benchmark for the edit history of TaskManager (app.js)
+//
+// Loads TaskManager headless in Node with minimal Leaflet stand-ins (LatLng, Polyline, Polygon,
+// Marker) and builds a 20k-vertex scene: 200 layers of 100 vertices, every 20th a polygon, plus a
+// marker. It then records 100 edits cycling through drag, insert, delete, split and merge, and
+// undoes back to the start. Reports save time per edit, heap held by the history (needs
+// --expose-gc) and time per undo.
+//
+// --check keeps every edit in history and compares the scene after each undo and redo with the
+// state recorded when that entry was saved (timings are then not reported). Pass another app.js
+// (e.g. from `git show REV:app.js`) to compare versions; --vertex-edits leaves out splits and
+// merges, which versions that restored history by layer index cannot undo.
+//
+// Usage: node --expose-gc benchmarks/bench_undo_history.js [--check] [--vertex-edits] [app.js]
+
+const fs = require('fs');
+const path = require('path');
+
+const args = process.argv.slice(2);
+const check = args.includes('--check');
+const vertexEditsOnly = args.includes('--vertex-edits');
+const appFile = args.find(arg => !arg.startsWith('--')) || path.join(__dirname, '..', 'app.js');
+
+// ---- Leaflet stand-ins ----
+
+class LatLng { constructor(lat, lng) { this.lat = lat; this.lng = lng; } }
+class Layer { addTo(map) { map.layers.add(this); return this; } }
+class Polyline extends Layer {
+    constructor(latlngs) { super(); this._latlngs = latlngs.slice(); }
+    getLatLngs() { return this._latlngs; }
+    setLatLngs(latlngs) { this._latlngs = latlngs.slice(); return this; }
+}
+class Polygon extends Polyline {
+    constructor(latlngs) { super(latlngs); this._latlngs = [latlngs.slice()]; }
+    setLatLngs(latlngs) { this._latlngs = [Array.isArray(latlngs[0]) ? latlngs[0].slice() : latlngs.slice()]; return this; }
+}
+class Marker extends Layer {
+    constructor(latlng) { super(); this._latlng = latlng; }
+    getLatLng() { return this._latlng; }
+    setLatLng(latlng) { this._latlng = latlng; }
+}
+const L = { LatLng, Polyline, Polygon, Marker, latLng: (lat, lng) => new LatLng(lat, lng) };
+const quietConsole = { log() {}, warn() {}, error: console.error };
+const document = { getElementById: () => null, addEventListener() {} };
+
+const source = fs.readFileSync(appFile, 'utf8').replace(/document\.addEventListener\('DOMContentLoaded'[\s\S]*$/, '');
+const TaskManager = new Function('L', 'console', 'document', 'window', source + '\nreturn TaskManager;')(
+    L, quietConsole, document, { location: { hostname: 'localhost' } });
+
+// ---- scene ----
+
+let seed = 3;
+const random = () => (seed = (seed * 16807) % 2147483647) / 2147483647;
+const map = {
+    layers: new Set(),
+    removeLayer(layer) { this.layers.delete(layer); },
+    hasLayer(layer) { return this.layers.has(layer); }
+};
+const tm = Object.create(TaskManager.prototype);
+Object.assign(tm, {
+    map: map, editableLayers: [], editHistory: [], currentHistoryIndex: -1, maxHistorySize: check ? 101 : 50,
+    historyBase: new Map(), historyLayers: [], vertexHandles: { remove() {} }
+});
+let layersRedrawn = 0;
+tm.updateVertexMarkers = () => { layersRedrawn++; };
+tm.updateUndoRedoButtons = () => {};
+
+for (let l = 0; l < 200; l++) {
+    let lat = 1.3 + random() * 0.05;
+    let lng = 103.8 + random() * 0.05;
+    const points = [];
+    for (let i = 0; i < 100; i++) {
+        points.push(new LatLng(lat, lng));
+        lat += (random() - 0.5) * 0.0002;
+        lng += (random() - 0.5) * 0.0002;
+    }
+    tm.editableLayers.push((l % 20 === 0 ? new Polygon(points) : new Polyline(points)).addTo(map));
+}
+const marker = new Marker(new LatLng(1.31, 103.81)).addTo(map);
+tm.editableLayers.push(marker);
+
+const flat = layer => (layer instanceof Polygon ? layer.getLatLngs()[0] : layer.getLatLngs());
+const scene = () => JSON.stringify(tm.editableLayers.map(layer => (layer instanceof Marker
+    ? [layer.getLatLng().lat, layer.getLatLng().lng] : flat(layer).map(p => [p.lat, p.lng]))));
+const vertices = tm.editableLayers.reduce((count, layer) => count + (layer instanceof Polyline ? flat(layer).length : 0), 0);
+const layerCount = tm.editableLayers.length;
+const lines = () => tm.editableLayers.filter(layer => layer instanceof Polyline && !(layer instanceof Polygon));
+
+// ---- 100 edits ----
+
+if (global.gc) global.gc();
+const heapBefore = process.memoryUsage().heapUsed;
+tm._doSaveStateToHistory();
+const scenes = [scene()];
+let saveNs = 0n;
+const edits = 100;
+for (let e = 0; e < edits; e++) {
+    const candidates = lines();
+    const layer = candidates[Math.floor(random() * candidates.length)];
+    const points = flat(layer).slice();
+    const i = 1 + Math.floor(random() * (points.length - 2));
+    switch (e % (vertexEditsOnly ? 4 : 6)) {
+        case 0:
+        case 1: // drag, moving the shared LatLng in place
+            points[i].lat += 0.00001;
+            layer.setLatLngs(points);
+            break;
+        case 2: // insert
+            points.splice(i, 0, new LatLng(points[i].lat + 1e-5, points[i].lng));
+            layer.setLatLngs(points);
+            break;
+        case 3: // delete
+            points.splice(i, 1);
+            layer.setLatLngs(points);
+            break;
+        case 4: // split
+            layer.setLatLngs(points.slice(0, i + 1));
+            tm.editableLayers.push(new Polyline(points.slice(i)).addTo(map));
+            break;
+        default: { // merge, and move the marker
+            const other = candidates.find(candidate => candidate !== layer);
+            layer.setLatLngs(points.concat(flat(other)));
+            map.removeLayer(other);
+            tm.editableLayers.splice(tm.editableLayers.indexOf(other), 1);
+            marker.setLatLng(new LatLng(marker.getLatLng().lat + 1e-5, marker.getLatLng().lng));
+        }
+    }
+    const started = process.hrtime.bigint();
+    tm._doSaveStateToHistory();
+    saveNs += process.hrtime.bigint() - started;
+    if (check) scenes.push(scene());
+}
+if (global.gc) global.gc();
+const historyHeap = process.memoryUsage().heapUsed - heapBefore;
+
+// ---- undo everything ----
+
+let mismatches = 0;
+let undos = 0;
+layersRedrawn = 0;
+const undoStarted = process.hrtime.bigint();
+while (tm.currentHistoryIndex > 0) {
+    tm.undo();
+    undos++;
+    if (check && scene() !== scenes[tm.currentHistoryIndex]) mismatches++;
+}
+const undoMs = Number(process.hrtime.bigint() - undoStarted) / 1e6 / undos;
+const redrawnPerUndo = layersRedrawn / undos;
+
+console.log(`Edit history, ${vertices} vertices in ${layerCount} layers, ${edits} ` +
+    `${vertexEditsOnly ? 'vertex edits' : 'edits'} (${path.relative(process.cwd(), appFile)})`);
+if (check) {
+    let redos = 0;
+    while (tm.currentHistoryIndex < tm.editHistory.length - 1) {
+        tm.redo();
+        redos++;
+        if (scene() !== scenes[tm.currentHistoryIndex]) mismatches++;
+    }
+    const inMap = tm.editableLayers.every(layer => map.hasLayer(layer)) && map.layers.size === tm.editableLayers.length;
+    console.log(`  check             ${undos} undos + ${redos} redos, ${mismatches} mismatches, map matches editable layers: ${inMap}`);
+} else {
+    console.log(`  save              ${(Number(saveNs) / 1e6 / edits).toFixed(3)} ms/edit`);
+    console.log(`  history heap      ${global.gc ? (historyHeap / 1e6).toFixed(1) + ' MB' : 'n/a (run with --expose-gc)'} (${tm.editHistory.length} entries)`);
+    console.log(`  undo              ${undoMs.toFixed(3)} ms (${redrawnPerUndo.toFixed(1)} layers redrawn per undo)`);
+}
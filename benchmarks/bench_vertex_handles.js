@@ -0,0 +1,110 @@
+// Timing benchmark for VertexHandleLayer (app.js) on a 10k-vertex trace
+//
+// Runs the class headless in Node: Leaflet, the canvas context and Path2D are replaced by stubs
+// that count draw calls, so the numbers are script time only (no rasterisation).
+// Measures: update + full draw, full redraw, hit-testing, and one drag frame (pointer move +
+// partial redraw) - the part that has to fit in a 16 ms frame for 60 fps.
+//
+// Usage: node benchmarks/bench_vertex_handles.js [vertexCount]
+
+const fs = require('fs');
+const path = require('path');
+
+const source = fs.readFileSync(path.join(__dirname, '..', 'app.js'), 'utf8');
+const start = source.indexOf('class VertexHandleLayer');
+const end = source.indexOf('// Scrolling list that keeps only the rows in view');
+if (start < 0 || end < 0) throw new Error('VertexHandleLayer not found in app.js');
+
+// ---- stubs ----
+
+const calls = { fill: 0, arc: 0, clearRect: 0 };
+class Path2D { moveTo() {} arc() { calls.arc++; } }
+const context = {
+    save() {}, restore() {}, beginPath() {}, rect() {}, clip() {}, moveTo() {}, lineTo() {}, stroke() {},
+    setLineDash() {}, fillText() {}, setTransform() {},
+    clearRect() { calls.clearRect++; }, fill() { calls.fill++; }
+};
+class Point {
+    constructor(x, y) { this.x = x; this.y = y; }
+    add(p) { return new Point(this.x + p.x, this.y + p.y); }
+    subtract(p) { return new Point(this.x - p.x, this.y - p.y); }
+    multiplyBy(k) { return new Point(this.x * k, this.y * k); }
+    round() { return new Point(Math.round(this.x), Math.round(this.y)); }
+}
+const element = () => ({ style: {}, classList: { toggle() {} }, addEventListener() {}, getContext: () => context });
+const container = element();
+const ZOOM_SCALE = 2 ** 18 * 256 / 360; // px per degree at zoom 18 (equirectangular is close enough here)
+const map = {
+    on() {}, getPane() { return null; }, createPane: element, getContainer: () => container,
+    getSize: () => new Point(1200, 800), getPixelOrigin: () => new Point(0, 0), getZoom: () => 18,
+    latLngToLayerPoint: (ll) => new Point(Math.round(ll.lng * ZOOM_SCALE), Math.round(-ll.lat * ZOOM_SCALE)),
+    containerPointToLayerPoint: (p) => (Array.isArray(p) ? new Point(p[0], p[1]) : p),
+    containerPointToLatLng(p) { const l = this.containerPointToLayerPoint(p); return { lat: -l.y / ZOOM_SCALE, lng: l.x / ZOOM_SCALE }; },
+    mouseEventToContainerPoint: (e) => new Point(e.clientX, e.clientY)
+};
+const L = { point: (x, y) => new Point(x, y), DomUtil: { create: element, setPosition() {} }, Polygon: class {} };
+const frames = [];
+const window = { devicePixelRatio: 1 };
+const requestAnimationFrame = (callback) => frames.push(callback);
+const cancelAnimationFrame = () => {};
+const document = { addEventListener() {}, removeEventListener() {} };
+const flushFrames = () => frames.splice(0).forEach(callback => callback());
+
+const VertexHandleLayer = new Function('L', 'Path2D', 'window', 'requestAnimationFrame', 'cancelAnimationFrame', 'document',
+    source.slice(start, end) + '; return VertexHandleLayer;')(L, Path2D, window, requestAnimationFrame, cancelAnimationFrame, document);
+
+// ---- scene: a trace crossing about three screens at ~2.5 px spacing ----
+
+const count = parseInt(process.argv[2], 10) || 10000;
+const latlngs = [];
+for (let i = 0; i < count; i++) {
+    latlngs.push({ lat: -(400 + Math.sin(i / 50) * 300) / ZOOM_SCALE, lng: (i * 0.35 - 600) / ZOOM_SCALE });
+}
+const layer = {};
+let clicked = null;
+let dropped = null;
+const handles = new VertexHandleLayer(map, {
+    styleOf: () => ({ color: '#ff0000', radius: VertexHandleLayer.RADIUS, glyph: null, draggable: true }),
+    onClick: (l, index) => { clicked = index; },
+    onDragStart() {},
+    onDragEnd: (l, index) => { dropped = index; }
+});
+
+function time(fn, runs) {
+    fn(); // warm-up
+    const started = process.hrtime.bigint();
+    for (let i = 0; i < runs; i++) fn();
+    return Number(process.hrtime.bigint() - started) / 1e6 / runs;
+}
+const pointerEvent = (x, y) => ({ clientX: x, clientY: y, button: 0, stopPropagation() {}, preventDefault() {} });
+
+const updateMs = time(() => { handles.update(layer, latlngs); flushFrames(); }, 20);
+const drawMs = time(() => handles.draw(), 20);
+
+const probes = [];
+for (let i = 0; i < 1000; i++) {
+    const p = map.latLngToLayerPoint(latlngs[(i * 7) % count]);
+    probes.push(new Point(p.x + 1, p.y - 1));
+}
+const hitUs = time(() => probes.forEach(p => handles.hitTest(p)), 50) / probes.length * 1000;
+
+const target = Math.floor(count / 2);
+const p0 = map.latLngToLayerPoint(latlngs[target]);
+handles.handlePress(pointerEvent(p0.x, p0.y));
+let step = 0;
+calls.arc = 0;
+const dragRuns = 200;
+const dragMs = time(() => { step++; handles.handleMove(pointerEvent(p0.x + 10 + step % 30, p0.y + 10)); flushFrames(); }, dragRuns);
+const arcsPerFrame = calls.arc / (dragRuns + 1);
+handles.handleRelease(pointerEvent(p0.x + 20, p0.y + 10));
+
+const p1 = map.latLngToLayerPoint(latlngs[100]);
+handles.handlePress(pointerEvent(p1.x, p1.y));
+handles.handleRelease(pointerEvent(p1.x, p1.y));
+
+console.log(`VertexHandleLayer, ${count} vertices`);
+console.log(`  update + draw     ${updateMs.toFixed(2)} ms`);
+console.log(`  full redraw       ${drawMs.toFixed(2)} ms`);
+console.log(`  hit test          ${hitUs.toFixed(2)} us`);
+console.log(`  drag frame        ${dragMs.toFixed(3)} ms (${arcsPerFrame.toFixed(0)} handles redrawn)`);
+console.log(`  drag dropped vertex ${dropped}, click hit vertex ${clicked}`);
@@ -0,0 +1,270 @@
+// Rendering benchmark for the All Tasks and Done/Skipped lists of TaskManager (app.js)
+//
+// Loads TaskManager headless in Node on a small DOM stand-in (element tree, innerHTML parsing,
+// classList, dataset and style; no layout, the list viewport is 1000x700 px) with 100k sequences,
+// a third of them done and a third skipped. Measures the first render of the All view, search
+// keystrokes, scroll frames, the first render of the Done view and a status change there, and
+// counts the elements created. Then checks that navigating to a sequence far down the Done list
+// renders and highlights it, and that a status change through its row's select is applied.
+//
+// Pass another app.js (e.g. from `git show REV:app.js`) to compare versions; the scroll and
+// navigation checks need VirtualList and are skipped without it.
+//
+// Usage: node benchmarks/bench_virtual_list.js [app.js]
+
+const fs = require('fs');
+const path = require('path');
+
+const appFile = process.argv[2] || path.join(__dirname, '..', 'app.js');
+
+// ---- DOM stand-in ----
+
+let elementsCreated = 0;
+
+class ClassList {
+    constructor(element) { this.element = element; }
+    get names() { return new Set(this.element.className.split(/\s+/).filter(Boolean)); }
+    add(name) { const names = this.names; names.add(name); this.element.className = [...names].join(' '); }
+    remove(name) { const names = this.names; names.delete(name); this.element.className = [...names].join(' '); }
+    contains(name) { return this.names.has(name); }
+    toggle(name, force) {
+        if (force === undefined) force = !this.contains(name);
+        if (force) this.add(name); else this.remove(name);
+        return force;
+    }
+}
+
+class Element {
+    constructor(tag) {
+        elementsCreated++;
+        this.tagName = tag.toUpperCase();
+        this.children = [];
+        this.parentNode = null;
+        this.attributes = {};
+        this.className = '';
+        this.style = {};
+        this.dataset = {};
+        this.text = '';
+        this.listeners = {};
+        this.hidden = false;
+        this.value = '';
+        this.scrollTop = 0;
+        this.clientWidth = 0;
+        this.clientHeight = 0;
+        this.classList = new ClassList(this);
+    }
+
+    get id() { return this.attributes.id || ''; }
+
+    setAttribute(name, value) {
+        this.attributes[name] = value;
+        if (name === 'class') this.className = value;
+        if (name === 'value') this.value = value;
+        if (name.startsWith('data-')) this.dataset[name.slice(5).replace(/-(\w)/g, (_, c) => c.toUpperCase())] = value;
+        // The list viewport gets a size, as if laid out
+        if (name === 'class' && /sequence-list/.test(value)) {
+            this.clientWidth = 1000;
+            this.clientHeight = 700;
+        }
+    }
+
+    appendChild(child) {
+        child.parentNode = this;
+        this.children.push(child);
+        return child;
+    }
+
+    get firstElementChild() { return this.children[0] || null; }
+    set textContent(text) { this.children = []; this.text = String(text); }
+    get textContent() { return this.text + this.children.map(child => child.textContent).join(''); }
+    set innerHTML(html) { this.children = []; this.text = ''; parseHtml(html, this); }
+
+    addEventListener(type, listener) { (this.listeners[type] = this.listeners[type] || []).push(listener); }
+    removeEventListener() {}
+
+    dispatch(type, event) {
+        // Bubbles from event.target up through its ancestors
+        for (let node = event.target; node; node = node.parentNode) {
+            (node.listeners[type] || []).forEach(listener => listener(event));
+        }
+    }
+
+    matches(selector) {
+        if (selector.startsWith('.')) return this.classList.contains(selector.slice(1));
+        if (selector.startsWith('#')) return this.id === selector.slice(1);
+        const sequence = selector.match(/^\[data-sequence-id="(.*)"\]$/);
+        if (sequence) return this.dataset.sequenceId === sequence[1];
+        return this.tagName === selector.toUpperCase();
+    }
+
+    closest(selector) {
+        for (let node = this; node; node = node.parentNode) {
+            if (node.matches(selector)) return node;
+        }
+        return null;
+    }
+
+    querySelector(selector) {
+        for (const child of this.children) {
+            if (child.matches(selector)) return child;
+            const found = child.querySelector(selector);
+            if (found) return found;
+        }
+        return null;
+    }
+
+    contains(node) {
+        for (; node; node = node.parentNode) {
+            if (node === this) return true;
+        }
+        return false;
+    }
+
+    focus() {}
+    setSelectionRange() {}
+    scrollIntoView() {}
+}
+
+function parseHtml(html, root) {
+    const stack = [root];
+    const token = /<(\/?)([\w-]+)((?:\s+[\w-]+(?:\s*=\s*(?:"[^"]*"|'[^']*'))?)*)\s*(\/?)>|([^<]+)/g;
+    let match;
+    while ((match = token.exec(html))) {
+        if (match[5] !== undefined) {
+            if (match[5].trim()) stack[stack.length - 1].text += match[5].trim();
+            continue;
+        }
+        if (match[1]) {
+            stack.pop();
+            continue;
+        }
+        const element = new Element(match[2]);
+        match[3].replace(/([\w-]+)(?:\s*=\s*("([^"]*)"|'([^']*)'))?/g, (_, name, quoted, double, single) => {
+            element.setAttribute(name, double !== undefined ? double : (single !== undefined ? single : ''));
+        });
+        stack[stack.length - 1].appendChild(element);
+        if (!match[4] && !/^(input|br|img)$/i.test(match[2])) stack.push(element);
+    }
+}
+
+const countNodes = (node) => node.children.reduce((count, child) => count + countNodes(child), 1);
+
+const body = new Element('body');
+const document = {
+    body: body,
+    createElement: (tag) => new Element(tag),
+    getElementById(id) {
+        const find = (node) => {
+            if (node.id === id) return node;
+            for (const child of node.children) {
+                const found = find(child);
+                if (found) return found;
+            }
+            return null;
+        };
+        return find(body);
+    },
+    querySelector: (selector) => body.querySelector(selector),
+    querySelectorAll: () => [],
+    addEventListener() {},
+    activeElement: null
+};
+const display = document.createElement('div');
+display.setAttribute('id', 'taskDisplay');
+body.appendChild(display);
+['prevBtn', 'nextBtn', 'taskCounter'].forEach(id => {
+    const element = document.createElement('div');
+    element.setAttribute('id', id);
+    body.appendChild(element);
+});
+
+Object.assign(global, {
+    document: document,
+    window: { location: { hostname: 'localhost', protocol: 'file:', port: '' }, innerHeight: 800, addEventListener() {} },
+    navigator: {},
+    requestAnimationFrame: (callback) => setTimeout(callback, 0)
+});
+const ingest = new Function(fs.readFileSync(path.join(__dirname, '..', 'ingest-worker.js'), 'utf8') +
+    ';return { PackedGeometry, Ingest };')();
+global.PackedGeometry = ingest.PackedGeometry;
+global.Ingest = ingest.Ingest;
+
+// ---- TaskManager ----
+
+const storageManager = {
+    queueSequences() {}, queueTaskData() {}, scheduleFlush: () => Promise.resolve(),
+    saveTaskData: async () => {}, saveGeoJSONData: async () => {}
+};
+const source = fs.readFileSync(appFile, 'utf8').replace(/document\.addEventListener\('DOMContentLoaded'[\s\S]*$/, '');
+const loaded = new Function('storageManager', 'console', source +
+    ';return { TaskManager, VirtualList: typeof VirtualList !== "undefined" ? VirtualList : null };')(
+    storageManager, { log() {}, warn() {}, error: console.error });
+global.VirtualList = loaded.VirtualList;
+
+const tm = Object.create(loaded.TaskManager.prototype);
+Object.assign(tm, {
+    sequences: [], allTasksSearchTerm: '', currentView: 'all', currentIndex: 0, sequenceList: null, navigatingToSequenceId: null
+});
+tm.updateSummary = () => {};
+tm.saveToStorage = () => Promise.resolve();
+const count = 100000;
+for (let i = 0; i < count; i++) {
+    tm.sequences.push({ id: String(1000000 + i), status: ['done', 'skipped', ''][i % 3], features: [] });
+}
+
+const time = (fn) => {
+    const started = performance.now();
+    fn();
+    return performance.now() - started;
+};
+const median = (samples) => samples.sort((a, b) => a - b)[samples.length >> 1];
+
+// ---- runs ----
+
+let created = elementsCreated;
+const allMs = time(() => tm.renderCurrentTask());
+const allCreated = elementsCreated - created;
+
+const searchMs = median(['10', '100', '1000', '10001', '100012'].map(term => time(() => tm.handleAllTasksSearch(term))));
+tm.handleAllTasksSearch('');
+
+const viewport = document.querySelector('.sequence-list');
+let scroll = 'n/a (no VirtualList)';
+if (loaded.VirtualList) {
+    const frames = [];
+    created = elementsCreated;
+    for (let k = 0; k < 300; k++) {
+        viewport.scrollTop = k * 137;
+        frames.push(time(() => viewport.dispatch('scroll', { target: viewport })));
+    }
+    scroll = `${median(frames).toFixed(3)} ms (${elementsCreated - created} elements created in 300 frames)`;
+}
+
+tm.currentView = 'done';
+created = elementsCreated;
+const doneMs = time(() => tm.renderCurrentTask());
+const doneCreated = elementsCreated - created;
+const done = tm.getCurrentViewSequences();
+const statusMs = median([0, 1, 2, 3, 4].map(k => time(() => tm.updateStatus(done[k * 7].id, ''))));
+
+console.log(`Sequence lists, ${count} sequences (${path.relative(process.cwd(), appFile)})`);
+console.log(`  All first render   ${allMs.toFixed(0)} ms (${allCreated} elements)`);
+console.log(`  search keystroke   ${searchMs.toFixed(1)} ms`);
+console.log(`  scroll frame       ${scroll}`);
+console.log(`  Done first render  ${doneMs.toFixed(0)} ms (${doneCreated} elements)`);
+console.log(`  status change      ${statusMs.toFixed(1)} ms`);
+console.log(`  live DOM nodes     ${countNodes(display)}`);
+
+if (loaded.VirtualList) {
+    const target = done[5000];
+    tm.navigatingToSequenceId = target.id;
+    tm.renderCurrentTask();
+    const list = document.querySelector('.sequence-list-with-status');
+    const row = list.children[0].children.find(element => !element.hidden && element.dataset.sequenceId === target.id);
+    console.log(`  navigate to #5000  rendered and highlighted: ${Boolean(row && row.classList.contains('highlighted'))}`);
+    const select = row.querySelector('select');
+    select.value = '';
+    list.dispatch('change', { target: select });
+    const applied = target.status === '' && !tm.getCurrentViewSequences().some(sequence => sequence.id === target.id);
+    console.log(`  status via select  applied and row left the Done list: ${applied}`);
+}
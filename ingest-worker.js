@@ -0,0 +1,614 @@
+// File import for the task manager: CSV, GPX and GeoJSON files are parsed and grouped into
+// sequences here, inside the Web Workers started by TaskManager.ingestFiles (app.js).
+// index.html also loads this file as a plain script - for PackedGeometry, and to run the same
+// import on the main thread when workers are unavailable (e.g. the page opened from file://).
+
+// Point or LineString geometry whose coordinates live in a Float64Array of lon, lat pairs.
+// The nested GeoJSON arrays are only built when something reads `coordinates`. Structured
+// clone (postMessage, IndexedDB) keeps just type and packed; JSON.stringify writes plain GeoJSON.
+class PackedGeometry {
+    constructor(type, packed) {
+        this.type = type;
+        this.packed = packed;
+        Object.defineProperty(this, '_coordinates', { value: null, writable: true });
+    }
+
+    static pack(type, coordinates) {
+        if (type === 'Point') {
+            return Float64Array.of(coordinates[0], coordinates[1]);
+        }
+        const packed = new Float64Array(coordinates.length * 2);
+        coordinates.forEach((coord, i) => {
+            packed[i * 2] = coord[0];
+            packed[i * 2 + 1] = coord[1];
+        });
+        return packed;
+    }
+
+    static revive(geometry) {
+        // Stored copies come back as plain { type, packed } objects
+        if (geometry && !(geometry instanceof PackedGeometry) && geometry.packed instanceof Float64Array) {
+            return new PackedGeometry(geometry.type, geometry.packed);
+        }
+        return geometry;
+    }
+
+    get pointCount() {
+        return this.packed.length / 2;
+    }
+
+    get coordinates() {
+        if (!this._coordinates) {
+            const packed = this.packed;
+            if (this.type === 'Point') {
+                this._coordinates = [packed[0], packed[1]];
+            } else {
+                const coordinates = new Array(packed.length / 2);
+                for (let i = 0; i < coordinates.length; i++) {
+                    coordinates[i] = [packed[i * 2], packed[i * 2 + 1]];
+                }
+                this._coordinates = coordinates;
+            }
+        }
+        return this._coordinates;
+    }
+
+    set coordinates(coordinates) {
+        this.packed = PackedGeometry.pack(this.type, coordinates);
+        this._coordinates = coordinates;
+    }
+
+    toJSON() {
+        return { type: this.type, coordinates: this.coordinates };
+    }
+}
+
+const Ingest = {
+    PROGRESS_ROWS: 20000, // rows between progress reports (and main-thread yields)
+
+    async ingestFile(file, onProgress = null, pause = null) {
+        // Sequences of one file: [{ id, features, featureCount, nodeCount, wayCount }]
+        const text = await file.text();
+        const fileName = file.name.toLowerCase();
+        let features;
+        if (fileName.endsWith('.gpx')) {
+            features = Ingest.parseGPX(text);
+        } else if (fileName.endsWith('.csv')) {
+            features = await Ingest.parseCSV(text, onProgress, pause);
+        } else {
+            // Assume GeoJSON
+            features = Ingest.parseGeoJSON(text);
+        }
+        if (onProgress) onProgress(1);
+        return Ingest.groupSequences(features);
+    },
+
+    sequenceIdOf(feature) {
+        return String(
+            feature.properties?.sequence_id ||
+            feature.properties?.sequenceId ||
+            feature.properties?.sequence ||
+            feature.properties?.id ||
+            feature.properties?.seq ||
+            `sequence_${feature.properties?.id || Math.random().toString(36).substr(2, 9)}`
+        );
+    },
+
+    groupSequences(features) {
+        // Group features by sequence ID, with the stats the task list shows
+        const sequenceMap = new Map();
+        features.forEach(feature => {
+            const sequenceId = Ingest.sequenceIdOf(feature);
+            if (!sequenceMap.has(sequenceId)) {
+                sequenceMap.set(sequenceId, { id: sequenceId, features: [] });
+            }
+            sequenceMap.get(sequenceId).features.push(feature);
+        });
+        return Array.from(sequenceMap.values()).map(sequence => {
+            const stats = Ingest.calculateStats(sequence.features);
+            return {
+                id: sequence.id,
+                features: sequence.features,
+                featureCount: stats.features,
+                nodeCount: stats.nodes,
+                wayCount: stats.ways
+            };
+        });
+    },
+
+    calculateStats(features) {
+        let nodes = 0;
+        let ways = 0;
+
+        features.forEach(feature => {
+            const geometry = feature.geometry;
+            if (!geometry) return;
+            if (geometry instanceof PackedGeometry) {
+                if (geometry.type === 'Point') {
+                    nodes++;
+                } else {
+                    ways++;
+                    nodes += geometry.pointCount || 1;
+                }
+            } else if (geometry.type === 'Point') {
+                nodes++;
+            } else if (geometry.type === 'LineString' || geometry.type === 'MultiLineString') {
+                ways++;
+                if (geometry.coordinates) {
+                    if (Array.isArray(geometry.coordinates[0])) {
+                        nodes += geometry.coordinates.length;
+                    } else {
+                        nodes += 1;
+                    }
+                }
+            } else if (geometry.type === 'Polygon' || geometry.type === 'MultiPolygon') {
+                ways++;
+                if (geometry.coordinates && geometry.coordinates[0]) {
+                    nodes += geometry.coordinates[0].length;
+                }
+            }
+        });
+
+        return {
+            features: features.length,
+            nodes: nodes,
+            ways: ways
+        };
+    },
+
+    packSequences(sequences) {
+        // One Float64Array per sequence holding the coordinates of all its packed features;
+        // features keep their slice as [start, end). The buffers are transferred, not copied.
+        const transfer = [];
+        const packedSequences = sequences.map(sequence => {
+            let length = 0;
+            sequence.features.forEach(feature => {
+                if (feature.geometry instanceof PackedGeometry) length += feature.geometry.packed.length;
+            });
+            const packed = new Float64Array(length);
+            let offset = 0;
+            const features = sequence.features.map(feature => {
+                const geometry = feature.geometry;
+                if (!(geometry instanceof PackedGeometry)) {
+                    return { properties: feature.properties, geometry: geometry };
+                }
+                packed.set(geometry.packed, offset);
+                offset += geometry.packed.length;
+                return { properties: feature.properties, geometryType: geometry.type, start: offset - geometry.packed.length, end: offset };
+            });
+            transfer.push(packed.buffer);
+            return { ...sequence, features: features, packed: packed };
+        });
+        return { sequences: packedSequences, transfer: transfer };
+    },
+
+    unpackSequences(sequences) {
+        // Features over views of each sequence's buffer (the reverse of packSequences)
+        return sequences.map(sequence => ({
+            id: sequence.id,
+            featureCount: sequence.featureCount,
+            nodeCount: sequence.nodeCount,
+            wayCount: sequence.wayCount,
+            features: sequence.features.map(feature => ({
+                type: 'Feature',
+                geometry: feature.geometryType
+                    ? new PackedGeometry(feature.geometryType, sequence.packed.subarray(feature.start, feature.end))
+                    : feature.geometry,
+                properties: feature.properties
+            }))
+        }));
+    },
+
+    parseGeoJSON(text) {
+        const geojson = JSON.parse(text);
+        if (!geojson || !Array.isArray(geojson.features)) {
+            throw new Error('Invalid GeoJSON structure - missing features array');
+        }
+        return geojson.features.map(feature => {
+            // Points and lines are packed; other geometries stay as they are
+            const geometry = feature.geometry;
+            const packable = geometry && Array.isArray(geometry.coordinates) && (
+                (geometry.type === 'Point' && typeof geometry.coordinates[0] === 'number') ||
+                (geometry.type === 'LineString' && geometry.coordinates.length > 0 &&
+                 geometry.coordinates.every(coord => Array.isArray(coord) && coord.length === 2 &&
+                    typeof coord[0] === 'number' && typeof coord[1] === 'number')));
+            if (!packable) return feature;
+            return { ...feature, geometry: new PackedGeometry(geometry.type, PackedGeometry.pack(geometry.type, geometry.coordinates)) };
+        });
+    },
+
+    parseCSVLine(line) {
+        // Simple CSV parser that handles quoted fields
+        const result = [];
+        let current = '';
+        let inQuotes = false;
+
+        for (let i = 0; i < line.length; i++) {
+            const char = line[i];
+
+            if (char === '"') {
+                inQuotes = !inQuotes;
+            } else if (char === ',' && !inQuotes) {
+                result.push(current.trim());
+                current = '';
+            } else {
+                current += char;
+            }
+        }
+        result.push(current.trim());
+
+        return result;
+    },
+
+    // Geohash decoder
+    decodeGeohash(geohash) {
+        const base32 = '0123456789bcdefghjkmnpqrstuvwxyz';
+        let even = true;
+        let latMin = -90.0, latMax = 90.0;
+        let lonMin = -180.0, lonMax = 180.0;
+
+        for (let i = 0; i < geohash.length; i++) {
+            const char = geohash[i].toLowerCase();
+            const val = base32.indexOf(char);
+            if (val === -1) return null;
+
+            for (let j = 4; j >= 0; j--) {
+                const bitVal = (val >> j) & 1;
+                if (even) {
+                    const lonMid = (lonMin + lonMax) / 2;
+                    if (bitVal === 1) {
+                        lonMin = lonMid;
+                    } else {
+                        lonMax = lonMid;
+                    }
+                } else {
+                    const latMid = (latMin + latMax) / 2;
+                    if (bitVal === 1) {
+                        latMin = latMid;
+                    } else {
+                        latMax = latMid;
+                    }
+                }
+                even = !even;
+            }
+        }
+
+        const lat = (latMin + latMax) / 2;
+        const lon = (lonMin + lonMax) / 2;
+
+        return { lat, lon };
+    },
+
+    async parseCSV(csvText, onProgress = null, pause = null) {
+        // One feature per sequence: rows grouped by sequence ID, coordinates packed as lon, lat
+        const lines = csvText.split('\n').filter(line => line.trim());
+        if (lines.length < 2) {
+            throw new Error('CSV file must have at least a header row and one data row');
+        }
+
+        // Parse header
+        const header = Ingest.parseCSVLine(lines[0]);
+
+        // Find columns (case-insensitive)
+        let latLongArrayIndex = -1;
+        let latIndex = -1;
+        let lonIndex = -1;
+        let geohashIndex = -1;
+        let sequenceIdIndex = -1;
+
+        const latLongArrayNames = ['lat_long_array', 'latlongarray', 'coordinates', 'coords', 'points'];
+        const latNames = ['lat', 'latitude', 'y', 'ycoord'];
+        const lonNames = ['lon', 'lng', 'longitude', 'long', 'x', 'xcoord'];
+        const geohashNames = ['geohash', 'geohash_code', 'hash'];
+        const seqIdNames = ['offroad_sequence_id', 'sequence_id', 'sequenceid', 'sequence', 'seq', 'id', 'sample_bookings'];
+
+        header.forEach((col, index) => {
+            const colLower = col.toLowerCase().trim();
+            if (latLongArrayIndex === -1 && latLongArrayNames.some(name => colLower === name)) {
+                latLongArrayIndex = index;
+            }
+            if (latIndex === -1 && latNames.some(name => colLower.includes(name))) {
+                latIndex = index;
+            }
+            if (lonIndex === -1 && lonNames.some(name => colLower.includes(name))) {
+                lonIndex = index;
+            }
+            if (geohashIndex === -1 && geohashNames.some(name => colLower === name)) {
+                geohashIndex = index;
+            }
+            if (sequenceIdIndex === -1 && seqIdNames.some(name => colLower === name)) {
+                sequenceIdIndex = index;
+            }
+        });
+
+        // Check if we have lat_long_array format, separate lat/lon columns, or geohash
+        if (latLongArrayIndex === -1 && (latIndex === -1 || lonIndex === -1) && geohashIndex === -1) {
+            throw new Error('CSV must contain either:\n1. A lat_long_array column with coordinate arrays, OR\n2. Separate latitude and longitude columns, OR\n3. A geohash column');
+        }
+        const groupIndex = header.findIndex(col => col.toLowerCase().trim() === 'group');
+
+        // Group rows by sequence ID
+        const sequenceMap = new Map();
+        const totalRows = lines.length - 1;
+
+        for (let i = 1; i < lines.length; i++) {
+            if (i % Ingest.PROGRESS_ROWS === 0) {
+                if (onProgress) onProgress(i / totalRows);
+                if (pause) await pause();
+            }
+
+            const row = Ingest.parseCSVLine(lines[i]);
+            if (row.length === 0) continue;
+
+            // Get sequence ID
+            let sequenceId;
+            if (sequenceIdIndex >= 0 && row[sequenceIdIndex] && row[sequenceIdIndex].trim()) {
+                sequenceId = String(row[sequenceIdIndex]).trim();
+            } else if (groupIndex >= 0 && row[groupIndex] && row[groupIndex].trim()) {
+                sequenceId = String(row[groupIndex]).trim();
+            } else {
+                sequenceId = `csv_sequence_${i}`;
+            }
+
+            if (!sequenceMap.has(sequenceId)) {
+                sequenceMap.set(sequenceId, {
+                    id: sequenceId,
+                    coordinates: [], // lon, lat, lon, lat, ...
+                    properties: {},
+                    rowCount: 0
+                });
+            }
+
+            const sequence = sequenceMap.get(sequenceId);
+            sequence.rowCount++;
+
+            // Merge properties
+            if (sequence.rowCount === 1) {
+                header.forEach((colName, idx) => {
+                    if (row[idx] && row[idx].trim()) {
+                        sequence.properties[colName.trim()] = row[idx].trim();
+                    }
+                });
+            } else {
+                header.forEach((colName, idx) => {
+                    const colLower = colName.toLowerCase().trim();
+                    if (row[idx] && row[idx].trim()) {
+                        if (colLower === 'bookingcodes' || colLower === 'wheels') {
+                            try {
+                                const existing = JSON.parse(sequence.properties[colName] || '[]');
+                                const newArray = JSON.parse(row[idx].trim());
+                                if (Array.isArray(existing) && Array.isArray(newArray)) {
+                                    const merged = [...new Set([...existing, ...newArray])];
+                                    sequence.properties[colName] = JSON.stringify(merged);
+                                }
+                            } catch (e) {
+                                // Keep existing value if merge fails
+                            }
+                        }
+                    }
+                });
+            }
+
+            // Extract coordinates
+            const coordinates = sequence.coordinates;
+            if (latLongArrayIndex >= 0 && row[latLongArrayIndex]) {
+                try {
+                    const coordArray = JSON.parse(row[latLongArrayIndex].trim());
+                    if (Array.isArray(coordArray)) {
+                        coordArray.forEach(coord => {
+                            if (Array.isArray(coord) && coord.length >= 2) {
+                                const lon = parseFloat(coord[1]);
+                                const lat = parseFloat(coord[0]);
+                                if (!isNaN(lon) && !isNaN(lat)) {
+                                    coordinates.push(lon, lat);
+                                }
+                            }
+                        });
+                    }
+                } catch (e) {
+                    // Skip invalid coordinates
+                }
+            } else if (geohashIndex >= 0 && row[geohashIndex]) {
+                // Decode geohash
+                const decoded = Ingest.decodeGeohash(row[geohashIndex].trim());
+                if (decoded && !isNaN(decoded.lat) && !isNaN(decoded.lon)) {
+                    coordinates.push(decoded.lon, decoded.lat);
+                }
+            } else if (latIndex >= 0 && lonIndex >= 0) {
+                const lat = parseFloat(row[latIndex]);
+                const lon = parseFloat(row[lonIndex]);
+                if (!isNaN(lat) && !isNaN(lon)) {
+                    coordinates.push(lon, lat);
+                }
+            }
+        }
+
+        // Convert sequences to features
+        const features = [];
+        sequenceMap.forEach((sequence) => {
+            if (sequence.coordinates.length === 0) return;
+
+            sequence.properties.sequence_id = sequence.id;
+            features.push({
+                type: 'Feature',
+                geometry: new PackedGeometry(sequence.coordinates.length === 2 ? 'Point' : 'LineString',
+                    Float64Array.from(sequence.coordinates)),
+                properties: sequence.properties
+            });
+        });
+        return features;
+    },
+
+    decodeXmlText(text) {
+        // Text content of a GPX element: CDATA sections and the XML entities
+        return text.replace(/<!\[CDATA\[([\s\S]*?)\]\]>|&(#x[0-9a-fA-F]+|#[0-9]+|amp|lt|gt|quot|apos);|<[^>]*>/g, (match, cdata, entity) => {
+            if (cdata !== undefined) return cdata;
+            if (entity === undefined) return ''; // markup inside the element
+            if (entity[0] === '#') {
+                return String.fromCodePoint(entity[1] === 'x' ? parseInt(entity.slice(2), 16) : parseInt(entity.slice(1), 10));
+            }
+            return { amp: '&', lt: '<', gt: '>', quot: '"', apos: "'" }[entity];
+        });
+    },
+
+    xmlAttribute(attributes, name) {
+        const match = attributes.match(new RegExp(`(?:^|\\s)${name}\\s*=\\s*(?:"([^"]*)"|'([^']*)')`));
+        return match ? Ingest.decodeXmlText(match[1] !== undefined ? match[1] : match[2]) : null;
+    },
+
+    extractSequenceIdFromGPX(name) {
+        // Sequence ID from a track or route name
+        if (name !== null) {
+            name = name.trim();
+            // Check if name contains a sequence ID pattern
+            const seqMatch = name.match(/(?:sequence[_\s]?id|seq[_\s]?id|id)[:\s=]+(\d+)/i);
+            if (seqMatch) {
+                return seqMatch[1];
+            }
+            // If name is just a number, use it as sequence ID
+            if (/^\d+$/.test(name)) {
+                return name;
+            }
+        }
+        return null;
+    },
+
+    parseGPX(gpxText) {
+        // Tracks (one feature per segment), then routes, then waypoints as points.
+        // Workers have no DOMParser, so the elements are read with a tag scanner.
+        const tracks = [];
+        const routes = [];
+        const waypoints = [];
+        const tagPattern = /<!--[\s\S]*?-->|<!\[CDATA\[[\s\S]*?\]\]>|<(\/?)(?:[\w.-]+:)?(trk|trkseg|trkpt|rte|rtept|wpt|name)\b((?:[^>"']|"[^"]*"|'[^']*')*?)(\/?)>/g;
+        let track = null;
+        let segment = null;
+        let route = null;
+        let waypoint = null;
+        let nameStart = -1;
+        let match;
+
+        const addPoint = (attributes, coordinates) => {
+            const lat = parseFloat(Ingest.xmlAttribute(attributes, 'lat'));
+            const lon = parseFloat(Ingest.xmlAttribute(attributes, 'lon'));
+            if (!isNaN(lat) && !isNaN(lon)) {
+                coordinates.push(lon, lat);
+                return true;
+            }
+            return false;
+        };
+
+        while ((match = tagPattern.exec(gpxText)) !== null) {
+            const [text, closing, tag, attributes, selfClosing] = match;
+            if (!tag) continue;
+
+            if (tag === 'name') {
+                // First <name> inside the current track, route or waypoint
+                const owner = waypoint || route || track;
+                if (!closing && !selfClosing) {
+                    nameStart = owner && owner.name === null ? match.index + text.length : -1;
+                } else if (closing && nameStart >= 0) {
+                    owner.name = Ingest.decodeXmlText(gpxText.slice(nameStart, match.index));
+                    nameStart = -1;
+                }
+                continue;
+            }
+
+            if (closing) {
+                if (tag === 'trkseg' && track && segment) {
+                    track.segments.push(segment);
+                    segment = null;
+                } else if (tag === 'trk' && track) {
+                    tracks.push(track);
+                    track = null;
+                } else if (tag === 'rte' && route) {
+                    routes.push(route);
+                    route = null;
+                } else if (tag === 'wpt' && waypoint) {
+                    waypoints.push(waypoint);
+                    waypoint = null;
+                }
+                continue;
+            }
+
+            if (tag === 'trk') {
+                track = { name: null, segments: [] };
+                if (selfClosing) {
+                    tracks.push(track);
+                    track = null;
+                }
+            } else if (tag === 'trkseg' && track && !selfClosing) {
+                segment = [];
+            } else if (tag === 'trkpt' && segment) {
+                addPoint(attributes, segment);
+            } else if (tag === 'rte') {
+                route = { name: null, coordinates: [] };
+                if (selfClosing) {
+                    routes.push(route);
+                    route = null;
+                }
+            } else if (tag === 'rtept' && route) {
+                addPoint(attributes, route.coordinates);
+            } else if (tag === 'wpt') {
+                const coordinates = [];
+                if (addPoint(attributes, coordinates)) {
+                    waypoint = { name: null, coordinates: coordinates };
+                    if (selfClosing) {
+                        waypoints.push(waypoint);
+                        waypoint = null;
+                    }
+                }
+            }
+        }
+
+        const features = [];
+        const line = (coordinates, sequenceId) => ({
+            type: 'Feature',
+            geometry: new PackedGeometry('LineString', Float64Array.from(coordinates)),
+            properties: { sequence_id: sequenceId }
+        });
+        tracks.forEach(track => {
+            track.segments.forEach(coordinates => {
+                if (coordinates.length > 0) {
+                    features.push(line(coordinates, Ingest.extractSequenceIdFromGPX(track.name) || `gpx_track_${features.length + 1}`));
+                }
+            });
+        });
+        routes.forEach(route => {
+            if (route.coordinates.length > 0) {
+                features.push(line(route.coordinates, Ingest.extractSequenceIdFromGPX(route.name) || `gpx_route_${features.length + 1}`));
+            }
+        });
+        waypoints.forEach(waypoint => {
+            const name = waypoint.name || '';
+            features.push({
+                type: 'Feature',
+                geometry: new PackedGeometry('Point', Float64Array.from(waypoint.coordinates)),
+                properties: {
+                    name: name,
+                    sequence_id: name || `gpx_waypoint_${features.length + 1}`
+                }
+            });
+        });
+        return features;
+    }
+};
+
+// Worker entry point: { file } in; 'progress' messages, then the file's packed sequences
+if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+    self.onmessage = async (event) => {
+        try {
+            let reported = -1;
+            const sequences = await Ingest.ingestFile(event.data.file, (progress) => {
+                const percent = Math.floor(progress * 100);
+                if (percent !== reported) {
+                    reported = percent;
+                    self.postMessage({ type: 'progress', progress: progress });
+                }
+            });
+            const { sequences: packed, transfer } = Ingest.packSequences(sequences);
+            self.postMessage({ type: 'done', sequences: packed }, transfer);
+        } catch (error) {
+            self.postMessage({ type: 'error', message: error.message });
+        }
+    };
+}
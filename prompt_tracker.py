@@ -6,11 +6,31 @@ Manages snapshots of code files before and after prompts
 
 import json
 import os
+import difflib
+import functools
+import hashlib
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-HISTORY_FILE = "prompt_history.json"
-TRACKED_FILES = [
+HISTORY_FILE = "prompt_history.json"             # Old single-file history, imported into the journal
+STORE_DIR = "prompt_history"
+BLOB_DIR = os.path.join(STORE_DIR, "blobs")      # Content-addressed file versions
+JOURNAL_FILE = os.path.join(STORE_DIR, "journal.jsonl")   # Append-only snapshot records
+INDEX_FILE = os.path.join(STORE_DIR, "index.jsonl")       # Prompt number, text and timestamp only
+DEFAULT_MAX_HISTORY = 500                        # Unchanged files cost nothing, so keep far more than 10
+COMPACT_SLACK = 50                               # Expired prompts allowed in the journal before it is rewritten
+MAX_DELTA_CHAIN = 16                             # Rebuilding a version replays at most this many deltas
+BLOB_FULL = b"\x00F\n"                           # Blob payload headers (blobs without one are full texts)
+BLOB_DELTA = b"\x00D "
+STAT_CACHE_FILE = os.path.join(STORE_DIR, "stat_cache.json")  # {file: [mtime_ns, size, hash]}
+RACY_WINDOW_NS = 2_000_000_000                   # Files modified this recently are always re-read
+REVERT_WORKERS = 8                               # Threads rebuilding and writing files on revert
+TRACKED_FILES_CONFIG = "prompt_tracker_files.txt"  # Optional glob patterns, one per line
+TRACKED_FILES = [                                # Default patterns when there is no config file
     "app.js",
     "index.html",
     "server.py",
@@ -32,108 +52,537 @@ def read_file_content(filepath):
         print(f"Error reading {filepath}: {e}")
         return None
 
+def tracked_patterns():
+    """Glob patterns from TRACKED_FILES_CONFIG, or TRACKED_FILES"""
+    try:
+        with open(TRACKED_FILES_CONFIG, 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+    except FileNotFoundError:
+        return TRACKED_FILES
+    return [line for line in lines if line and not line.startswith('#')]
+
+def tracked_files():
+    """Paths matching the tracked patterns (relative, '/'-separated), history store excluded"""
+    filenames = set()
+    for pattern in tracked_patterns():
+        for path in Path('.').glob(pattern):
+            if path.parts and path.parts[0] == STORE_DIR:
+                continue
+            if path.is_file():
+                filenames.add(path.as_posix())
+    return sorted(filenames)
+
 def get_all_file_snapshots():
     """Get current state of all tracked files"""
     snapshots = {}
-    for filename in TRACKED_FILES:
+    for filename in tracked_files():
         content = read_file_content(filename)
         if content is not None:
             snapshots[filename] = content
     return snapshots
 
-def load_history():
-    """Load prompt history from JSON file"""
-    if os.path.exists(HISTORY_FILE):
+def content_hash(content):
+    """SHA-256 of a file's text, used as its blob id"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def blob_path(digest):
+    return os.path.join(BLOB_DIR, digest[:2], digest)
+
+def make_delta(base_text, text):
+    """Line patch from base_text to text: [start, end] copies base lines, a string is inserted"""
+    base_lines = base_text.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(lines[j1:j2]))
+    return ops
+
+def apply_delta(base_text, ops):
+    base_lines = base_text.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return ''.join(parts)
+
+def read_blob_payload(digest, limit=None):
+    """Decompressed blob payload, or only its first `limit` bytes"""
+    with open(blob_path(digest), 'rb') as f:
+        if limit is None:
+            return zlib.decompress(f.read())
+        return zlib.decompressobj().decompress(f.read(4096), limit)
+
+def read_blob_header(digest):
+    """(base hash, chain depth) of a delta blob, or (None, 0) for a full text"""
+    payload = read_blob_payload(digest, 160)
+    if not payload.startswith(BLOB_DELTA):
+        return None, 0
+    base, depth = payload[len(BLOB_DELTA):].split(b"\n", 1)[0].split(b" ")
+    return base.decode('ascii'), int(depth)
+
+def write_blob(content, base=None):
+    """Store a file version once and return its hash; existing versions cost nothing.
+
+    With a base (the previous version of the same file) the version is
+    stored as a line delta against it, unless the chain would get longer
+    than MAX_DELTA_CHAIN or the delta is not smaller than the full text,
+    in which case it becomes a new full keyframe.
+    """
+    digest = content_hash(content)
+    path = blob_path(digest)
+    if os.path.exists(path):
+        return digest
+    
+    data = zlib.compress(BLOB_FULL + content.encode('utf-8'), 9)
+    if base and base != digest and os.path.exists(blob_path(base)):
+        depth = read_blob_header(base)[1] + 1
+        if depth <= MAX_DELTA_CHAIN:
+            delta = json.dumps(make_delta(read_blob(base), content), ensure_ascii=False, separators=(',', ':'))
+            header = BLOB_DELTA + f"{base} {depth}\n".encode('ascii')
+            delta_data = zlib.compress(header + delta.encode('utf-8'), 9)
+            if len(delta_data) < len(data):
+                data = delta_data
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.blob-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
         try:
-            with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading history: {e}")
-            return {"version": "1.0", "maxHistory": 10, "history": [], "currentPromptNumber": 0}
-    return {"version": "1.0", "maxHistory": 10, "history": [], "currentPromptNumber": 0}
-
-def save_history(history_data):
-    """Save prompt history to JSON file"""
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return digest
+
+@functools.lru_cache(maxsize=64)
+def read_blob(digest):
+    """Text of a stored file version, rebuilt from its keyframe and at most MAX_DELTA_CHAIN deltas"""
+    deltas = []
+    current = digest
+    while True:
+        payload = read_blob_payload(current)
+        if not payload.startswith(BLOB_DELTA):
+            text = payload[len(BLOB_FULL):] if payload.startswith(BLOB_FULL) else payload
+            break
+        header, body = payload.split(b"\n", 1)
+        deltas.append(body)
+        current = header[len(BLOB_DELTA):].split(b" ")[0].decode('ascii')
+        if len(deltas) > MAX_DELTA_CHAIN:
+            raise ValueError(f"Delta chain of blob {digest} is too long")
+    
+    text = text.decode('utf-8')
+    for body in reversed(deltas):
+        text = apply_delta(text, json.loads(body))
+    if content_hash(text) != digest:
+        raise ValueError(f"Blob {digest} is corrupt")
+    return text
+
+def store_snapshots(snapshots, previous=None):
+    """Store file contents as blobs and return the manifest {filename: hash}.
+
+    previous is the manifest of the last snapshot; its versions are used as
+    delta bases for the same files.
+    """
+    previous = previous or {}
+    return {filename: write_blob(content, previous.get(filename)) for filename, content in snapshots.items()}
+
+def load_stat_cache():
     try:
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history_data, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        print(f"Error saving history: {e}")
-        return False
+        with open(STAT_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_stat_cache(cache):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.stat-', dir=STORE_DIR)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, separators=(',', ':'))
+        os.replace(temp_path, STAT_CACHE_FILE)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def snapshot_files(previous=None):
+    """Store the tracked files and return their manifest, reading only files that changed.
+
+    A file whose mtime and size match the stat cache (and whose blob still
+    exists) reuses the cached hash without being read. Files modified in
+    the last RACY_WINDOW_NS are always read, since a second write within
+    the timestamp granularity would not change the mtime.
+    """
+    previous = previous or {}
+    cache = load_stat_cache()
+    manifest = {}
+    now_ns = time.time_ns()
+    changed = False
+    
+    for filename in tracked_files():
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            continue
+        cached = cache.get(filename)
+        if cached and cached[:2] == [stat.st_mtime_ns, stat.st_size] and os.path.exists(blob_path(cached[2])):
+            manifest[filename] = cached[2]
+            continue
+        
+        content = read_file_content(filename)
+        if content is None:
+            continue
+        digest = write_blob(content, previous.get(filename))
+        manifest[filename] = digest
+        if now_ns - stat.st_mtime_ns > RACY_WINDOW_NS:
+            cache[filename] = [stat.st_mtime_ns, stat.st_size, digest]
+        else:
+            cache.pop(filename, None)
+        changed = True
+    
+    # Forget files that are no longer tracked
+    for filename in set(cache) - set(manifest):
+        del cache[filename]
+        changed = True
+    if changed:
+        save_stat_cache(cache)
+    return manifest
+
+def load_snapshots(manifest):
+    """File contents of a manifest {filename: hash}"""
+    return {filename: read_blob(digest) for filename, digest in manifest.items()}
+
+def collect_garbage(history_data):
+    """Delete blobs no longer referenced by any history entry"""
+    referenced = set()
+    for entry in history_data["history"]:
+        for manifest in (entry.get("filesBefore"), entry.get("filesAfter")):
+            if manifest:
+                referenced.update(manifest.values())
+    # Keep the bases that referenced deltas are rebuilt from
+    pending = list(referenced)
+    while pending:
+        base = read_blob_header(pending.pop())[0]
+        if base and base not in referenced:
+            referenced.add(base)
+            pending.append(base)
+    removed = 0
+    if not os.path.isdir(BLOB_DIR):
+        return removed
+    for prefix in os.listdir(BLOB_DIR):
+        prefix_dir = os.path.join(BLOB_DIR, prefix)
+        for name in os.listdir(prefix_dir):
+            if name not in referenced:
+                os.unlink(os.path.join(prefix_dir, name))
+                removed += 1
+    return removed
+
+def migrate_history(history_data):
+    """Move the full file texts of a version 1.0 history into the blob store"""
+    previous = None
+    for entry in history_data["history"]:
+        for key in ("filesBefore", "filesAfter"):
+            if entry.get(key):
+                entry[key] = previous = store_snapshots(entry[key], previous)
+    return history_data
+
+def append_record(path, record):
+    """Append one JSON line and flush it to disk"""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+    with open(path, 'ab+') as f:
+        # Start a fresh line if a crash left the last one half written
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                line = b"\n" + line
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_records(path, reverse=False):
+    """Yield the records of a JSON Lines file, skipping a line torn by a crash"""
+    try:
+        with open(path, 'rb') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return
+    if reverse:
+        lines.reverse()
+    for line in lines:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+def write_records_atomically(path, records):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.journal-', dir=STORE_DIR)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def index_record(entry):
+    return {"promptNumber": entry["promptNumber"], "promptText": entry["promptText"], "timestamp": entry["timestamp"]}
+
+def write_history(entries):
+    """Rewrite the journal and index from history entries (import and compaction only)"""
+    records = []
+    for entry in entries:
+        records.append(dict(index_record(entry), op="before", files=entry["filesBefore"]))
+        if entry.get("filesAfter"):
+            records.append({"op": "after", "promptNumber": entry["promptNumber"], "files": entry["filesAfter"]})
+    write_records_atomically(JOURNAL_FILE, records)
+    write_records_atomically(INDEX_FILE, [index_record(entry) for entry in entries])
+
+def import_history_file(path=HISTORY_FILE):
+    """Convert a prompt_history.json (full texts or blob manifests) into the journal.
+
+    The old file is kept as <path>.imported so it is not imported twice.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        history_data = json.load(f)
+    if history_data.get("version") == "1.0":
+        migrate_history(history_data)
+    entries = [entry for entry in history_data["history"] if entry.get("filesBefore")]
+    write_history(entries)
+    os.replace(path, path + ".imported")
+    return len(entries)
+
+def ensure_imported():
+    """Import the old single-file history the first time the journal is used"""
+    if not os.path.exists(JOURNAL_FILE) and os.path.exists(HISTORY_FILE):
+        count = import_history_file()
+        print(f"Imported {count} prompts from {HISTORY_FILE}")
+
+def load_history():
+    """Prompt history rebuilt from the journal (the last maxHistory prompts)"""
+    ensure_imported()
+    entries = {}
+    for record in read_records(JOURNAL_FILE):
+        prompt_number = record["promptNumber"]
+        if record["op"] == "before":
+            entries[prompt_number] = dict(index_record(record), filesBefore=record["files"], filesAfter=None)
+        elif record["op"] == "after" and prompt_number in entries:
+            entries[prompt_number]["filesAfter"] = record["files"]
+    history = list(entries.values())
+    return {
+        "maxHistory": DEFAULT_MAX_HISTORY,
+        "history": history[-DEFAULT_MAX_HISTORY:],
+        "currentPromptNumber": history[-1]["promptNumber"] if history else 0
+    }
+
+def find_entry(prompt_number):
+    """One prompt's entry, read from the end of the journal, or None"""
+    ensure_imported()
+    files_after = None
+    for record in read_records(JOURNAL_FILE, reverse=True):
+        if record["promptNumber"] != prompt_number:
+            continue
+        if record["op"] == "after":
+            files_after = files_after or record["files"]
+        elif record["op"] == "before":
+            return dict(index_record(record), filesBefore=record["files"], filesAfter=files_after)
+    return None
+
+def compact_history():
+    """Drop prompts beyond maxHistory from the journal and delete their unused blobs"""
+    history = load_history()
+    write_history(history["history"])
+    collect_garbage(history)
 
 def save_snapshot_before_prompt(prompt_text):
     """Save current state of files before a prompt"""
-    history = load_history()
-    
-    # Get current file snapshots
-    snapshots = get_all_file_snapshots()
+    ensure_imported()
     
-    # Create new history entry
-    history["currentPromptNumber"] += 1
-    prompt_number = history["currentPromptNumber"]
+    # Last prompt number and latest snapshot, from the end of the journal
+    previous = None
+    last_number = 0
+    for record in read_records(JOURNAL_FILE, reverse=True):
+        previous = previous or record["files"]
+        if record["op"] == "before":
+            last_number = record["promptNumber"]
+            break
     
+    # Append the new history entry
+    prompt_number = last_number + 1
     entry = {
         "promptNumber": prompt_number,
         "promptText": prompt_text,
-        "timestamp": datetime.now().isoformat(),
-        "filesBefore": snapshots,
-        "filesAfter": None  # Will be filled after changes
+        "timestamp": datetime.now().isoformat()
     }
+    append_record(JOURNAL_FILE, dict(entry, op="before", files=snapshot_files(previous)))
+    append_record(INDEX_FILE, entry)
     
-    # Add to history (keep only last maxHistory entries)
-    history["history"].append(entry)
-    if len(history["history"]) > history["maxHistory"]:
-        history["history"] = history["history"][-history["maxHistory"]:]
-    
-    save_history(history)
+    # Keep only the last maxHistory prompts, rewriting the journal now and then
+    if sum(1 for _ in read_records(INDEX_FILE)) > DEFAULT_MAX_HISTORY + COMPACT_SLACK:
+        compact_history()
     return prompt_number
 
 def save_snapshot_after_prompt(prompt_number):
     """Save current state of files after a prompt"""
-    history = load_history()
-    
-    # Find the entry
-    entry = None
-    for e in history["history"]:
-        if e["promptNumber"] == prompt_number:
-            entry = e
-            break
-    
+    entry = find_entry(prompt_number)
     if not entry:
         print(f"Prompt #{prompt_number} not found in history")
         return False
     
-    # Get current file snapshots
-    snapshots = get_all_file_snapshots()
-    entry["filesAfter"] = snapshots
-    
-    save_history(history)
+    files_after = snapshot_files(entry["filesBefore"])
+    append_record(JOURNAL_FILE, {"op": "after", "promptNumber": prompt_number, "files": files_after})
     return True
 
 def get_history_list():
-    """Get list of all prompts in history"""
-    history = load_history()
+    """Get list of all prompts in history (reads only the index)"""
+    ensure_imported()
+    entries = list(read_records(INDEX_FILE))[-DEFAULT_MAX_HISTORY:]
     return [
         {
             "number": e["promptNumber"],
             "text": e["promptText"],
             "timestamp": e["timestamp"]
         }
-        for e in history["history"]
+        for e in entries
     ]
 
-def revert_to_before_prompt(prompt_number):
-    """Revert all files to state before a specific prompt"""
-    history = load_history()
+def current_hash(filename, cache):
+    """Hash of a file as it is now (from the stat cache when it is unchanged), or None if missing"""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    cached = cache.get(filename)
+    if cached and cached[:2] == [stat.st_mtime_ns, stat.st_size]:
+        return cached[2]
+    content = read_file_content(filename)
+    return content_hash(content) if content is not None else None
+
+def changed_files(manifest):
+    """Entries of a manifest {filename: hash} whose file on disk differs"""
+    cache = load_stat_cache()
+    return {filename: digest for filename, digest in manifest.items()
+            if current_hash(filename, cache) != digest}
+
+def write_temp_file(filename, digest):
+    """Write a stored version next to its target and return the temporary path"""
+    directory = os.path.dirname(filename) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filename)}.", suffix='.revert', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(read_blob(digest))
+        try:
+            os.chmod(temp_path, os.stat(filename).st_mode)
+        except FileNotFoundError:
+            os.chmod(temp_path, 0o644)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return temp_path
+
+def remove_temp_files(temp_paths):
+    for temp_path in temp_paths:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+
+def backup_file(filename):
+    """Keep the current version of a file aside: a hard link next to it, or a blob.
+
+    Returns ("link", path), ("blob", hash), or None if the file does not exist.
+    """
+    if not os.path.exists(filename):
+        return None
+    directory = os.path.dirname(filename) or '.'
+    fd, link_path = tempfile.mkstemp(prefix=f".{os.path.basename(filename)}.", suffix='.backup', dir=directory)
+    os.close(fd)
+    os.unlink(link_path)
+    try:
+        os.link(filename, link_path)
+        return ("link", link_path)
+    except OSError:
+        # No hard links on this filesystem - copy it into the blob store instead
+        content = read_file_content(filename)
+        return ("blob", write_blob(content)) if content is not None else None
+
+def restore_manifest(manifest):
+    """Make the files of a manifest match it on disk, all or nothing.
+
+    Only files whose hash differs are touched. They are rebuilt and written
+    to temporary files in parallel, then renamed over their targets. If
+    anything fails, no file is changed, or the ones already renamed are put
+    back from backups taken beforehand. Returns the restored filenames.
+    """
+    changed = changed_files(manifest)
+    if not changed:
+        return []
     
-    # Find the entry
-    entry = None
-    for e in history["history"]:
-        if e["promptNumber"] == prompt_number:
-            entry = e
-            break
+    def prepare(filename, digest):
+        backup = backup_file(filename)
+        try:
+            return backup, write_temp_file(filename, digest)
+        except BaseException:
+            if backup and backup[0] == "link":
+                remove_temp_files([backup[1]])
+            raise
+    
+    backups = {}
+    temp_paths = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(REVERT_WORKERS, len(changed))) as pool:
+        futures = {filename: pool.submit(prepare, filename, digest) for filename, digest in changed.items()}
+        for filename, future in futures.items():
+            try:
+                backups[filename], temp_paths[filename] = future.result()
+            except Exception as e:
+                errors.append(f"{filename}: {e}")
     
+    links = [backup[1] for backup in backups.values() if backup and backup[0] == "link"]
+    if errors:
+        remove_temp_files(list(temp_paths.values()) + links)
+        raise OSError("Could not write " + "; ".join(errors))
+    
+    replaced = []
+    try:
+        for filename in sorted(temp_paths):
+            os.replace(temp_paths[filename], filename)
+            replaced.append(filename)
+    except OSError:
+        remove_temp_files(temp_paths[filename] for filename in temp_paths if filename not in replaced)
+        for filename in replaced:
+            backup = backups[filename]
+            if backup is None:
+                os.remove(filename)
+            elif backup[0] == "link":
+                os.replace(backup[1], filename)
+            else:
+                os.replace(write_temp_file(filename, backup[1]), filename)
+        remove_temp_files(links)
+        raise
+    remove_temp_files(links)
+    return replaced
+
+def revert_to_before_prompt(prompt_number):
+    """Revert all files to state before a specific prompt"""
+    entry = find_entry(prompt_number)
     if not entry:
         print(f"Prompt #{prompt_number} not found in history")
         return False
@@ -143,19 +592,34 @@ def revert_to_before_prompt(prompt_number):
         return False
     
     # Restore files
-    restored_count = 0
-    for filename, content in entry["filesBefore"].items():
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(content)
-            restored_count += 1
-            print(f"Restored: {filename}")
-        except Exception as e:
-            print(f"Error restoring {filename}: {e}")
-    
-    print(f"\nRestored {restored_count} files to state before prompt #{prompt_number}")
+    try:
+        restored = restore_manifest(entry["filesBefore"])
+    except Exception as e:
+        print(f"Error restoring files, nothing was changed: {e}")
+        return False
+    
+    for filename in restored:
+        print(f"Restored: {filename}")
+    unchanged = len(entry["filesBefore"]) - len(restored)
+    print(f"\nRestored {len(restored)} files to state before prompt #{prompt_number} ({unchanged} already matched)")
     return True
 
+def iter_prompt_diff(entry, context=3):
+    """Unified diff lines from the current files to the state before a prompt.
+
+    Files are compared by hash first; only the stored versions of files
+    that differ are loaded, one at a time, as the lines are consumed.
+    """
+    cache = load_stat_cache()
+    for filename, digest in sorted(entry["filesBefore"].items()):
+        if current_hash(filename, cache) == digest:
+            continue
+        content = read_file_content(filename)
+        current = content.splitlines(keepends=True) if content is not None else []
+        before = read_blob(digest).splitlines(keepends=True)
+        for line in difflib.unified_diff(current, before, f"a/{filename}", f"b/{filename}", n=context):
+            yield line if line.endswith("\n") else line + "\n\\ No newline at end of file\n"
+
 if __name__ == "__main__":
     import sys
     
@@ -163,6 +627,8 @@ if __name__ == "__main__":
         print("Usage:")
         print("  python prompt_tracker.py list                    - Show prompt history")
         print("  python prompt_tracker.py revert <prompt_number>  - Revert to before prompt")
+        print("  python prompt_tracker.py diff <prompt_number>    - Show what a revert would change")
+        print("  python prompt_tracker.py import [history_file]   - Import an old prompt_history.json")
         sys.exit(1)
     
     command = sys.argv[1]
@@ -196,6 +662,31 @@ if __name__ == "__main__":
             print("Error: Prompt number must be an integer")
             sys.exit(1)
     
+    elif command == "diff":
+        if len(sys.argv) < 3:
+            print("Error: Please specify prompt number")
+            print("Usage: python prompt_tracker.py diff <prompt_number>")
+            sys.exit(1)
+        
+        try:
+            prompt_number = int(sys.argv[2])
+        except ValueError:
+            print("Error: Prompt number must be an integer")
+            sys.exit(1)
+        entry = find_entry(prompt_number)
+        if not entry:
+            print(f"Prompt #{prompt_number} not found in history")
+            sys.exit(1)
+        for line in iter_prompt_diff(entry):
+            sys.stdout.write(line)
+    
+    elif command == "import":
+        path = sys.argv[2] if len(sys.argv) > 2 else HISTORY_FILE
+        if not os.path.exists(path):
+            print(f"Error: {path} not found")
+            sys.exit(1)
+        print(f"Imported {import_history_file(path)} prompts from {path}")
+    
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
@@ -0,0 +1,178 @@
+// Client for the dataset API served by server.py
+// Full GeoJSON lives on the server; the browser keeps sequence metadata only
+class SequenceAPI {
+    constructor() {
+        // Same origin when the page is served by server.py, otherwise the default local port
+        const servedLocally = window.location.protocol.startsWith('http') && window.location.port === '8000';
+        this.baseUrl = servedLocally ? '' : 'http://localhost:8000';
+        this.timeout = 5000;
+
+        // Last dataset object uploaded and the statuses the server already has
+        this.uploadedGeoJSON = null;
+        this.uploadedStatuses = new Map();
+    }
+
+    async request(path, options = {}, timeout = this.timeout) {
+        const controller = new AbortController();
+        const timeoutId = timeout ? setTimeout(() => controller.abort(), timeout) : null;
+
+        try {
+            const response = await fetch(`${this.baseUrl}${path}`, {
+                ...options,
+                signal: controller.signal,
+                cache: 'no-cache'
+            });
+
+            if (!response.ok) {
+                let message = `${response.status} ${response.statusText}`;
+                try {
+                    const body = await response.json();
+                    if (body.error) message = body.error;
+                } catch (e) {
+                    // Non-JSON error body
+                }
+                throw new Error(`Server error: ${message}`);
+            }
+
+            return await response.json();
+        } finally {
+            if (timeoutId) clearTimeout(timeoutId);
+        }
+    }
+
+    async checkServerStatus() {
+        try {
+            const info = await this.request('/dataset/info', {}, 1500);
+            return info.status === 'ok';
+        } catch (error) {
+            return false;
+        }
+    }
+
+    async uploadDataset(geojsonData, sequences) {
+        // Same dataset as last time - only push status changes
+        if (geojsonData === this.uploadedGeoJSON) {
+            return this.updateStatuses(sequences);
+        }
+
+        const statuses = {};
+        sequences.forEach(seq => {
+            if (seq.status) statuses[String(seq.id)] = seq.status;
+        });
+
+        // Large datasets can take a while to store - no timeout
+        const result = await this.request('/dataset', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ geojson: geojsonData, statuses: statuses })
+        }, 0);
+
+        this.uploadedGeoJSON = geojsonData;
+        this.uploadedStatuses = new Map(sequences.map(seq => [String(seq.id), seq.status || '']));
+        return result;
+    }
+
+    async uploadCSV(file) {
+        // Raw CSV is converted to sequences on the server (parallel ingest)
+        const result = await this.request('/dataset/csv', {
+            method: 'POST',
+            headers: { 'Content-Type': 'text/csv' },
+            body: file
+        }, 0);
+
+        this.uploadedGeoJSON = null;
+        this.uploadedStatuses = new Map();
+        return result;
+    }
+
+    async updateStatuses(sequences) {
+        // Send only the statuses that changed since the last sync
+        const changed = {};
+        let changedCount = 0;
+        sequences.forEach(seq => {
+            const id = String(seq.id);
+            const status = seq.status || '';
+            if (this.uploadedStatuses.get(id) !== status) {
+                changed[id] = status;
+                changedCount++;
+            }
+        });
+
+        if (changedCount === 0) return { success: true, changed: 0 };
+
+        const result = await this.request('/sequences/status', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ statuses: changed })
+        });
+
+        Object.entries(changed).forEach(([id, status]) => this.uploadedStatuses.set(id, status));
+        return result;
+    }
+
+    async listSequences({ offset = 0, limit = 1000, status = null } = {}) {
+        // One page of sequence metadata from the server-side index
+        const params = new URLSearchParams({ offset: String(offset), limit: String(limit) });
+        if (status) params.set('status', Array.isArray(status) ? status.join(',') : status);
+        return this.request(`/sequences?${params.toString()}`);
+    }
+
+    async getSequenceSummaries(pageSize = 20000) {
+        // Metadata for every sequence (no features), fetched page by page
+        const summaries = [];
+        let offset = 0;
+        while (true) {
+            const page = await this.listSequences({ offset: offset, limit: pageSize });
+            summaries.push(...page.sequences);
+            offset += page.sequences.length;
+            if (page.sequences.length === 0 || offset >= page.total) break;
+        }
+        this.uploadedStatuses = new Map(summaries.map(seq => [String(seq.id), seq.status || '']));
+        return summaries;
+    }
+
+    async getSequence(sequenceId) {
+        // Metadata plus features of one sequence
+        return this.request(`/sequences/${encodeURIComponent(sequenceId)}`);
+    }
+
+    async getSequenceFeatures(sequenceId) {
+        // FeatureCollection of one sequence
+        return this.request(`/sequences/${encodeURIComponent(sequenceId)}/features`);
+    }
+
+    async exportSequences(sequenceIds) {
+        // Render stored sequences to .osm files in the server's exports/ directory
+        return this.request('/export', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ sequenceIds: sequenceIds.map(String) })
+        }, 0);
+    }
+
+    async exportBatch({ sequenceIds = null, exports = null, format = 'osm' } = {}) {
+        // One merged .osm file (or zip) for several sequences: stored ids, or browser-rendered XML
+        const body = sequenceIds
+            ? { sequenceIds: sequenceIds.map(String), format: format }
+            : { exports: exports, format: format };
+        return this.request('/export/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body)
+        }, 0);
+    }
+
+    async getGeoJSON() {
+        return this.request('/dataset/geojson', {}, 0);
+    }
+
+    async clearAll() {
+        const result = await this.request('/dataset', { method: 'DELETE' });
+        this.uploadedGeoJSON = null;
+        this.uploadedStatuses = new Map();
+        return result;
+    }
+}
+
+// Create global instance
+const sequenceAPI = new SequenceAPI();
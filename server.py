@@ -5,20 +5,51 @@ Run this file and then open http://localhost:8000 in your browser
 """
 
 import http.server
-import socketserver
 import webbrowser
 import os
 import json
+import re
+import csv
+import sys
+import math
+import array
+import collections
+import pickle
+import zlib
+import gzip
+import xml.etree.ElementTree as ET
 import urllib.parse
-from datetime import datetime
+import urllib.request
+import time
+from datetime import datetime, timezone
 import tempfile
 import shutil
 import subprocess
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import ctypes
 from ctypes import wintypes
 
+from osmagic_http import (
+    EXPORT_CHUNK_SIZE, RAW_EXPORT_TYPES, BATCH_EXPORT_FORMATS, OSM_ELEMENT_TYPES, ExportTooLarge,
+    ExportDirectory, safe_sequence_id, iter_request_body, batch_export_filename, batch_documents,
+    batch_zip_entries, iter_merged_osm, MIN_COMPRESS_BYTES, GZIP_LEVEL, accepts_gzip,
+    KeepAliveHandlerMixin, create_server
+)
+
 PORT = 8000
 
+# Concurrency settings (can be overridden on the command line)
+SERVER_MODE = 'threaded'   # 'threaded' = bounded worker pool, 'single' = one request at a time
+MAX_WORKERS = 16           # Worker threads serving connections in threaded mode
+
+# Export upload settings
+MAX_EXPORT_BYTES = 512 * 1024 * 1024     # Largest accepted export (override with --max-export-mb)
+MAX_DATASET_BYTES = 2 * 1024 * 1024 * 1024  # Largest accepted CSV dataset upload (ingested from disk)
+MAX_DATASET_JSON_BYTES = 512 * 1024 * 1024  # Largest accepted GeoJSON dataset upload (parsed in memory)
+MAX_JSON_BODY_BYTES = 16 * 1024 * 1024      # Largest body of the small JSON requests (status updates)
+
 # Windows API for window management
 def focus_josm_window():
     """Find and bring JOSM window to foreground using Windows API"""
@@ -83,137 +114,1963 @@ def focus_josm_window():
         print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Error focusing JOSM: {e}")
         return False
 EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports')
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets')
 
 # Create exports directory if it doesn't exist
-if not os.path.exists(EXPORT_DIR):
-    os.makedirs(EXPORT_DIR)
+export_directory = ExportDirectory(EXPORT_DIR, MAX_EXPORT_BYTES)
+
+
+# ---------------------------------------------------------------------------
+# Dataset store - server-side copy of the task manager's uploaded GeoJSON
+# ---------------------------------------------------------------------------
+
+# Same property order the task manager uses to find a feature's sequence id
+SEQUENCE_ID_KEYS = ('sequence_id', 'sequenceId', 'sequence', 'id', 'seq')
+
+
+def js_string(value):
+    """Format a property value the way JavaScript's String() would"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def feature_sequence_id(feature, index):
+    """Sequence id of a feature, matching processGeoJSON in task-manager.js"""
+    properties = feature.get('properties') or {}
+    for key in SEQUENCE_ID_KEYS:
+        value = properties.get(key)
+        if value:
+            return js_string(value)
+    return f'sequence_{index}'
+
+
+def sequence_stats(features):
+    """Feature, node and way counts, matching calculateSequenceStats in task-manager.js"""
+    nodes = 0
+    ways = 0
+    for feature in features:
+        geometry = feature.get('geometry')
+        if not geometry:
+            continue
+        geometry_type = geometry.get('type')
+        coordinates = geometry.get('coordinates')
+        if geometry_type == 'Point':
+            nodes += 1
+        elif geometry_type in ('LineString', 'MultiLineString'):
+            ways += 1
+            if coordinates:
+                nodes += len(coordinates) if isinstance(coordinates[0], list) else 1
+        elif geometry_type in ('Polygon', 'MultiPolygon'):
+            ways += 1
+            if coordinates and coordinates[0]:
+                nodes += len(coordinates[0])
+    return {'features': len(features), 'nodes': nodes, 'ways': ways}
+
+
+def sequence_sort_key(sequence_id):
+    """Numeric ids first in numeric order, then the rest alphabetically"""
+    match = re.match(r'\s*([+-]?\d+)', sequence_id)
+    if match:
+        return (0, int(match.group(1)), sequence_id)
+    return (1, 0, sequence_id)
+
+
+def write_json_atomically(path, data):
+    """Write JSON to path through a temp file and an atomic rename"""
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            # json.dumps uses the C encoder; json.dump to a file does not
+            f.write(json.dumps(data, separators=(',', ':')))
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def extend_bbox(bbox, coordinates):
+    """Grow bbox [minLon, minLat, maxLon, maxLat] to cover nested GeoJSON coordinates"""
+    stack = [coordinates]
+    while stack:
+        item = stack.pop()
+        if not item or not isinstance(item, list):
+            continue
+        if isinstance(item[0], (int, float)):
+            if len(item) >= 2:
+                lon, lat = item[0], item[1]
+                if lon < bbox[0]: bbox[0] = lon
+                if lat < bbox[1]: bbox[1] = lat
+                if lon > bbox[2]: bbox[2] = lon
+                if lat > bbox[3]: bbox[3] = lat
+        else:
+            stack.extend(item)
+    return bbox
+
+
+class DatasetStore:
+    """On-disk store for the GeoJSON dataset uploaded by the task manager.
+
+    Features are grouped by sequence id once, at upload time. Each sequence's
+    features are written as one JSON array into ``current/sequences.dat``, and
+    ``current/index.json`` records the byte offset and length of every array
+    together with its feature, node and way counts and bounding box.
+    Listing sequences only touches the in-memory index, and one sequence's
+    features are a single seek and read, sent to the client without parsing.
+    Review statuses live in the small ``statuses.json`` so marking a sequence
+    done does not rewrite the index.
+    """
+
+    INDEX_VERSION = 2
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.RLock()
+        self._index = None
+        self._statuses = None
+        # Status updates made while a replacement dataset is being built, one dict per build
+        self._status_journals = []
+
+    @property
+    def current_dir(self):
+        return os.path.join(self.root, 'current')
+
+    def _path(self, name, base=None):
+        return os.path.join(base or self.current_dir, name)
+
+    def _load_index(self):
+        """Index of the current dataset (cached), or None when nothing is stored"""
+        if self._index is None:
+            if not os.path.exists(self._path('index.json')) and os.path.exists(self._path('manifest.json')):
+                self._migrate_per_sequence_files()
+            try:
+                with open(self._path('index.json'), 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except FileNotFoundError:
+                return None
+            try:
+                with open(self._path('statuses.json'), 'r', encoding='utf-8') as f:
+                    self._statuses = json.load(f)
+            except FileNotFoundError:
+                self._statuses = {}
+            index['byId'] = {entry['id']: entry for entry in index['sequences']}
+            self._index = index
+        return self._index
+
+    def _migrate_per_sequence_files(self):
+        """Convert the earlier one-file-per-sequence layout to the packed layout"""
+        with open(self._path('manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        statuses = {seq['id']: seq['status'] for seq in manifest['sequences'] if seq.get('status')}
+
+        def read_sequences():
+            for seq in manifest['sequences']:
+                with open(os.path.join(self.current_dir, seq['file']), 'r', encoding='utf-8') as f:
+                    yield seq['id'], json.load(f)
+
+        self._install(self._build(read_sequences(), statuses))
+
+    def _build(self, sequences, statuses):
+        """Write (sequence id, features) pairs into a new scratch directory and return its path.
+
+        Each sequence is appended to the data file as it arrives, so only one
+        sequence's features are held at a time; the index is sorted at the end.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        build_dir = tempfile.mkdtemp(prefix='build-', dir=self.root)
+        try:
+            entries = []
+            offset = 0
+            feature_count = 0
+            with open(self._path('sequences.dat', build_dir), 'wb') as data_file:
+                for sequence_id, sequence_features in sequences:
+                    encoded = json.dumps(sequence_features, separators=(',', ':')).encode('utf-8')
+                    data_file.write(encoded)
+                    stats = sequence_stats(sequence_features)
+                    bbox = [float('inf'), float('inf'), float('-inf'), float('-inf')]
+                    for feature in sequence_features:
+                        extend_bbox(bbox, (feature.get('geometry') or {}).get('coordinates'))
+                    entries.append({
+                        'id': sequence_id,
+                        'offset': offset,
+                        'length': len(encoded),
+                        'featureCount': stats['features'],
+                        'nodeCount': stats['nodes'],
+                        'wayCount': stats['ways'],
+                        'bbox': bbox if bbox[0] != float('inf') else None
+                    })
+                    offset += len(encoded)
+                    feature_count += stats['features']
+            entries.sort(key=lambda entry: sequence_sort_key(entry['id']))
+            sequence_ids = {entry['id'] for entry in entries}
+            write_json_atomically(self._path('index.json', build_dir), {
+                'version': self.INDEX_VERSION,
+                'uploadedAt': datetime.now().isoformat(),
+                'featureCount': feature_count,
+                'sequences': entries
+            })
+            write_json_atomically(self._path('statuses.json', build_dir),
+                                  {key: value for key, value in statuses.items() if key in sequence_ids and value})
+        except BaseException:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+        return build_dir
+
+    def _install(self, build_dir, status_updates=None):
+        """Swap a built dataset in as current, then delete the old one.
+
+        ``status_updates`` are statuses set on the old dataset while this one
+        was being built; they are applied to the new one so they are not lost.
+        """
+        with self._lock:
+            old_dir = None
+            if os.path.exists(self.current_dir):
+                old_dir = tempfile.mkdtemp(prefix='old-', dir=self.root)
+                os.rmdir(old_dir)
+                os.rename(self.current_dir, old_dir)
+            os.rename(build_dir, self.current_dir)
+            self._index = None
+            self._statuses = None
+            if status_updates:
+                self.update_statuses(status_updates)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    def replace(self, geojson, statuses=None):
+        """Replace the stored dataset with a FeatureCollection"""
+        features = geojson.get('features')
+        if not isinstance(features, list):
+            raise ValueError('Invalid GeoJSON: missing features array')
+
+        groups = {}
+        for index, feature in enumerate(features):
+            groups.setdefault(feature_sequence_id(feature, index), []).append(feature)
+        return self.replace_sequences(sorted(groups.items(), key=lambda item: sequence_sort_key(item[0])), statuses)
+
+    def replace_sequences(self, sequences, statuses=None):
+        """Replace the stored dataset with (sequence id, features) pairs, written as they arrive"""
+        status_updates = {}
+        with self._lock:
+            self._status_journals.append(status_updates)
+        try:
+            self._install(self._build(sequences, statuses or {}), status_updates)
+        finally:
+            with self._lock:
+                self._status_journals.remove(status_updates)
+        return self.info()
+
+    def info(self):
+        """Dataset summary, or None when nothing has been uploaded"""
+        with self._lock:
+            index = self._load_index()
+            if index is None:
+                return None
+            return {
+                'uploadedAt': index['uploadedAt'],
+                'featureCount': index['featureCount'],
+                'sequenceCount': len(index['sequences'])
+            }
+
+    def _summary(self, entry):
+        return {
+            'id': entry['id'],
+            'status': self._statuses.get(entry['id'], ''),
+            'featureCount': entry['featureCount'],
+            'nodeCount': entry['nodeCount'],
+            'wayCount': entry['wayCount'],
+            'bbox': entry['bbox']
+        }
+
+    def list_sequences(self, offset=0, limit=None, statuses=None):
+        """One page of sequence summaries, optionally filtered by status.
+
+        ``statuses`` is a set of status values; 'active' selects sequences
+        that are neither done nor skipped, like the task manager's filter.
+        """
+        with self._lock:
+            index = self._load_index()
+            entries = index['sequences'] if index else []
+            status_of = self._statuses or {}
+            if statuses is not None:
+                include_active = 'active' in statuses
+                entries = [entry for entry in entries
+                           if status_of.get(entry['id'], '') in statuses
+                           or (include_active and status_of.get(entry['id'], '') not in ('done', 'skipped'))]
+            page = entries[offset:offset + limit] if limit is not None else entries[offset:]
+            done = sum(1 for status in status_of.values() if status == 'done')
+            skipped = sum(1 for status in status_of.values() if status == 'skipped')
+            total_sequences = len(index['sequences']) if index else 0
+            return {
+                'total': len(entries),
+                'offset': offset,
+                'limit': limit,
+                'counts': {
+                    'all': total_sequences,
+                    'active': total_sequences - done - skipped,
+                    'done': done,
+                    'skipped': skipped
+                },
+                'sequences': [self._summary(entry) for entry in page]
+            }
+
+    def read_features(self, sequence_id):
+        """Summary and raw JSON feature array of one sequence, or None if unknown"""
+        with self._lock:
+            index = self._load_index()
+            entry = index['byId'].get(sequence_id) if index else None
+            if entry is None:
+                return None
+            # Read under the lock so a concurrent replace cannot swap the file in between
+            with open(self._path('sequences.dat'), 'rb') as f:
+                f.seek(entry['offset'])
+                return self._summary(entry), f.read(entry['length'])
+
+    def has_sequence(self, sequence_id):
+        with self._lock:
+            index = self._load_index()
+            return bool(index) and sequence_id in index['byId']
+
+    def get_sequence(self, sequence_id):
+        """One sequence with its features, or None if unknown"""
+        result = self.read_features(sequence_id)
+        if result is None:
+            return None
+        summary, features = result
+        summary['features'] = json.loads(features)
+        return summary
+
+    def iter_feature_collection(self, block_size=EXPORT_CHUNK_SIZE):
+        """Yield the whole dataset as FeatureCollection JSON, straight from the data file"""
+        with self._lock:
+            index = self._load_index()
+            spans = [(entry['offset'], entry['length']) for entry in index['sequences']] if index else []
+            # Open under the lock: the handle keeps reading this dataset even if a replace swaps it out
+            data_file = open(self._path('sequences.dat'), 'rb') if spans else None
+        yield b'{"type":"FeatureCollection","features":['
+        if data_file is None:
+            yield b']}'
+            return
+        first = True
+        with data_file as f:
+            for offset, length in spans:
+                # Each stored array is "[f1,f2,...]" - strip the brackets and join with commas
+                f.seek(offset)
+                body = f.read(length)[1:-1]
+                if not body:
+                    continue
+                if not first:
+                    yield b','
+                first = False
+                for start in range(0, len(body), block_size):
+                    yield body[start:start + block_size]
+        yield b']}'
+
+    def update_statuses(self, statuses):
+        """Set the review status of some sequences; returns how many changed"""
+        with self._lock:
+            index = self._load_index()
+            if index is None:
+                return 0
+            changed = 0
+            for sequence_id, status in statuses.items():
+                sequence_id = str(sequence_id)
+                if sequence_id not in index['byId']:
+                    continue
+                for journal in self._status_journals:
+                    journal[sequence_id] = status
+                if self._statuses.get(sequence_id, '') != (status or ''):
+                    if status:
+                        self._statuses[sequence_id] = status
+                    else:
+                        self._statuses.pop(sequence_id, None)
+                    changed += 1
+            if changed:
+                write_json_atomically(self._path('statuses.json'), self._statuses)
+            return changed
+
+    def clear(self):
+        """Delete the stored dataset"""
+        with self._lock:
+            shutil.rmtree(self.current_dir, ignore_errors=True)
+            self._index = None
+            self._statuses = None
+
+
+dataset_store = DatasetStore(DATASET_DIR)
+
+
+# ---------------------------------------------------------------------------
+# CSV ingest - server-side equivalent of parseCSVAsync/parseCSVSync in app.js
+# ---------------------------------------------------------------------------
+
+# Column aliases, matched the same way app.js matches them
+CSV_LAT_LONG_ARRAY_NAMES = ('lat_long_array', 'latlongarray', 'coordinates', 'coords', 'points')
+CSV_LAT_NAMES = ('lat', 'latitude', 'y', 'ycoord')                      # substring match
+CSV_LON_NAMES = ('lon', 'lng', 'longitude', 'long', 'x', 'xcoord')      # substring match
+CSV_GEOHASH_NAMES = ('geohash', 'geohash_code', 'hash')
+CSV_SEQUENCE_ID_NAMES = ('offroad_sequence_id', 'sequence_id', 'sequenceid', 'sequence', 'seq', 'id', 'sample_bookings')
+CSV_MERGED_ARRAY_COLUMNS = ('bookingcodes', 'wheels')                    # JSON arrays unioned across rows
+CSV_INGEST_BATCH_ROWS = 20000
+CSV_INGEST_SHARDS = 64          # Grouped rows are spilled to this many files by sequence id
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_JS_FLOAT_RE = re.compile(r'\s*([+-]?(?:Infinity|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?))')
+
+
+def js_parse_float(value):
+    """JavaScript parseFloat(): leading number of a string, NaN when there is none"""
+    if value is None or isinstance(value, bool):
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _JS_FLOAT_RE.match(str(value))
+    if not match:
+        return math.nan
+    return float(match.group(1).replace('Infinity', 'inf'))
+
+
+def decode_geohash(geohash):
+    """Decode a geohash to its cell midpoint (lat, lon), like decodeGeohash in app.js"""
+    even = True
+    lat_min, lat_max = -90.0, 90.0
+    lon_min, lon_max = -180.0, 180.0
+    for char in geohash.lower():
+        value = GEOHASH_BASE32.find(char)
+        if value == -1:
+            return None
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                lon_mid = (lon_min + lon_max) / 2
+                if bit:
+                    lon_min = lon_mid
+                else:
+                    lon_max = lon_mid
+            else:
+                lat_mid = (lat_min + lat_max) / 2
+                if bit:
+                    lat_min = lat_mid
+                else:
+                    lat_max = lat_mid
+            even = not even
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+
+
+# Geohash characters as 5-bit values, and character pairs (10 bits) split into
+# their 5 longitude and 5 latitude bits. Bits alternate lon/lat starting with lon.
+_GEOHASH_VALUES = {char: value for value, char in enumerate(GEOHASH_BASE32)}
+_GEOHASH_VALUES.update({char.upper(): value for char, value in list(_GEOHASH_VALUES.items())})
+
+
+def _split_geohash_bits(value, bits, lon_first):
+    lon = lat = 0
+    is_lon = lon_first
+    for shift in range(bits - 1, -1, -1):
+        bit = (value >> shift) & 1
+        if is_lon:
+            lon = (lon << 1) | bit
+        else:
+            lat = (lat << 1) | bit
+        is_lon = not is_lon
+    return lon, lat
+
+
+_GEOHASH_PAIRS = {a + b: _split_geohash_bits((va << 5) | vb, 10, True)
+                  for a, va in _GEOHASH_VALUES.items() for b, vb in _GEOHASH_VALUES.items()}
+_GEOHASH_LAST = {char: _split_geohash_bits(value, 5, True) for char, value in _GEOHASH_VALUES.items()}
+# Up to this length every bisection step in decode_geohash is exact in a
+# double, so the closed-form midpoint matches it bit for bit
+GEOHASH_EXACT_CHARS = 16
+
+
+def decode_geohashes(geohashes):
+    """Decode a column of geohashes to [(lat, lon) or None, ...].
+
+    Same midpoints as decode_geohash, but each pair of characters is looked
+    up as 5 longitude and 5 latitude bits, and the midpoint is computed once
+    from the interleaved integers instead of bisecting bit by bit. Repeated
+    geohashes are decoded once.
+    """
+    pairs = _GEOHASH_PAIRS
+    last = _GEOHASH_LAST
+    decoded = {}
+    results = []
+    for geohash in geohashes:
+        result = decoded.get(geohash, False)
+        if result is False:
+            length = len(geohash)
+            if length > GEOHASH_EXACT_CHARS:
+                result = decode_geohash(geohash)
+            else:
+                lon = lat = 0
+                try:
+                    for i in range(0, length - 1, 2):
+                        lon_bits, lat_bits = pairs[geohash[i:i + 2]]
+                        lon = (lon << 5) | lon_bits
+                        lat = (lat << 5) | lat_bits
+                    if length & 1:
+                        lon_bits, lat_bits = last[geohash[-1]]
+                        lon = (lon << 3) | lon_bits
+                        lat = (lat << 2) | lat_bits
+                except KeyError:
+                    # Not plain base32 - invalid, or a character like U+212A KELVIN SIGN
+                    # that lower() folds into the alphabet; let decode_geohash decide
+                    result = decode_geohash(geohash)
+                else:
+                    lon_count = (length * 5 + 1) // 2
+                    lat_count = length * 5 // 2
+                    result = ((2 * lat + 1) * 90 / (1 << lat_count) - 90.0,
+                              (2 * lon + 1) * 180 / (1 << lon_count) - 180.0)
+            decoded[geohash] = result
+        results.append(result)
+    return results
+
+
+def detect_csv_columns(header):
+    """Find coordinate, geohash and sequence id columns in a CSV header"""
+    columns = {'latLongArray': -1, 'lat': -1, 'lon': -1, 'geohash': -1, 'sequenceId': -1, 'group': -1}
+    for index, col in enumerate(header):
+        col_lower = col.lower().strip()
+        if columns['latLongArray'] == -1 and col_lower in CSV_LAT_LONG_ARRAY_NAMES:
+            columns['latLongArray'] = index
+        if columns['lat'] == -1 and any(name in col_lower for name in CSV_LAT_NAMES):
+            columns['lat'] = index
+        if columns['lon'] == -1 and any(name in col_lower for name in CSV_LON_NAMES):
+            columns['lon'] = index
+        if columns['geohash'] == -1 and col_lower in CSV_GEOHASH_NAMES:
+            columns['geohash'] = index
+        if columns['sequenceId'] == -1 and col_lower in CSV_SEQUENCE_ID_NAMES:
+            columns['sequenceId'] = index
+        if columns['group'] == -1 and col_lower == 'group':
+            columns['group'] = index
+    columns['merged'] = [index for index, col in enumerate(header)
+                         if col.lower().strip() in CSV_MERGED_ARRAY_COLUMNS]
+
+    if columns['latLongArray'] == -1 and (columns['lat'] == -1 or columns['lon'] == -1) and columns['geohash'] == -1:
+        raise ValueError('CSV must contain either:\n1. A lat_long_array column with coordinate arrays, OR\n'
+                         '2. Separate latitude and longitude columns, OR\n3. A geohash column')
+    return columns
+
+
+def _csv_cell(row, index):
+    return row[index] if 0 <= index < len(row) else ''
+
+
+def csv_row_coordinates(row, columns, decoded_geohash=None):
+    """[lon, lat] pairs contributed by one CSV row.
+
+    decoded_geohash is the row's geohash already decoded by decode_geohashes.
+    """
+    lat_long_array = _csv_cell(row, columns['latLongArray'])
+    geohash = _csv_cell(row, columns['geohash'])
+    if lat_long_array:
+        try:
+            coord_array = json.loads(lat_long_array)
+        except ValueError:
+            return []
+        coordinates = []
+        if isinstance(coord_array, list):
+            for coord in coord_array:
+                if isinstance(coord, list) and len(coord) >= 2:
+                    lon = js_parse_float(coord[1])
+                    lat = js_parse_float(coord[0])
+                    if not math.isnan(lon) and not math.isnan(lat):
+                        coordinates.append([lon, lat])
+        return coordinates
+    if geohash:
+        decoded = decoded_geohash if decoded_geohash is not None else decode_geohash(geohash)
+        if decoded is not None:
+            return [[decoded[1], decoded[0]]]
+        return []
+    if columns['lat'] >= 0 and columns['lon'] >= 0:
+        lat = js_parse_float(_csv_cell(row, columns['lat']) or None)
+        lon = js_parse_float(_csv_cell(row, columns['lon']) or None)
+        if not math.isnan(lat) and not math.isnan(lon):
+            return [[lon, lat]]
+    return []
+
+
+def group_csv_batch(header, columns, start_index, rows):
+    """Group one batch of CSV rows by sequence id (runs in a worker process).
+
+    Returns partial groups in first-seen order. Each one carries the
+    properties of its first row, the parsed bookingcodes/wheels arrays of
+    every row and the coordinates, so batches can be merged in order.
+    """
+    groups = {}
+    # Decode the whole geohash column of the batch at once
+    geohashes = None
+    if columns['geohash'] >= 0:
+        geohashes = decode_geohashes([_csv_cell(row, columns['geohash']) for row in rows])
+    for offset, row in enumerate(rows):
+        sequence_id = _csv_cell(row, columns['sequenceId']) or _csv_cell(row, columns['group'])
+        if not sequence_id:
+            sequence_id = f'csv_sequence_{start_index + offset}'
+
+        group = groups.get(sequence_id)
+        if group is None:
+            properties = {}
+            for index, col in enumerate(header):
+                value = _csv_cell(row, index)
+                if value:
+                    properties[col.strip()] = value
+            group = groups[sequence_id] = {'properties': properties, 'arrays': [], 'coordinates': [],
+                                           'firstRow': start_index + offset}
+
+        merged = []
+        for index in columns['merged']:
+            value = _csv_cell(row, index)
+            if value:
+                try:
+                    parsed = json.loads(value)
+                except ValueError:
+                    parsed = None
+                merged.append((index, parsed if isinstance(parsed, list) else None))
+        group['arrays'].append(merged)
+        group['coordinates'].extend(csv_row_coordinates(row, columns, geohashes[offset] if geohashes else None))
+    return list(groups.items())
+
+
+def _js_set_key(value):
+    """Key under which a JavaScript Set would treat two values as equal"""
+    if isinstance(value, bool):
+        return ('boolean', value)
+    if isinstance(value, (int, float)):
+        return ('number', float(value))
+    if isinstance(value, str):
+        return ('string', value)
+    if value is None:
+        return ('null', None)
+    return ('object', id(value))     # Objects and arrays are never equal by value
+
+
+def _merge_csv_partials(sequences, header, partials):
+    """Fold one batch's partial groups into the running per-sequence state"""
+    for sequence_id, partial in partials:
+        state = sequences.get(sequence_id)
+        row_arrays = partial['arrays']
+        if state is None:
+            state = sequences[sequence_id] = {'properties': partial['properties'], 'arrays': {}, 'coordinates': [],
+                                              'firstRow': partial['firstRow']}
+            row_arrays = row_arrays[1:]      # First row's values are the properties themselves
+
+        for merged in row_arrays:
+            for index, new_array in merged:
+                column = header[index]
+                if column not in state['arrays']:
+                    try:
+                        existing = json.loads(state['properties'].get(column) or '[]')
+                    except ValueError:
+                        existing = None
+                    state['arrays'][column] = existing if isinstance(existing, list) else None
+                existing = state['arrays'][column]
+                if existing is None or new_array is None:
+                    continue
+                seen = {_js_set_key(item) for item in existing}
+                for item in new_array:
+                    key = _js_set_key(item)
+                    if key not in seen:
+                        seen.add(key)
+                        existing.append(item)
+                state.setdefault('dirty', set()).add(column)
+        state['coordinates'].extend(partial['coordinates'])
+
+
+def iter_csv_rows(f):
+    """Yield the non-blank rows of a CSV file with every field trimmed"""
+    for row in csv.reader(f):
+        if not row or (len(row) == 1 and not row[0].strip()):
+            continue
+        yield [field.strip() for field in row]
+
+
+class CsvIngestPool:
+    """Process pool shared by every CSV ingest, started on first use.
+
+    One pool for the whole server bounds the worker processes no matter how
+    many /dataset/csv uploads run at once. workers=1 groups rows in-process.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self.workers or os.cpu_count() or 1
+
+    def get(self):
+        """The shared executor, or None when grouping runs in-process"""
+        if self.size <= 1:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.size)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+csv_ingest_pool = CsvIngestPool()
+
+
+def _spill_csv_partials(shards, partials):
+    """Append one batch's partial groups to the shard file of each sequence id"""
+    by_shard = {}
+    for sequence_id, partial in partials:
+        shard = zlib.crc32(sequence_id.encode('utf-8')) % len(shards)
+        by_shard.setdefault(shard, []).append((sequence_id, partial))
+    for shard, shard_partials in by_shard.items():
+        pickle.dump(shard_partials, shards[shard], pickle.HIGHEST_PROTOCOL)
+
+
+def _iter_csv_shard(header, shard_path):
+    """Merge the spilled batches of one shard and yield its finished sequences"""
+    sequences = {}
+    with open(shard_path, 'rb') as f:
+        while True:
+            try:
+                partials = pickle.load(f)
+            except EOFError:
+                break
+            _merge_csv_partials(sequences, header, partials)
+    os.unlink(shard_path)
+    for sequence_id, state in sequences.items():
+        coordinates = state['coordinates']
+        if not coordinates:
+            continue
+        properties = state['properties']
+        for column in state.get('dirty', ()):
+            properties[column] = json.dumps(state['arrays'][column], separators=(',', ':'), ensure_ascii=False)
+        properties['sequence_id'] = sequence_id
+        if len(coordinates) == 1:
+            geometry = {'type': 'Point', 'coordinates': coordinates[0]}
+        else:
+            geometry = {'type': 'LineString', 'coordinates': coordinates}
+        yield state['firstRow'], sequence_id, {'type': 'Feature', 'geometry': geometry, 'properties': properties}
+
+
+def ingest_csv(path, scratch_dir=None, batch_rows=CSV_INGEST_BATCH_ROWS, progress_callback=None):
+    """Convert a CSV of GPS points to one feature per sequence.
+
+    Yields (first row number, sequence id, feature). Column detection and
+    grouping follow parseCSVAsync in app.js. The file is streamed with the
+    csv module and batches of rows are grouped in csv_ingest_pool. Grouped
+    batches are spilled to shard files in scratch_dir by sequence id, and
+    each shard is merged on its own, so memory is bounded by the largest
+    shard rather than the whole file. Sequences come out in shard order.
+    """
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+    if scratch_dir:
+        os.makedirs(scratch_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix='ingest-', dir=scratch_dir) as spill_dir:
+        shard_paths = [os.path.join(spill_dir, f'{shard:02d}.part') for shard in range(CSV_INGEST_SHARDS)]
+        shards = [open(shard_path, 'wb') for shard_path in shard_paths]
+        pending = collections.deque()
+        try:
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                rows = iter_csv_rows(f)
+                header = next(rows, None)
+                if header is None:
+                    raise ValueError('CSV file must have at least a header row and one data row')
+                columns = detect_csv_columns(header)
+
+                executor = csv_ingest_pool.get()
+                max_pending = csv_ingest_pool.size * 2
+                row_count = 0
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= batch_rows:
+                        start_index = row_count + 1
+                        row_count += len(batch)
+                        if executor:
+                            pending.append(executor.submit(group_csv_batch, header, columns, start_index, batch))
+                            # Bound the number of batches held in memory
+                            while len(pending) > max_pending:
+                                _spill_csv_partials(shards, pending.popleft().result())
+                        else:
+                            _spill_csv_partials(shards, group_csv_batch(header, columns, start_index, batch))
+                        batch = []
+                        if progress_callback:
+                            progress_callback(row_count)
+                if batch:
+                    start_index = row_count + 1
+                    row_count += len(batch)
+                    if executor:
+                        pending.append(executor.submit(group_csv_batch, header, columns, start_index, batch))
+                    else:
+                        _spill_csv_partials(shards, group_csv_batch(header, columns, start_index, batch))
+                while pending:
+                    _spill_csv_partials(shards, pending.popleft().result())
+        finally:
+            # The pool is shared - drop this ingest's queued batches, not the pool
+            for future in pending:
+                future.cancel()
+            for shard in shards:
+                shard.close()
+
+        if progress_callback:
+            progress_callback(row_count)
+        if row_count == 0:
+            raise ValueError('CSV file must have at least a header row and one data row')
+        for shard_path in shard_paths:
+            yield from _iter_csv_shard(header, shard_path)
+
+
+def write_csv_geojson(sequences, output_path):
+    """Write ingest_csv output as a FeatureCollection in first-seen order; returns the feature count.
+
+    Features are staged in a scratch file and only their offsets are sorted,
+    so the collection is never held in memory.
+    """
+    spans = []
+    with tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(output_path))) as scratch:
+        for first_row, sequence_id, feature in sequences:
+            encoded = json.dumps(feature, separators=(',', ':')).encode('utf-8')
+            spans.append((first_row, scratch.tell(), len(encoded)))
+            scratch.write(encoded)
+        spans.sort()
+        with open(output_path, 'wb') as out:
+            out.write(b'{"type":"FeatureCollection","features":[')
+            for position, (first_row, offset, length) in enumerate(spans):
+                if position:
+                    out.write(b',')
+                scratch.seek(offset)
+                out.write(scratch.read(length))
+            out.write(b']}')
+    return len(spans)
+
+
+# ---------------------------------------------------------------------------
+# OSM XML export - server-side equivalent of generateJOSM in app.js
+# ---------------------------------------------------------------------------
+
+OSM_GENERATOR = 'OSMAGIC Task Manager'
+OSM_FIRST_ID = -1000
+OSM_COORDINATE_SCALE = 10 ** 7       # Seven decimals, as written by toFixed(7)
+
+
+def js_truthy(value):
+    """JavaScript truthiness of a JSON value"""
+    if value is None or value is False or value == '':
+        return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value == value and value != 0
+    return True
+
+
+def escape_xml(text):
+    """Escape text for an XML attribute, like escapeXml in app.js"""
+    return (str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            .replace('"', '&quot;').replace("'", '&apos;'))
+
+
+def extract_coordinates(geometry):
+    """[lon, lat] positions of a geometry, like extractCoordinates in app.js"""
+    geometry_type = geometry.get('type')
+    coordinates = geometry.get('coordinates')
+    if geometry_type == 'Point':
+        return [coordinates]
+    if geometry_type == 'LineString':
+        return list(coordinates)
+    if geometry_type == 'Polygon':
+        return list(coordinates[0]) if coordinates and coordinates[0] else []
+    if geometry_type == 'MultiLineString':
+        return [coord for line in coordinates for coord in line]
+    if geometry_type == 'MultiPolygon':
+        return [coord for polygon in coordinates if polygon and polygon[0] for coord in polygon[0]]
+    return []
+
+
+def quantize_coordinate(value):
+    """Coordinate in units of 1e-7 degrees, rounded exactly as toFixed(7) rounds.
+
+    Works on the exact binary value of the float (half away from zero), so
+    two coordinates share a key exactly when their toFixed(7) strings match.
+    Negative values are stored as ~units, which keeps "-0.0000000" apart
+    from "0.0000000" the way the string keys are.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        raise ValueError(f'Invalid coordinate: {value!r}')
+    numerator, denominator = abs(value).as_integer_ratio()
+    units = (numerator * 2 * OSM_COORDINATE_SCALE + denominator) // (2 * denominator)
+    return ~units if value < 0 else units
+
+
+def format_coordinate(key):
+    """toFixed(7) string of a quantized coordinate"""
+    sign, units = ('-', ~key) if key < 0 else ('', key)
+    whole, fraction = divmod(units, OSM_COORDINATE_SCALE)
+    return f'{sign}{whole}.{fraction:07d}'
+
+
+def iter_osm_elements(features, next_ids):
+    """Yield the node and way lines of one sequence as text chunks.
+
+    Same elements as generateJOSM in app.js: one negative-id node per
+    distinct toFixed(7) position, then one way per feature with two or more
+    positions, tagged highway (default unclassified) and oneway (unless
+    empty or "no"). Nodes are keyed by their quantized integer coordinates
+    and written as soon as they are first seen. Ids are taken from next_ids
+    ({'node': ..., 'way': ...}), which is advanced past the ids used.
+    """
+    node_ids = {}
+    way_refs = []
+    lines = []
+    for feature in features:
+        geometry = feature.get('geometry')
+        if not geometry:
+            continue
+        refs = []
+        for coord in extract_coordinates(geometry):
+            lon, lat = coord[0], coord[1]
+            key = (quantize_coordinate(lat), quantize_coordinate(lon))
+            node_id = node_ids.get(key)
+            if node_id is None:
+                node_id = node_ids[key] = next_ids['node']
+                next_ids['node'] -= 1
+                lines.append(f'  <node id="{node_id}" lat="{format_coordinate(key[0])}" '
+                             f'lon="{format_coordinate(key[1])}" version="1" />\n')
+            refs.append(node_id)
+        if len(refs) >= 2:
+            way_refs.append((refs, feature.get('properties') or {}))
+        if len(lines) >= 1000:
+            yield ''.join(lines)
+            lines = []
+    lines.append('\n')
+
+    for refs, properties in way_refs:
+        lines.append(f'  <way id="{next_ids["way"]}" version="1">\n')
+        next_ids['way'] -= 1
+        lines.extend(f'    <nd ref="{ref}" />\n' for ref in refs)
+        highway = properties.get('highway')
+        highway = js_string(highway) if js_truthy(highway) else 'unclassified'
+        lines.append(f'    <tag k="highway" v="{escape_xml(highway)}" />\n')
+        oneway = properties.get('oneway')
+        if js_truthy(oneway) and oneway != 'no':
+            lines.append(f'    <tag k="oneway" v="{escape_xml(js_string(oneway))}" />\n')
+        lines.append('  </way>\n')
+        if len(lines) >= 1000:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+
+def osm_timestamp(generated=None):
+    """Current time formatted like JavaScript's toISOString()"""
+    if generated is None:
+        generated = datetime.now(timezone.utc)
+    return generated.strftime('%Y-%m-%dT%H:%M:%S.') + f'{generated.microsecond // 1000:03d}Z'
+
+
+def iter_osm_xml(sequence_id, features, feature_count=None, generated=None):
+    """Yield the .osm document for one sequence as text chunks, like generateJOSM in app.js"""
+    if feature_count is None:
+        feature_count = len(features)
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           f'<osm version="0.6" generator="{OSM_GENERATOR}">\n'
+           f'  <!-- Sequence ID: {sequence_id} -->\n'
+           f'  <!-- Features: {feature_count} -->\n'
+           f'  <!-- Generated: {osm_timestamp(generated)} -->\n\n')
+    yield from iter_osm_elements(features, {'node': OSM_FIRST_ID, 'way': OSM_FIRST_ID})
+    yield '</osm>'
+
+
+class SequenceNotFound(LookupError):
+    """A stored sequence disappeared (dataset replaced or cleared) while it was being exported"""
+
+    def __init__(self, sequence_id):
+        super().__init__(f'Unknown sequence id: {sequence_id}')
+        self.sequence_id = sequence_id
+
+
+def _read_stored_sequence(sequence_id):
+    result = dataset_store.read_features(sequence_id)
+    if result is None:
+        raise SequenceNotFound(sequence_id)
+    return result
+
+
+def iter_stored_batch_osm(sequence_ids):
+    """Yield one .osm document (as bytes) holding several stored sequences.
+
+    Ids keep counting down across sequences, so every new node and way in
+    the file has its own negative id. Raises SequenceNotFound when an id is
+    no longer stored.
+    """
+    next_ids = {'node': OSM_FIRST_ID, 'way': OSM_FIRST_ID}
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           f'<osm version="0.6" generator="{OSM_GENERATOR}">\n'
+           f'  <!-- Sequences: {len(sequence_ids)} -->\n'
+           f'  <!-- Generated: {osm_timestamp()} -->\n\n').encode('utf-8')
+    for sequence_id in sequence_ids:
+        summary, features = _read_stored_sequence(sequence_id)
+        yield (f'  <!-- Sequence ID: {sequence_id} -->\n'
+               f'  <!-- Features: {summary["featureCount"]} -->\n').encode('utf-8')
+        for chunk in iter_osm_elements(json.loads(features), next_ids):
+            yield chunk.encode('utf-8')
+    yield b'</osm>'
+
+
+def iter_stored_sequence_files(sequence_ids):
+    """(filename, blocks) of each stored sequence's own .osm document, for zipped batches.
+
+    Raises SequenceNotFound when an id is no longer stored.
+    """
+    for sequence_id in sequence_ids:
+        summary, features = _read_stored_sequence(sequence_id)
+        chunks = iter_osm_xml(sequence_id, json.loads(features), summary['featureCount'])
+        yield f'sequence_{safe_sequence_id(sequence_id)}.osm', (chunk.encode('utf-8') for chunk in chunks)
+
+
+def export_stored_sequence(sequence_id):
+    """Write one stored sequence to EXPORT_DIR as .osm and return the filename.
+
+    Raises SequenceNotFound when the id is no longer stored.
+    """
+    summary, features = _read_stored_sequence(sequence_id)
+    filename = f'sequence_{safe_sequence_id(sequence_id)}.osm'
+    chunks = iter_osm_xml(sequence_id, json.loads(features), summary['featureCount'])
+    export_directory.write((chunk.encode('utf-8') for chunk in chunks), filename)
+    return filename
+
 
-class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+# ---------------------------------------------------------------------------
+# Overpass proxy - OSM context for the preview, cached per slippy-map tile
+# ---------------------------------------------------------------------------
+
+OVERPASS_URL = 'https://overpass-api.de/api/interpreter'
+OVERPASS_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'overpass_cache')
+OVERPASS_TILE_ZOOM = 15                        # ~1.2 km tiles at the equator
+OVERPASS_CACHE_TTL = 24 * 60 * 60              # Seconds before a cached tile is fetched again
+OVERPASS_CACHE_MAX_BYTES = 256 * 1024 * 1024   # Least recently used tiles are evicted above this
+OVERPASS_MAX_TILES = 64                        # Largest bbox the proxy accepts, in tiles
+OVERPASS_FETCH_WORKERS = 2                     # Concurrent upstream requests (Overpass allows few per IP)
+OVERPASS_TIMEOUT = 25                          # Same [timeout:25] budget as the browser's query
+TILE_MAX_LATITUDE = 85.05112878                # Web Mercator tiles stop here
+
+# The preview's query from app.js, for one tile: {south},{west},{north},{east}
+OVERPASS_QUERY = (
+    '[out:xml][timeout:25];\n'
+    '(\n'
+    '  way["highway"]({south},{west},{north},{east});\n'
+    '  relation["type"="route"]["route"~"^(bus|tram|train|subway|light_rail|trolleybus|ferry|monorail|aerialway|share_taxi|funicular)$"]({south},{west},{north},{east});\n'
+    ');\n'
+    '(._;>;);\n'
+    'out body;\n'
+)
+
+
+class OverpassError(Exception):
+    """Raised when the upstream Overpass API fails or returns an error document"""
+
+
+def tile_x(lon, zoom):
+    n = 2 ** zoom
+    return min(n - 1, max(0, int((lon + 180.0) / 360.0 * n)))
+
+
+def tile_y(lat, zoom):
+    n = 2 ** zoom
+    lat = min(TILE_MAX_LATITUDE, max(-TILE_MAX_LATITUDE, lat))
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+    return min(n - 1, max(0, int(y)))
+
+
+def tile_bounds(x, y, zoom):
+    """(south, west, north, east) of a slippy-map tile"""
+    n = 2 ** zoom
+    def lat(tile_row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_row / n))))
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+def bbox_tiles(left, bottom, right, top, zoom, max_tiles=None):
+    """Tiles (x, y) covering a bbox, row by row.
+
+    Raises ValueError when the bbox covers more than max_tiles; the count is
+    checked from the tile range before any list is built.
+    """
+    x0, x1 = tile_x(left, zoom), tile_x(right, zoom)
+    y0, y1 = tile_y(top, zoom), tile_y(bottom, zoom)
+    count = (x1 - x0 + 1) * (y1 - y0 + 1)
+    if max_tiles is not None and count > max_tiles:
+        raise ValueError(f'Area too large: {count} tiles (limit {max_tiles})')
+    return [(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+
+
+def fetch_overpass(query, url=OVERPASS_URL, timeout=OVERPASS_TIMEOUT):
+    """POST an Overpass QL query and return the response body"""
+    request = urllib.request.Request(
+        url,
+        data=urllib.parse.urlencode({'data': query}).encode('utf-8'),
+        headers={'Content-Type': 'application/x-www-form-urlencoded', 'User-Agent': OSM_GENERATOR}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout + 5) as response:
+            return response.read()
+    except OSError as e:
+        raise OverpassError(f'Overpass request failed: {e}')
+
+
+def check_overpass_response(data):
+    # Overpass reports timeouts and memory errors in a <remark> of a 200 response
+    if b'<osm' not in data[:1024]:
+        raise OverpassError('Overpass response is not OSM XML')
+    if b'<remark> runtime error' in data or b'<remark>runtime error' in data:
+        raise OverpassError('Overpass query failed: runtime error')
+
+
+def overpass_elements(documents):
+    """{type: {id: element}} of tile responses, each element once (first copy wins)"""
+    elements = {element_type: {} for element_type in OSM_ELEMENT_TYPES}
+    for data in documents:
+        try:
+            root = ET.fromstring(data)
+        except ET.ParseError as e:
+            raise OverpassError(f'Invalid Overpass XML: {e}')
+        for element in root:
+            by_id = elements.get(element.tag)
+            if by_id is not None:
+                by_id.setdefault(element.get('id'), element)
+    return elements
+
+
+def merge_overpass_documents(documents):
+    """One .osm document from tile responses: each node, way and relation once, in that order"""
+    elements = overpass_elements(documents)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n',
+             f'<osm version="0.6" generator="{OSM_GENERATOR}">\n']
+    for element_type in OSM_ELEMENT_TYPES:
+        for element in elements[element_type].values():
+            element.tail = '\n'
+            parts.append('  ' + ET.tostring(element, encoding='unicode'))
+    parts.append('</osm>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+OSM_CONTEXT_MAGIC = b'OSMC'
+OSM_CONTEXT_VERSION = 1
+OSM_CONTEXT_CONTENT_TYPE = 'application/vnd.osmagic.osm-context'
+
+
+def _typed_bytes(typecode, values):
+    # Typed arrays in the browser read little-endian on every platform it runs on
+    data = array.array(typecode, values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+
+def columnar_osm_context(documents):
+    """The preview's OSM context of tile responses in a compact binary layout.
+
+    What the preview keeps - every valid node, and highway ways with at
+    least two known nodes - as flat arrays the browser maps straight
+    onto typed arrays, without an object per node:
+
+        header      'OSMC', then uint32 version, nodeCount, wayCount,
+                    wayNodeCount, tagCount, stringBytes, 0
+        float64     nodeIds[nodeCount], lats[nodeCount], lons[nodeCount], wayIds[wayCount]
+        int32       wayNodeOffsets[wayCount + 1], wayNodes[wayNodeCount] (node indexes),
+                    wayTagOffsets[wayCount + 1], tagKeys[tagCount], tagValues[tagCount],
+                    wayHighway[wayCount]
+        utf-8       JSON array of the interned tag strings
+
+    All numbers are little-endian.
+    """
+    elements = overpass_elements(documents)
+    node_ids, lats, lons = [], [], []
+    node_index = {}
+    for node_id, node in elements['node'].items():
+        try:
+            lat, lon = float(node.get('lat')), float(node.get('lon'))
+            numeric_id = float(node_id)
+        except (TypeError, ValueError):
+            continue
+        if math.isnan(lat) or math.isnan(lon):
+            continue
+        node_index[node_id] = len(node_ids)
+        node_ids.append(numeric_id)
+        lats.append(lat)
+        lons.append(lon)
+
+    strings, string_ids = [], {}
+    def intern(text):
+        if text not in string_ids:
+            string_ids[text] = len(strings)
+            strings.append(text)
+        return string_ids[text]
+
+    way_ids, way_node_offsets, way_nodes = [], [0], []
+    way_tag_offsets, tag_keys, tag_values, way_highway = [0], [], [], []
+    for way_id, way in elements['way'].items():
+        refs = [node_index[nd.get('ref')] for nd in way.iter('nd') if nd.get('ref') in node_index]
+        tags = {}
+        for tag in way.iter('tag'):
+            if tag.get('k') and tag.get('v'):
+                tags[tag.get('k')] = tag.get('v')
+        if len(refs) < 2 or not tags.get('highway'):
+            continue
+        try:
+            way_ids.append(float(way_id))
+        except (TypeError, ValueError):
+            continue
+        way_nodes.extend(refs)
+        way_node_offsets.append(len(way_nodes))
+        for key, value in tags.items():
+            tag_keys.append(intern(key))
+            tag_values.append(intern(value))
+        way_tag_offsets.append(len(tag_keys))
+        way_highway.append(intern(tags['highway']))
+
+    string_bytes = json.dumps(strings, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    header = OSM_CONTEXT_MAGIC + _typed_bytes('I', [OSM_CONTEXT_VERSION, len(node_ids), len(way_ids),
+                                                    len(way_nodes), len(tag_keys), len(string_bytes), 0])
+    return b''.join([
+        header,
+        _typed_bytes('d', node_ids), _typed_bytes('d', lats), _typed_bytes('d', lons), _typed_bytes('d', way_ids),
+        _typed_bytes('i', way_node_offsets), _typed_bytes('i', way_nodes),
+        _typed_bytes('i', way_tag_offsets), _typed_bytes('i', tag_keys), _typed_bytes('i', tag_values),
+        _typed_bytes('i', way_highway),
+        string_bytes
+    ])
+
+
+class OverpassTileCache:
+    """Overpass responses per slippy-map tile, kept on disk in root/<zoom>/<x>/<y>.osm.
+
+    Tiles older than ttl are fetched again; when the cache grows past
+    max_bytes the least recently used tiles are deleted. upstream is
+    called with an Overpass QL query and returns the XML bytes - by
+    default the public API, but a local stand-in can be passed (or set
+    later) to work offline. A tile requested by several previews at once
+    is fetched only once.
+    """
+
+    def __init__(self, root, upstream=None, zoom=OVERPASS_TILE_ZOOM, ttl=OVERPASS_CACHE_TTL,
+                 max_bytes=OVERPASS_CACHE_MAX_BYTES, workers=OVERPASS_FETCH_WORKERS):
+        self.root = root
+        self.upstream = upstream or fetch_overpass
+        self.zoom = zoom
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # Preview requests count as hits/misses; prefetches are counted apart so the
+        # hit rate shows how often a preview found its tiles already fetched
+        self.stats = {'hits': 0, 'misses': 0, 'prefetched': 0, 'prefetchCached': 0, 'stale': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._entries = None          # (x, y) -> size, least recently used first
+        self._total_bytes = 0
+        self._in_flight = {}          # (x, y) -> Future of a running fetch
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def _path(self, tile):
+        return os.path.join(self.root, str(self.zoom), str(tile[0]), f'{tile[1]}.osm')
+
+    def _load_entries(self):
+        # Called with the lock held; files on disk start in mtime order
+        if self._entries is not None:
+            return
+        found = []
+        zoom_dir = os.path.join(self.root, str(self.zoom))
+        for dirpath, _, filenames in os.walk(zoom_dir):
+            for filename in filenames:
+                if not filename.endswith('.osm'):
+                    continue
+                try:
+                    tile = (int(os.path.basename(dirpath)), int(filename[:-4]))
+                    st = os.stat(os.path.join(dirpath, filename))
+                except (ValueError, OSError):
+                    continue
+                found.append((st.st_mtime, tile, st.st_size))
+        self._entries = collections.OrderedDict()
+        for _, tile, size in sorted(found):
+            self._entries[tile] = size
+            self._total_bytes += size
+
+    def _read(self, tile, allow_stale=False):
+        """Cached tile bytes, or None if missing (or expired, unless allow_stale)"""
+        path = self._path(tile)
+        try:
+            with open(path, 'rb') as f:
+                if not allow_stale and time.time() - os.fstat(f.fileno()).st_mtime > self.ttl:
+                    return None
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            if tile in self._entries:
+                self._entries.move_to_end(tile)
+        return data
+
+    def _store(self, tile, data):
+        path = self._path(tile)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.tile-', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._total_bytes += len(data) - self._entries.pop(tile, 0)
+            self._entries[tile] = len(data)
+            # Evict least recently used tiles, never the one just stored
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_tile, size = self._entries.popitem(last=False)
+                self._total_bytes -= size
+                self.stats['evictions'] += 1
+                try:
+                    os.unlink(self._path(old_tile))
+                except OSError:
+                    pass
+
+    def _fetch(self, tile):
+        south, west, north, east = tile_bounds(tile[0], tile[1], self.zoom)
+        query = OVERPASS_QUERY.format(south=f'{south:.7f}', west=f'{west:.7f}',
+                                      north=f'{north:.7f}', east=f'{east:.7f}')
+        data = self.upstream(query)
+        check_overpass_response(data)
+        self._store(tile, data)
+        return data
+
+    def _fetch_once(self, tile):
+        # Called with the lock held: join a running fetch of the same tile or start one
+        future = self._in_flight.get(tile)
+        if future is None:
+            future = self._pool.submit(self._fetch, tile)
+            self._in_flight[tile] = future
+            future.add_done_callback(lambda _, tile=tile: self._forget_fetch(tile))
+        return future
+
+    def _forget_fetch(self, tile):
+        with self._lock:
+            self._in_flight.pop(tile, None)
+
+    def get_tiles(self, tiles, prefetch=False):
+        """(bytes of each tile, number served from the cache); missing tiles are fetched in parallel.
+
+        If a fetch fails, an expired copy of the tile is used when there is
+        one; otherwise OverpassError is raised.
+        """
+        with self._lock:
+            self._load_entries()
+        results = {}
+        for tile in tiles:
+            data = self._read(tile)
+            if data is not None:
+                results[tile] = data
+        hits = len(results)
+        with self._lock:
+            self.stats['prefetchCached' if prefetch else 'hits'] += hits
+            self.stats['prefetched' if prefetch else 'misses'] += len(tiles) - hits
+            futures = {tile: self._fetch_once(tile) for tile in tiles if tile not in results}
+        for tile, future in futures.items():
+            try:
+                results[tile] = future.result()
+            except Exception as e:
+                stale = self._read(tile, allow_stale=True)
+                if stale is None:
+                    if isinstance(e, OverpassError):
+                        raise
+                    raise OverpassError(f'Overpass request failed: {e}')
+                results[tile] = stale
+                with self._lock:
+                    self.stats['stale'] += 1
+        return [results[tile] for tile in tiles], hits
+
+    def get_bbox(self, left, bottom, right, top, prefetch=False, columnar=False):
+        """(merged OSM XML or columnar context, tile count, cached tile count) for a bbox"""
+        tiles = bbox_tiles(left, bottom, right, top, self.zoom, max_tiles=OVERPASS_MAX_TILES)
+        documents, hits = self.get_tiles(tiles, prefetch)
+        if columnar:
+            return columnar_osm_context(documents), len(tiles), hits
+        return merge_overpass_documents(documents), len(tiles), hits
+
+    def info(self):
+        with self._lock:
+            self._load_entries()
+            requested = self.stats['hits'] + self.stats['misses']
+            return dict(self.stats, tiles=len(self._entries), bytes=self._total_bytes,
+                        hitRate=round(self.stats['hits'] / requested, 3) if requested else None)
+
+
+overpass_cache = OverpassTileCache(OVERPASS_CACHE_DIR)
+
+
+class MyHTTPRequestHandler(KeepAliveHandlerMixin, http.server.SimpleHTTPRequestHandler):
+    export_directory = export_directory
+
+    def serve_static(self, head_only=False):
+        """Serve a file of the app, falling back to SimpleHTTPRequestHandler for the rest"""
+        fallback = super().do_HEAD if head_only else super().do_GET
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            # Directory redirects and listings stay with the base class
+            if not urllib.parse.urlsplit(self.path).path.endswith('/'):
+                return fallback()
+            for index in ('index.html', 'index.htm'):
+                if os.path.isfile(os.path.join(path, index)):
+                    path = os.path.join(path, index)
+                    break
+            else:
+                return fallback()
+        if not os.path.isfile(path):
+            return fallback()
+        self.send_file(path, self.guess_type(path), head_only, precompress=True)
+    
     def end_headers(self):
         # Add CORS headers to allow requests from the web app
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
+        if self.cache_control:
+            # Files carry validators and only need revalidating
+            self.send_header('Cache-Control', self.cache_control)
+            self.cache_control = None
+        else:
+            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
+            self.send_header('Pragma', 'no-cache')
+            self.send_header('Expires', '0')
         super().end_headers()
     
     def do_OPTIONS(self):
         # Handle CORS preflight requests
-        self.send_response(200)
-        self.end_headers()
+        self.send_empty(200)
     
     def do_POST(self):
-        if self.path == '/export':
-            # Handle OSM file export request
+        parsed = urllib.parse.urlsplit(self.path)
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        
+        if parsed.path == '/export/raw' or (parsed.path == '/export' and content_type in RAW_EXPORT_TYPES):
+            # Raw OSM XML body - streamed to disk without holding it in memory
+            self.handle_raw_export(urllib.parse.parse_qs(parsed.query))
+        elif parsed.path == '/export':
+            # Legacy JSON body: {"sequenceId": ..., "osmXml": ...}
+            self.handle_json_export()
+        elif parsed.path == '/export/batch':
+            self.handle_batch_export()
+        elif parsed.path == '/dataset':
+            self.handle_dataset_upload()
+        elif parsed.path == '/dataset/csv':
+            self.handle_csv_upload()
+        elif parsed.path == '/dataset/clear':
+            self.handle_dataset_clear()
+        elif parsed.path == '/sequences/status':
+            self.handle_status_update()
+        else:
+            # Unread request body would corrupt the next keep-alive request
+            self.close_connection = True
+            self.send_empty(404)
+    
+    def handle_raw_export(self, query):
+        """Handle POST /export/raw?sequenceId=<id> with the OSM XML as the request body"""
+        sequence_id = safe_sequence_id(query.get('sequenceId', ['unknown'])[0])
+        filename = f'sequence_{sequence_id}.osm'
+        
+        try:
+            declared_length = int(self.headers.get('Content-Length') or 0)
+            if declared_length > self.export_directory.max_bytes:
+                self.close_connection = True
+                self.send_json(413, {'error': f'Export exceeds {self.export_directory.max_bytes} bytes'})
+                return
+            
+            size = self.export_directory.write(iter_request_body(self.rfile, self.headers), filename)
+            
+            self.send_json(200, {
+                'success': True,
+                'url': f'http://localhost:{PORT}/exports/{filename}',
+                'filename': filename,
+                'bytes': size
+            })
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Exported: {filename} ({size} bytes, streamed)")
+            
+        except ExportTooLarge as e:
+            self.close_connection = True
+            self.send_json(413, {'error': str(e)})
+        except ValueError as e:
+            self.close_connection = True
+            self.send_json(400, {'error': str(e)})
+        except Exception as e:
+            self.close_connection = True
+            self.send_json(500, {'error': str(e)})
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Export error: {e}")
+    
+    def handle_json_export(self):
+        """Handle the original JSON export request"""
+        try:
+            content_length = int(self.headers['Content-Length'])
+            if content_length > self.export_directory.max_bytes:
+                self.close_connection = True
+                self.send_json(413, {'error': f'Export exceeds {self.export_directory.max_bytes} bytes'})
+                return
+            post_data = self.rfile.read(content_length)
+            
+            # Parse JSON request
+            data = json.loads(post_data.decode('utf-8'))
+            if 'sequenceIds' in data:
+                self.handle_sequence_export(data['sequenceIds'])
+                return
+            sequence_id = safe_sequence_id(data.get('sequenceId', 'unknown'))
+            osm_xml = data.get('osmXml', '')
+            
+            if not osm_xml:
+                self.send_json(400, {'error': 'No OSM XML provided'})
+                return
+            
+            # Save OSM file
+            filename = f'sequence_{sequence_id}.osm'
+            self.export_directory.write([osm_xml.encode('utf-8')], filename)
+            
+            # Return URL to the file
+            file_url = f'http://localhost:{PORT}/exports/{filename}'
+            
+            self.send_json(200, {
+                'success': True,
+                'url': file_url,
+                'filename': filename
+            })
+            
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Exported: {filename}")
+            
+        except Exception as e:
+            # Request body may be partially read - don't reuse the connection
+            self.close_connection = True
+            self.send_json(500, {'error': str(e)})
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Export error: {e}")
+    
+    def handle_sequence_export(self, sequence_ids):
+        """Render stored sequences to .osm files on the server (POST /export with sequenceIds)"""
+        if not isinstance(sequence_ids, list) or not sequence_ids:
+            self.send_json(400, {'error': 'sequenceIds must be a non-empty list'})
+            return
+        sequence_ids = [js_string(sequence_id) for sequence_id in sequence_ids]
+        missing = [sequence_id for sequence_id in sequence_ids if not dataset_store.has_sequence(sequence_id)]
+        if missing:
+            self.send_json(404, {'error': 'Unknown sequence ids', 'missing': missing})
+            return
+        
+        files = []
+        for sequence_id in sequence_ids:
             try:
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                
-                # Parse JSON request
-                data = json.loads(post_data.decode('utf-8'))
-                sequence_id = data.get('sequenceId', 'unknown')
-                osm_xml = data.get('osmXml', '')
-                
-                if not osm_xml:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'No OSM XML provided'}).encode())
+                filename = export_stored_sequence(sequence_id)
+            except SequenceNotFound as e:
+                # Dataset changed mid-export
+                self.send_json(404, {'error': 'Unknown sequence ids', 'missing': [e.sequence_id]})
+                return
+            files.append({
+                'sequenceId': sequence_id,
+                'filename': filename,
+                'url': f'http://localhost:{PORT}/exports/{filename}'
+            })
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Exported: {filename}")
+        
+        # Single-sequence requests keep the url/filename shape of the XML export
+        self.send_json(200, {
+            'success': True,
+            'url': files[0]['url'],
+            'filename': files[0]['filename'],
+            'files': files
+        })
+    
+    def handle_batch_export(self):
+        """Handle POST /export/batch: several sequences in one .osm file or one zip.
+
+        Body is {"sequenceIds": [...]} for sequences in the dataset store, or
+        {"exports": [{"sequenceId": ..., "osmXml": ...}, ...]} for documents
+        rendered in the browser, plus an optional "format" ("osm" or "zip").
+        """
+        try:
+            data = self.read_json_body(self.export_directory.max_bytes)
+            export_format = data.get('format', 'osm')
+            if export_format not in BATCH_EXPORT_FORMATS:
+                raise ValueError(f'format must be one of: {", ".join(BATCH_EXPORT_FORMATS)}')
+            
+            if 'sequenceIds' in data:
+                sequence_ids = data['sequenceIds']
+                if not isinstance(sequence_ids, list) or not sequence_ids:
+                    raise ValueError('sequenceIds must be a non-empty list')
+                sequence_ids = list(dict.fromkeys(js_string(sequence_id) for sequence_id in sequence_ids))
+                missing = [sequence_id for sequence_id in sequence_ids if not dataset_store.has_sequence(sequence_id)]
+                if missing:
+                    self.send_json(404, {'error': 'Unknown sequence ids', 'missing': missing})
                     return
-                
-                # Save OSM file
-                filename = f'sequence_{sequence_id}.osm'
-                filepath = os.path.join(EXPORT_DIR, filename)
-                
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(osm_xml)
-                
-                # Return URL to the file
-                file_url = f'http://localhost:{PORT}/exports/{filename}'
-                
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({
-                    'success': True,
-                    'url': file_url,
-                    'filename': filename
-                }).encode())
-                
-                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Exported: {filename}")
-                
-            except Exception as e:
-                self.send_response(500)
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)}).encode())
-                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Export error: {e}")
+                merged = iter_stored_batch_osm(sequence_ids)
+                entries = iter_stored_sequence_files(sequence_ids)
+            else:
+                documents = batch_documents(data.get('exports'))
+                sequence_ids = [sequence_id for sequence_id, _ in documents]
+                merged = iter_merged_osm(documents)
+                entries = batch_zip_entries(documents)
+            
+            filename = batch_export_filename(sequence_ids, export_format)
+            if export_format == 'zip':
+                size = self.export_directory.write_zip(entries, filename)
+            else:
+                size = self.export_directory.write(merged, filename)
+            
+            self.send_json(200, {
+                'success': True,
+                'url': f'http://localhost:{PORT}/exports/{filename}',
+                'filename': filename,
+                'format': export_format,
+                'sequenceCount': len(sequence_ids),
+                'bytes': size
+            })
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Exported batch: "
+                  f"{filename} ({len(sequence_ids)} sequences, {size} bytes)")
+        except SequenceNotFound as e:
+            # Dataset changed mid-export; the partial file was discarded
+            self.send_json(404, {'error': 'Unknown sequence ids', 'missing': [e.sequence_id]})
+        except ExportTooLarge as e:
+            self.close_connection = True
+            self.send_json(413, {'error': str(e)})
+        except (ValueError, AttributeError) as e:
+            self.close_connection = True
+            self.send_json(400, {'error': str(e)})
+        except Exception as e:
+            self.close_connection = True
+            self.send_json(500, {'error': str(e)})
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Batch export error: {e}")
+    
+    def spool_request_body(self, max_bytes, suffix):
+        """Write the request body to a temp file in DATASET_DIR and return its path (the caller deletes it)"""
+        declared_length = int(self.headers.get('Content-Length') or 0)
+        if declared_length > max_bytes:
+            raise ExportTooLarge(f'Request body exceeds {max_bytes} bytes')
+        os.makedirs(DATASET_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='upload-', suffix=suffix, dir=DATASET_DIR)
+        try:
+            received = 0
+            with os.fdopen(fd, 'wb') as f:
+                for block in iter_request_body(self.rfile, self.headers):
+                    received += len(block)
+                    if received > max_bytes:
+                        raise ExportTooLarge(f'Request body exceeds {max_bytes} bytes')
+                    f.write(block)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return temp_path
+    
+    def handle_dataset_upload(self):
+        """Handle POST /dataset: store a FeatureCollection grouped by sequence"""
+        temp_path = None
+        try:
+            # Spool the upload to disk so only the parsed dataset is held in memory, not the body too
+            temp_path = self.spool_request_body(MAX_DATASET_JSON_BYTES, '.json')
+            with open(temp_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Accept either {"geojson": ..., "statuses": {...}} or a bare FeatureCollection
+            geojson = data.get('geojson', data)
+            info = dataset_store.replace(geojson, data.get('statuses'))
+            self.send_json(200, {'success': True, 'dataset': info})
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Dataset stored: "
+                  f"{info['sequenceCount']} sequences, {info['featureCount']} features")
+        except ExportTooLarge as e:
+            self.close_connection = True
+            self.send_json(413, {'error': str(e)})
+        except (ValueError, AttributeError) as e:
+            self.close_connection = True
+            self.send_json(400, {'error': str(e)})
+        except Exception as e:
+            self.close_connection = True
+            self.send_json(500, {'error': str(e)})
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Dataset upload error: {e}")
+        finally:
+            if temp_path:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+    
+    def handle_csv_upload(self):
+        """Handle POST /dataset/csv: ingest a raw CSV body into the dataset store"""
+        temp_path = None
+        try:
+            # Spool the upload to disk so the CSV is never held in memory
+            temp_path = self.spool_request_body(MAX_DATASET_BYTES, '.csv')
+            
+            # Grouped sequences go straight into the store's build directory
+            info = dataset_store.replace_sequences(
+                (sequence_id, [feature]) for _, sequence_id, feature in ingest_csv(temp_path, DATASET_DIR))
+            self.send_json(200, {'success': True, 'dataset': info})
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] CSV ingested: "
+                  f"{info['sequenceCount']} sequences")
+        except ExportTooLarge as e:
+            self.close_connection = True
+            self.send_json(413, {'error': str(e)})
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            self.close_connection = True
+            self.send_json(400, {'error': str(e)})
+        except Exception as e:
+            self.close_connection = True
+            self.send_json(500, {'error': str(e)})
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] CSV ingest error: {e}")
+        finally:
+            if temp_path:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+    
+    def handle_status_update(self):
+        """Handle POST /sequences/status with {"statuses": {"<id>": "done", ...}}"""
+        try:
+            data = self.read_json_body(MAX_JSON_BODY_BYTES)
+            changed = dataset_store.update_statuses(data.get('statuses') or {})
+            self.send_json(200, {'success': True, 'changed': changed})
+        except ExportTooLarge as e:
+            self.close_connection = True
+            self.send_json(413, {'error': str(e)})
+        except (ValueError, AttributeError) as e:
+            self.close_connection = True
+            self.send_json(400, {'error': str(e)})
+        except Exception as e:
+            self.close_connection = True
+            self.send_json(500, {'error': str(e)})
+    
+    def handle_dataset_clear(self):
+        """Handle DELETE /dataset (or POST /dataset/clear)"""
+        # Any request body is ignored
+        if int(self.headers.get('Content-Length') or 0) > 0 or self.headers.get('Transfer-Encoding'):
+            self.close_connection = True
+        dataset_store.clear()
+        self.send_json(200, {'success': True})
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Dataset cleared")
+    
+    def do_DELETE(self):
+        if urllib.parse.urlsplit(self.path).path == '/dataset':
+            self.handle_dataset_clear()
+        else:
+            self.close_connection = True
+            self.send_empty(404)
+    
+    def handle_dataset_get(self, path, query):
+        """Serve the dataset API: /dataset/info, /dataset/geojson, /sequences[/<id>[/features]]"""
+        if path == '/dataset/info':
+            self.send_json(200, {
+                'status': 'ok',
+                'service': 'osmagic-server',
+                'dataset': dataset_store.info()
+            })
+        elif path == '/dataset/geojson':
+            if dataset_store.info() is None:
+                self.send_json(404, {'error': 'No dataset stored'})
+                return
+            self.send_stream(200, 'application/json', dataset_store.iter_feature_collection())
+        elif path == '/sequences':
+            # GET /sequences?offset=&limit=&status=active,done
+            try:
+                offset = max(0, int(query.get('offset', ['0'])[0]))
+                limit = int(query['limit'][0]) if 'limit' in query else None
+            except ValueError:
+                self.send_json(400, {'error': 'offset and limit must be integers'})
+                return
+            statuses = None
+            if 'status' in query:
+                statuses = set(','.join(query['status']).split(','))
+            self.send_json(200, dataset_store.list_sequences(offset, limit, statuses))
         else:
-            self.send_response(404)
+            sequence_path = path[len('/sequences/'):]
+            features_only = sequence_path.endswith('/features')
+            if features_only:
+                sequence_path = sequence_path[:-len('/features')]
+            sequence_id = urllib.parse.unquote(sequence_path)
+            result = dataset_store.read_features(sequence_id)
+            if result is None:
+                self.send_json(404, {'error': f'Sequence {sequence_id} not found'})
+                return
+            summary, features = result
+            # Stored feature arrays are spliced into the response without re-encoding
+            if features_only:
+                body = b'{"type":"FeatureCollection","features":' + features + b'}'
+            else:
+                body = json.dumps(summary).encode()[:-1] + b', "features": ' + features + b'}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
             self.end_headers()
+            self.wfile.write(body)
+    
+    def handle_overpass(self, query):
+        """GET /overpass?bbox=left,bottom,right,top[&prefetch=1][&format=columnar] - the preview's OSM context"""
+        try:
+            left, bottom, right, top = (float(value) for value in query['bbox'][0].split(','))
+        except (KeyError, ValueError):
+            self.send_json(400, {'error': 'bbox must be left,bottom,right,top'})
+            return
+        # float() accepts 'inf' and 'nan'; neither maps to a tile
+        if not all(math.isfinite(value) for value in (left, bottom, right, top)) or not (left <= right and bottom <= top):
+            self.send_json(400, {'error': 'bbox must be left,bottom,right,top'})
+            return
+        bottom, top = (min(TILE_MAX_LATITUDE, max(-TILE_MAX_LATITUDE, lat)) for lat in (bottom, top))
+        
+        started = time.time()
+        prefetch = query.get('prefetch', ['0'])[0] == '1'
+        columnar = query.get('format', ['xml'])[0] == 'columnar'
+        try:
+            body, tile_count, cached_count = overpass_cache.get_bbox(left, bottom, right, top, prefetch, columnar)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        except OverpassError as e:
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Overpass error: {e}")
+            self.send_json(502, {'error': str(e)})
+            return
+        
+        headers = {'X-Overpass-Tiles': f'{cached_count}/{tile_count} cached', 'Vary': 'Accept-Encoding'}
+        if len(body) >= MIN_COMPRESS_BYTES and accepts_gzip(self.headers.get('Accept-Encoding')):
+            body = gzip.compress(body, GZIP_LEVEL, mtime=0)
+            headers['Content-Encoding'] = 'gzip'
+        self.send_response(200)
+        self.send_header('Content-Type', OSM_CONTEXT_CONTENT_TYPE if columnar else 'application/xml')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Overpass{' prefetch' if prefetch else ''}: {tile_count} tiles, "
+              f"{cached_count} cached ({time.time() - started:.2f}s)")
     
     def do_GET(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        if parsed.path in ('/dataset/info', '/dataset/geojson', '/sequences') or parsed.path.startswith('/sequences/'):
+            self.handle_dataset_get(parsed.path, urllib.parse.parse_qs(parsed.query))
+            return
+        
+        if parsed.path == '/overpass':
+            self.handle_overpass(urllib.parse.parse_qs(parsed.query))
+            return
+        if parsed.path == '/overpass/status':
+            self.send_json(200, overpass_cache.info())
+            return
+        
         # Handle focus-josm request
         if self.path == '/focus-josm':
             success = focus_josm_window()
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            self.send_json(200, {
                 'success': success,
                 'message': 'JOSM focused' if success else 'JOSM window not found'
-            }).encode())
+            })
             return
         
         # Serve static files and exported OSM files
-        if self.path.startswith('/exports/'):
-            # Serve exported OSM files
-            filename = self.path[9:]  # Remove '/exports/' prefix
-            filepath = os.path.join(EXPORT_DIR, filename)
-            
-            if os.path.exists(filepath) and os.path.isfile(filepath):
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/xml')
-                self.send_header('Content-Disposition', f'inline; filename="{filename}"')
-                self.end_headers()
-                
-                with open(filepath, 'rb') as f:
-                    shutil.copyfileobj(f, self.wfile)
-            else:
-                self.send_response(404)
-                self.end_headers()
+        if parsed.path.startswith('/exports/'):
+            self.serve_export(parsed.path)
+        else:
+            self.serve_static()
+    
+    def do_HEAD(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        if parsed.path.startswith('/exports/'):
+            self.serve_export(parsed.path, head_only=True)
         else:
-            # Serve regular static files
-            super().do_GET()
+            self.serve_static(head_only=True)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='OSMAGIC Task Manager server')
+    parser.add_argument('--mode', choices=['threaded', 'single'], default=SERVER_MODE,
+                        help='threaded = bounded worker pool with keep-alive, single = one request at a time')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help='Number of worker threads in threaded mode')
+    parser.add_argument('--max-export-mb', type=int, default=MAX_EXPORT_BYTES // (1024 * 1024),
+                        help='Largest accepted export upload in megabytes')
+    parser.add_argument('--no-browser', action='store_true',
+                        help='Do not open the browser on startup')
+    parser.add_argument('--ingest-csv', metavar='CSV_FILE',
+                        help='Convert a CSV file to sequences and exit instead of serving')
+    parser.add_argument('--output', metavar='GEOJSON_FILE',
+                        help='With --ingest-csv: write a FeatureCollection here instead of the dataset store')
+    parser.add_argument('--ingest-workers', type=int, default=None,
+                        help='Worker processes for CSV ingest (default: CPU count)')
+    parser.add_argument('--overpass-url', default=OVERPASS_URL,
+                        help='Overpass API behind /overpass (e.g. a local stand-in for offline use)')
+    return parser.parse_args()
+
+def run_csv_ingest(args):
+    """Command-line CSV ingest: into the dataset store, or to a GeoJSON file"""
+    started = datetime.now()
+    print(f"Ingesting {args.ingest_csv}...")
+    sequences = ingest_csv(args.ingest_csv, DATASET_DIR if not args.output else None,
+                           progress_callback=lambda rows: print(f"  {rows} rows read", end='\r'))
+    if args.output:
+        count = write_csv_geojson(sequences, args.output)
+        print()
+        print(f"Wrote {count} sequences to {args.output}")
+    else:
+        info = dataset_store.replace_sequences(
+            (sequence_id, [feature]) for _, sequence_id, feature in sequences)
+        print()
+        print(f"Stored {info['sequenceCount']} sequences in {DATASET_DIR}")
+    print(f"Done in {(datetime.now() - started).total_seconds():.1f}s")
 
 def main():
+    args = parse_args()
+    export_directory.max_bytes = args.max_export_mb * 1024 * 1024
+    csv_ingest_pool.workers = args.ingest_workers
+    
+    if args.ingest_csv:
+        try:
+            run_csv_ingest(args)
+        finally:
+            csv_ingest_pool.shutdown()
+        return
+    
     # Change to the directory where this script is located
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
     
+    if args.overpass_url != OVERPASS_URL:
+        overpass_cache.upstream = lambda query: fetch_overpass(query, url=args.overpass_url)
+    
     Handler = MyHTTPRequestHandler
     
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
+    with create_server(args.mode, PORT, Handler, max_workers=args.workers) as httpd:
         url = f"http://localhost:{PORT}"
         print("=" * 60)
         print(f"Task Manager Server is running!")
         print(f"Open your browser and go to: {url}")
         print(f"Export directory: {EXPORT_DIR}")
+        print(f"Dataset directory: {DATASET_DIR}")
+        print(f"Overpass cache: {OVERPASS_CACHE_DIR} ({args.overpass_url})")
+        if args.mode == 'single':
+            print(f"Serving mode: single (one request at a time)")
+        else:
+            print(f"Serving mode: threaded ({args.workers} workers, keep-alive)")
         print("=" * 60)
         print("Press Ctrl+C to stop the server")
         print("=" * 60)
         
         # Try to open browser automatically
-        try:
-            webbrowser.open(url)
-        except:
-            pass
+        if not args.no_browser:
+            try:
+                webbrowser.open(url)
+            except:
+                pass
         
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
-            print("\n\nServer stopped.")
+            print("\n\nStopping server (waiting for active requests)...")
+    csv_ingest_pool.shutdown()
+    print("Server stopped.")
 
 if __name__ == "__main__":
     main()
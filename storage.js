@@ -1,9 +1,19 @@
 // IndexedDB Storage Manager for OSMAGIC Task Manager
+// Schema v2: one record per sequence - 'sequences' holds id, status and stats (indexed by status),
+// 'sequenceFeatures' the features, so a status change rewrites only the small record.
+// Changes are queued with queueSequences() and written together by a debounced flush().
 class StorageManager {
     constructor() {
         this.dbName = 'OSMAGIC_TaskManager';
-        this.dbVersion = 1;
+        this.dbVersion = 2;
         this.db = null;
+        this.flushDelay = 300; // ms of quiet before queued changes are written
+
+        // Pending writes: sequence id -> { sequence, features (rewrite its features too) }
+        this.dirtySequences = new Map();
+        this.dirtyTaskData = null;
+        this.flushTimer = null;
+        this.flushWaiters = [];
     }
 
     async init() {
@@ -29,32 +39,156 @@ class StorageManager {
                     taskStore.createIndex('timestamp', 'timestamp', { unique: false });
                 }
 
-                if (!db.objectStoreNames.contains('geojsonData')) {
-                    db.createObjectStore('geojsonData', { keyPath: 'id' });
+                if (!db.objectStoreNames.contains('sequences')) {
+                    const sequenceStore = db.createObjectStore('sequences', { keyPath: 'id' });
+                    sequenceStore.createIndex('status', 'status', { unique: false });
+                }
+
+                if (!db.objectStoreNames.contains('sequenceFeatures')) {
+                    db.createObjectStore('sequenceFeatures', { keyPath: 'id' });
+                }
+
+                // v1 kept everything in two 'main' records
+                if (db.objectStoreNames.contains('geojsonData')) {
+                    this.migrateFromV1(db, event.target.transaction);
                 }
             };
         });
     }
 
-    async saveTaskData(data) {
+    migrateFromV1(db, transaction) {
+        // Split the v1 dataset and status list into per-sequence records (runs inside the upgrade)
+        const geoRequest = transaction.objectStore('geojsonData').get('main');
+        const taskRequest = transaction.objectStore('taskData').get('main');
+
+        taskRequest.onsuccess = () => {
+            const geojson = geoRequest.result ? geoRequest.result.geojson : null;
+            const taskData = taskRequest.result;
+            const savedSequences = (taskData && taskData.sequences) || [];
+            const statuses = new Map(savedSequences.map(seq => [String(seq.id), seq.status || '']));
+
+            // Same grouping as the v1 loader: sequences come from the features when there are any
+            const featuresById = new Map();
+            if (geojson && geojson.features) {
+                geojson.features.forEach(feature => {
+                    feature.geometry = PackedGeometry.revive(feature.geometry);
+                    const sequenceId = Ingest.sequenceIdOf(feature);
+                    if (!featuresById.has(sequenceId)) featuresById.set(sequenceId, []);
+                    featuresById.get(sequenceId).push(feature);
+                });
+            } else {
+                statuses.forEach((status, id) => featuresById.set(id, []));
+            }
+
+            const sequenceStore = transaction.objectStore('sequences');
+            const featureStore = transaction.objectStore('sequenceFeatures');
+            featuresById.forEach((features, id) => {
+                const stats = Ingest.calculateStats(features);
+                sequenceStore.put(this.sequenceRecord({
+                    id: id,
+                    status: statuses.get(id),
+                    featureCount: stats.features,
+                    nodeCount: stats.nodes,
+                    wayCount: stats.ways
+                }));
+                featureStore.put({ id: id, features: features });
+            });
+
+            if (taskData) {
+                delete taskData.sequences;
+                transaction.objectStore('taskData').put(taskData);
+            }
+            db.deleteObjectStore('geojsonData');
+        };
+    }
+
+    sequenceRecord(sequence) {
+        // The small per-sequence record: no features
+        return {
+            id: String(sequence.id),
+            status: sequence.status || '',
+            featureCount: sequence.featureCount || 0,
+            nodeCount: sequence.nodeCount || 0,
+            wayCount: sequence.wayCount || 0,
+            date: sequence.date || new Date().toLocaleDateString()
+        };
+    }
+
+    queueSequences(sequences, { features = true } = {}) {
+        // Mark sequences for the next flush; features: false for status-only changes
+        sequences.forEach(sequence => {
+            if (!sequence) return;
+            const id = String(sequence.id);
+            const pending = this.dirtySequences.get(id);
+            this.dirtySequences.set(id, {
+                sequence: sequence,
+                features: features || (pending ? pending.features : false)
+            });
+        });
+    }
+
+    queueTaskData(data) {
+        this.dirtyTaskData = {
+            id: 'main',
+            currentIndex: data.currentIndex,
+            currentView: data.currentView || 'all',
+            timestamp: new Date().toISOString()
+        };
+    }
+
+    scheduleFlush() {
+        // Resolves once the queued changes (and any queued after them within flushDelay) are written
+        return new Promise((resolve, reject) => {
+            this.flushWaiters.push({ resolve, reject });
+            if (this.flushTimer) clearTimeout(this.flushTimer);
+            this.flushTimer = setTimeout(() => this.flush(), this.flushDelay);
+        });
+    }
+
+    async flush() {
+        // Write all queued changes in one transaction
+        if (this.flushTimer) {
+            clearTimeout(this.flushTimer);
+            this.flushTimer = null;
+        }
+        const waiters = this.flushWaiters;
+        const entries = Array.from(this.dirtySequences.values());
+        const taskData = this.dirtyTaskData;
+        this.flushWaiters = [];
+        this.dirtySequences = new Map();
+        this.dirtyTaskData = null;
+
+        try {
+            if (entries.length > 0 || taskData) {
+                await this.writeBatch(entries, taskData);
+            }
+            waiters.forEach(waiter => waiter.resolve());
+        } catch (error) {
+            waiters.forEach(waiter => waiter.reject(error));
+            throw error;
+        }
+    }
+
+    async writeBatch(entries, taskData) {
         if (!this.db) await this.init();
 
         return new Promise((resolve, reject) => {
-            const transaction = this.db.transaction(['taskData'], 'readwrite');
-            const store = transaction.objectStore('taskData');
-            
-            const taskData = {
-                id: 'main',
-                sequences: data.sequences,
-                currentIndex: data.currentIndex,
-                currentView: data.currentView || 'all',
-                timestamp: new Date().toISOString()
-            };
+            const transaction = this.db.transaction(['sequences', 'sequenceFeatures', 'taskData'], 'readwrite');
+            const sequenceStore = transaction.objectStore('sequences');
+            const featureStore = transaction.objectStore('sequenceFeatures');
 
-            const request = store.put(taskData);
+            entries.forEach(entry => {
+                sequenceStore.put(this.sequenceRecord(entry.sequence));
+                if (entry.features) {
+                    featureStore.put({ id: String(entry.sequence.id), features: entry.sequence.features || [] });
+                }
+            });
+            if (taskData) {
+                transaction.objectStore('taskData').put(taskData);
+            }
 
-            request.onsuccess = () => resolve();
-            request.onerror = () => reject(request.error);
+            transaction.oncomplete = () => resolve();
+            transaction.onerror = () => reject(transaction.error);
         });
     }
 
@@ -74,50 +208,52 @@ class StorageManager {
         });
     }
 
-    async saveGeoJSONData(geojsonData) {
-        if (!this.db) await this.init();
-
-        return new Promise((resolve, reject) => {
-            const transaction = this.db.transaction(['geojsonData'], 'readwrite');
-            const store = transaction.objectStore('geojsonData');
-            
-            const data = {
-                id: 'main',
-                geojson: geojsonData,
-                timestamp: new Date().toISOString()
-            };
-
-            const request = store.put(data);
-
-            request.onsuccess = () => resolve();
-            request.onerror = () => reject(request.error);
-        });
-    }
-
-    async loadGeoJSONData() {
+    async loadSequences() {
+        // Every stored sequence with its features, in key order
         if (!this.db) await this.init();
 
         return new Promise((resolve, reject) => {
-            const transaction = this.db.transaction(['geojsonData'], 'readonly');
-            const store = transaction.objectStore('geojsonData');
-            const request = store.get('main');
+            const transaction = this.db.transaction(['sequences', 'sequenceFeatures'], 'readonly');
+            const sequenceRequest = transaction.objectStore('sequences').getAll();
+            const featureRequest = transaction.objectStore('sequenceFeatures').getAll();
 
-            request.onsuccess = () => {
-                resolve(request.result ? request.result.geojson : null);
+            transaction.oncomplete = () => {
+                const featuresById = new Map(featureRequest.result.map(record => [record.id, record.features]));
+                resolve(sequenceRequest.result.map(record => {
+                    const features = featuresById.get(record.id) || [];
+                    // Imported geometries are stored as { type, packed } - restore their coordinates getter
+                    if (typeof PackedGeometry !== 'undefined') {
+                        features.forEach(feature => {
+                            feature.geometry = PackedGeometry.revive(feature.geometry);
+                        });
+                    }
+                    return { ...record, features: features };
+                }));
             };
 
-            request.onerror = () => reject(request.error);
+            transaction.onerror = () => reject(transaction.error);
         });
     }
 
     async clearAll() {
         if (!this.db) await this.init();
 
+        // Drop queued writes so they cannot bring cleared data back
+        if (this.flushTimer) {
+            clearTimeout(this.flushTimer);
+            this.flushTimer = null;
+        }
+        this.flushWaiters.forEach(waiter => waiter.resolve());
+        this.flushWaiters = [];
+        this.dirtySequences = new Map();
+        this.dirtyTaskData = null;
+
         return new Promise((resolve, reject) => {
-            const transaction = this.db.transaction(['taskData', 'geojsonData'], 'readwrite');
+            const transaction = this.db.transaction(['taskData', 'sequences', 'sequenceFeatures'], 'readwrite');
             
-            const taskRequest = transaction.objectStore('taskData').clear();
-            const geoRequest = transaction.objectStore('geojsonData').clear();
+            transaction.objectStore('taskData').clear();
+            transaction.objectStore('sequences').clear();
+            transaction.objectStore('sequenceFeatures').clear();
 
             transaction.oncomplete = () => resolve();
             transaction.onerror = () => reject(transaction.error);
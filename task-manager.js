@@ -6,6 +6,7 @@ class TaskManager {
         this.map = null;
         this.currentPreviewSequence = null;
         this.currentSequenceIndex = 0; // Track which sequence is currently displayed
+        this.serverBacked = false; // Sequences loaded as metadata only; features live on the server
         
         // Load cached data on page load (async)
         this.loadFromCache();
@@ -96,6 +97,15 @@ class TaskManager {
                 return;
             }
 
+            // Sequences loaded from the server have no local GeoJSON - fetch it once to merge
+            if (!this.geojsonData && this.serverBacked) {
+                try {
+                    this.geojsonData = await sequenceAPI.getGeoJSON();
+                } catch (error) {
+                    console.warn('Could not fetch existing dataset from server:', error);
+                }
+            }
+
             // Merge with existing cached data instead of replacing
             const existingFeatures = this.geojsonData?.features || [];
             const allFeatures = [...existingFeatures, ...newFeatures];
@@ -1015,15 +1025,26 @@ class TaskManager {
     }
 
 
-    exportSequence(sequenceId) {
+    async exportSequence(sequenceId) {
         // Convert to string for comparison
         const idStr = String(sequenceId);
-        const sequence = this.sequences.find(s => String(s.id) === idStr);
+        let sequence = this.sequences.find(s => String(s.id) === idStr);
         if (!sequence) {
             alert('Sequence not found');
             return;
         }
 
+        // If sequence doesn't have features, fetch from server
+        if (!sequence.features) {
+            try {
+                sequence = await sequenceAPI.getSequence(idStr);
+            } catch (error) {
+                console.error('Failed to fetch sequence from server:', error);
+                alert(`Error exporting sequence: ${error.message}`);
+                return;
+            }
+        }
+
         try {
             const josmXml = this.generateJOSMForSequence(sequence);
             this.downloadFile(josmXml, `sequence_${sequenceId}.osm`, 'application/xml');
@@ -1118,7 +1139,22 @@ class TaskManager {
         }
 
         const selected = Array.from(this.selectedSequences);
-        let exported = 0;
+
+        // Server-backed: the server renders and merges the stored sequences, nothing is fetched here
+        if (this.serverBacked) {
+            try {
+                const result = await sequenceAPI.exportBatch({ sequenceIds: selected });
+                this.downloadUrl(result.url, result.filename);
+                this.renderTable();
+                alert(`Exported ${result.sequenceCount} of ${selected.length} sequences (merged into one file)`);
+                return;
+            } catch (error) {
+                console.warn('Server batch export failed, rendering sequences in the browser:', error);
+            }
+        }
+
+        // Offline fallback: render each sequence here, then merge through the helper if it is up
+        const exports = [];
 
         for (const sequenceId of selected) {
             let sequence = this.sequences.find(s => s.id === sequenceId);
@@ -1135,17 +1171,34 @@ class TaskManager {
             
             if (sequence) {
                 try {
-                    const josmXml = this.generateJOSMForSequence(sequence);
-                    this.downloadFile(josmXml, `sequence_${sequenceId}.osm`, 'application/xml');
-                    exported++;
+                    exports.push({ sequenceId: String(sequenceId), osmXml: this.generateJOSMForSequence(sequence) });
                 } catch (error) {
                     console.error(`Error exporting ${sequenceId}:`, error);
                 }
             }
         }
 
+        // One merged file with unique ids from the server, or one file per sequence without it
+        let merged = false;
+        if (exports.length > 1) {
+            try {
+                const result = await sequenceAPI.exportBatch({ exports: exports });
+                const response = await fetch(result.url, { cache: 'no-cache' });
+                if (!response.ok) throw new Error(`${response.status} ${response.statusText}`);
+                this.downloadFile(await response.text(), result.filename, 'application/xml');
+                merged = true;
+            } catch (error) {
+                console.warn('Batch export failed, downloading sequences separately:', error);
+            }
+        }
+        if (!merged) {
+            exports.forEach(item => {
+                this.downloadFile(item.osmXml, `sequence_${item.sequenceId}.osm`, 'application/xml');
+            });
+        }
+
         this.renderTable();
-        alert(`Exported ${exported} of ${selected.length} sequences`);
+        alert(`Exported ${exports.length} of ${selected.length} sequences${merged ? ' (merged into one file)' : ''}`);
     }
 
     generateJOSMForSequence(sequence) {
@@ -1270,13 +1323,18 @@ class TaskManager {
     downloadFile(content, filename, mimeType) {
         const blob = new Blob([content], { type: mimeType });
         const url = URL.createObjectURL(blob);
+        this.downloadUrl(url, filename);
+        URL.revokeObjectURL(url);
+    }
+
+    downloadUrl(url, filename) {
+        // Same-origin link with a download name: the browser saves it straight to disk
         const a = document.createElement('a');
         a.href = url;
         a.download = filename;
         document.body.appendChild(a);
         a.click();
         document.body.removeChild(a);
-        URL.revokeObjectURL(url);
     }
 
 
@@ -1522,16 +1580,25 @@ class TaskManager {
 
     async uploadToServerAndSave() {
         try {
-            // Upload full dataset to server (if available)
-            if (this.geojsonData && this.sequences.length > 0) {
+            // Upload full dataset to server (if available) - an unchanged dataset only sends status changes
+            if (this.sequences.length > 0 && (this.geojsonData || this.serverBacked)) {
                 try {
-                    await sequenceAPI.uploadDataset(this.geojsonData, this.sequences);
-                    console.log('Dataset uploaded to server successfully');
+                    if (this.geojsonData) {
+                        await sequenceAPI.uploadDataset(this.geojsonData, this.sequences);
+                    } else {
+                        await sequenceAPI.updateStatuses(this.sequences);
+                    }
+                    this.serverBacked = true;
+                    console.log('Dataset synced to server successfully');
                 } catch (serverError) {
-                    console.warn('Server upload failed, falling back to local storage:', serverError);
-                    // Fallback to local storage if server is not available
-                    await this.saveToCacheLocal();
-                    return;
+                    if (this.geojsonData) {
+                        console.warn('Server upload failed, falling back to local storage:', serverError);
+                        // Fallback to local storage if server is not available
+                        await this.saveToCacheLocal();
+                        return;
+                    }
+                    // No local GeoJSON to fall back to - statuses are still kept in the metadata cache below
+                    console.warn('Server status sync failed:', serverError);
                 }
             }
             
@@ -1598,10 +1665,15 @@ class TaskManager {
                 try {
                     const serverAvailable = await sequenceAPI.checkServerStatus();
                     if (serverAvailable) {
-                        // Load GeoJSON from server
-                        this.geojsonData = await sequenceAPI.getGeoJSON();
-                        // Reprocess to get sequences
-                        this.processGeoJSON(this.geojsonData);
+                        // Load sequence metadata only - features are fetched per sequence on demand
+                        const summaries = await sequenceAPI.getSequenceSummaries();
+                        if (summaries.length === 0) {
+                            throw new Error('Server has no dataset');
+                        }
+                        const date = new Date().toLocaleDateString();
+                        this.sequences = summaries.map(seq => ({ ...seq, date: date }));
+                        this.geojsonData = null;
+                        this.serverBacked = true;
                         // Restore status from cached sequences
                         const statusMap = new Map();
                         cacheData.sequences.forEach(seq => {
@@ -1748,6 +1820,7 @@ class TaskManager {
                 
                 // Reset local data
                 this.geojsonData = null;
+                this.serverBacked = false;
                 this.sequences = [];
                 this.selectedSequences.clear();
                 this.currentSequenceIndex = 0;
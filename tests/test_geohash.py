@@ -0,0 +1,62 @@
+"""decode_geohashes must return exactly what decode_geohash returns for every input"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import GEOHASH_BASE32, GEOHASH_EXACT_CHARS, decode_geohash, decode_geohashes
+
+
+class DecodeGeohashesParityTest(unittest.TestCase):
+
+    def assert_parity(self, geohashes):
+        expected = [decode_geohash(geohash) for geohash in geohashes]
+        self.assertEqual(decode_geohashes(geohashes), expected)
+        # Results are compared as floats; repr catches -0.0 vs 0.0 and last-bit differences
+        self.assertEqual([repr(result) for result in decode_geohashes(geohashes)],
+                         [repr(result) for result in expected])
+
+    def test_random_geohashes(self):
+        rng = random.Random(20261017)
+        geohashes = [''.join(rng.choice(GEOHASH_BASE32) for _ in range(rng.randint(1, GEOHASH_EXACT_CHARS + 4)))
+                     for _ in range(20000)]
+        self.assert_parity(geohashes)
+
+    def test_every_length(self):
+        rng = random.Random(7)
+        for length in range(0, 24):
+            with self.subTest(length=length):
+                self.assert_parity([''.join(rng.choice(GEOHASH_BASE32) for _ in range(length)) for _ in range(200)])
+
+    def test_corners(self):
+        geohashes = []
+        for length in range(1, 20):
+            geohashes += ['0' * length, 'z' * length, 'b' * length, 'p' * length, 's' + '0' * (length - 1)]
+        self.assert_parity(geohashes)
+
+    def test_empty(self):
+        self.assert_parity([''])
+
+    def test_mixed_case(self):
+        self.assert_parity(['U4PRUYDQQVJ', 'u4PruYdQqvj', 'Ezs42', 'GCPVJ0DUSN9', 'S' * 17])
+
+    def test_invalid_characters(self):
+        # a, i, l and o are not in the geohash alphabet
+        self.assert_parity(['a', 'u4pa', 'ilo', 'u4pr uy', 'u4pr-', ' u4pr', 'u4pr\n', 'ü4pr', '9' * 16 + 'a',
+                            'K', 'kİ', 'u4pr\x00'])
+        self.assertIsNone(decode_geohashes(['u4pa'])[0])
+
+    def test_characters_that_lowercase_into_the_alphabet(self):
+        # U+212A KELVIN SIGN lowercases to 'k', as it does in JavaScript
+        self.assert_parity(['\u212a', 'u4\u212apr', '\u212a' * 17])
+        self.assertIsNotNone(decode_geohashes(['\u212a'])[0])
+
+    def test_repeated_values_are_cached_consistently(self):
+        self.assert_parity(['u4pruydqqvj', 'bad!', 'u4pruydqqvj', 'bad!', '', ''])
+
+
+if __name__ == '__main__':
+    unittest.main()
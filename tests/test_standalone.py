@@ -0,0 +1,30 @@
+"""The OSMAGIC-Standalone package must ship the same helper code as the repository root"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STANDALONE = os.path.join(ROOT, 'OSMAGIC-Standalone')
+
+
+class StandalonePackageTest(unittest.TestCase):
+
+    def test_copies_match_the_root(self):
+        for filename in ('josm-helper.py', 'osmagic_http.py'):
+            with self.subTest(filename=filename):
+                with open(os.path.join(ROOT, filename), 'rb') as f:
+                    expected = f.read()
+                with open(os.path.join(STANDALONE, filename), 'rb') as f:
+                    self.assertEqual(f.read(), expected, f'OSMAGIC-Standalone/{filename} differs from the root copy')
+
+    def test_helper_imports_without_the_script_folder_on_sys_path(self):
+        # -I leaves the script's folder off sys.path, like the embeddable Python's python311._pth
+        result = subprocess.run([sys.executable, '-I', os.path.join(STANDALONE, 'josm-helper.py'), '--help'],
+                                cwd=ROOT, capture_output=True, text=True, timeout=30)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()